@@ -21,6 +21,7 @@ from app.models.offer_benefit import OfferBenefit
 from app.models.subscription import Subscription
 from app.models.manager_quota import ManagerQuota
 from app.models.wash_record import WashRecord
+from app.models.user_permission import UserPermission
 
 
 from sqlmodel import SQLModel
@@ -0,0 +1,30 @@
+"""index_subscription_user_status
+
+Revision ID: 4d9f1e6a2c87
+Revises: b7e2c4a91d53
+Create Date: 2026-10-19 10:02:47.530913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d9f1e6a2c87'
+down_revision: Union[str, None] = 'b7e2c4a91d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_subscription_user_id_status', 'subscription', ['user_id', 'status'], unique=False)
+    # Rattrapage : les abonnements déjà échus passent à INACTIVE
+    op.execute("UPDATE subscription SET status = 'INACTIVE' WHERE status = 'ACTIVE' AND end_date < now()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_subscription_user_id_status', table_name='subscription')
@@ -0,0 +1,34 @@
+"""add_row_versions
+
+Revision ID: 5a1c7e9d3b24
+Revises: e3a8b5f07c12
+Create Date: 2026-10-19 19:24:05.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1c7e9d3b24'
+down_revision: Union[str, None] = 'e3a8b5f07c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('car_wash', 'user', 'benefit', 'stock_managments')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text("(now() at time zone 'utc')")))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
@@ -0,0 +1,72 @@
+"""create_principal_identity
+
+Revision ID: 7b3f2d8e4a61
+Revises: 5a1c7e9d3b24
+Create Date: 2026-10-19 20:05:41.302518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3f2d8e4a61'
+down_revision: Union[str, None] = '5a1c7e9d3b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+IDENTIFIERS = """
+    SELECT lower(trim(username)) AS identifier, 'username' AS kind, 'user' AS principal_type, id AS principal_id FROM "user"
+    UNION ALL SELECT lower(trim(email)), 'email', 'user', id FROM "user"
+    UNION ALL SELECT lower(trim(username)), 'username', 'employee', id FROM employees
+    UNION ALL SELECT lower(trim(email)), 'email', 'employee', id FROM employees
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Un identifiant partagé par deux comptes ne pourrait servir qu'à l'un d'eux :
+    # on refuse la migration plutôt que de priver l'autre de sa connexion
+    conflicts = op.get_bind().execute(sa.text(
+        f"""
+        SELECT identifier, string_agg(DISTINCT principal_type || ' ' || principal_id || ' (' || kind || ')', ', ') AS accounts
+        FROM ({IDENTIFIERS}) AS identifiers
+        GROUP BY identifier
+        HAVING count(DISTINCT principal_type || ':' || principal_id) > 1
+        ORDER BY identifier
+        """
+    )).all()
+    if conflicts:
+        report = "\n".join(f"  {identifier} : {accounts}" for identifier, accounts in conflicts)
+        raise RuntimeError(
+            "Identifiants de connexion en double (comparés sans casse ni espaces) ; "
+            f"renommez ces comptes puis relancez la migration :\n{report}"
+        )
+
+    op.create_table(
+        'principal_identity',
+        sa.Column('identifier', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('principal_type', sa.String(), nullable=False),
+        sa.Column('principal_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('identifier')
+    )
+    op.create_index('ix_principal_identity_principal', 'principal_identity', ['principal_type', 'principal_id'], unique=False)
+    # Reprise des comptes existants ; un nom d'utilisateur égal à l'email du même compte donne une seule ligne
+    op.execute(
+        f"""
+        INSERT INTO principal_identity (identifier, kind, principal_type, principal_id)
+        SELECT DISTINCT ON (identifier) identifier, kind, principal_type, principal_id
+        FROM ({IDENTIFIERS}) AS identifiers
+        ORDER BY identifier, kind DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_principal_identity_principal', table_name='principal_identity')
+    op.drop_table('principal_identity')
@@ -0,0 +1,45 @@
+"""create_principal_login_view
+
+Revision ID: 9c4e1a7b2f58
+Revises: 7b3f2d8e4a61
+Create Date: 2026-10-19 20:31:12.548906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1a7b2f58'
+down_revision: Union[str, None] = '7b3f2d8e4a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Le filtre sur `identifier` est poussé dans chaque branche : une lecture de
+    # la clé primaire de principal_identity, puis une de la table du compte.
+    op.execute(
+        """
+        CREATE VIEW principal_login AS
+        SELECT pi.identifier, pi.principal_type, u.id, u.username, u.email, u.firstname, u.lastname,
+               u.phone, u.role::text AS role, u.is_active, u.hashed_password
+        FROM principal_identity pi
+        JOIN "user" u ON u.id = pi.principal_id
+        WHERE pi.principal_type = 'user'
+        UNION ALL
+        SELECT pi.identifier, pi.principal_type, e.id, e.username, e.email, e.firstname, e.lastname,
+               e.phone, e.role::text AS role, e.is_active, e.hashed_password
+        FROM principal_identity pi
+        JOIN employees e ON e.id = pi.principal_id
+        WHERE pi.principal_type = 'employee'
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP VIEW principal_login")
@@ -0,0 +1,54 @@
+"""add_token_versions
+
+Revision ID: b2d8f4a6c913
+Revises: 9c4e1a7b2f58
+Create Date: 2026-10-19 20:58:27.904135
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d8f4a6c913'
+down_revision: Union[str, None] = '9c4e1a7b2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_login_view(with_token_version: bool) -> None:
+    token_version = ", {alias}.token_version" if with_token_version else ""
+    op.execute(
+        f"""
+        CREATE VIEW principal_login AS
+        SELECT pi.identifier, pi.principal_type, u.id, u.username, u.email, u.firstname, u.lastname,
+               u.phone, u.role::text AS role, u.is_active, u.hashed_password{token_version.format(alias='u')}
+        FROM principal_identity pi
+        JOIN "user" u ON u.id = pi.principal_id
+        WHERE pi.principal_type = 'user'
+        UNION ALL
+        SELECT pi.identifier, pi.principal_type, e.id, e.username, e.email, e.firstname, e.lastname,
+               e.phone, e.role::text AS role, e.is_active, e.hashed_password{token_version.format(alias='e')}
+        FROM principal_identity pi
+        JOIN employees e ON e.id = pi.principal_id
+        WHERE pi.principal_type = 'employee'
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('token_version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('employees', sa.Column('token_version', sa.Integer(), nullable=False, server_default='1'))
+    op.execute("DROP VIEW principal_login")
+    _create_login_view(with_token_version=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP VIEW principal_login")
+    _create_login_view(with_token_version=False)
+    op.drop_column('employees', 'token_version')
+    op.drop_column('user', 'token_version')
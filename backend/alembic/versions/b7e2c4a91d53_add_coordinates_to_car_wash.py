@@ -0,0 +1,30 @@
+"""add_coordinates_to_car_wash
+
+Revision ID: b7e2c4a91d53
+Revises: 7858bd8c72a4
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4a91d53'
+down_revision: Union[str, None] = '7858bd8c72a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('car_wash', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('car_wash', sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('car_wash', 'longitude')
+    op.drop_column('car_wash', 'latitude')
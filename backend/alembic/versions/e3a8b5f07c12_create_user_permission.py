@@ -0,0 +1,46 @@
+"""create_user_permission
+
+Revision ID: e3a8b5f07c12
+Revises: 4d9f1e6a2c87
+Create Date: 2026-10-19 11:26:13.604412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8b5f07c12'
+down_revision: Union[str, None] = '4d9f1e6a2c87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_permission',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('permission_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('valid_until', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'permission_name')
+    )
+    # Remplissage initial (équivalent à `python -m app.permissions backfill`)
+    op.execute("""
+        INSERT INTO user_permission (user_id, permission_name, valid_until)
+        SELECT s.user_id, b.permission_name,
+               CASE WHEN count(*) > count(s.end_date) THEN NULL ELSE max(s.end_date) END
+        FROM subscription s
+        JOIN offerbenefit ob ON ob.offer_id = s.offer_id
+        JOIN benefit b ON b.id = ob.benefit_id
+        WHERE s.status = 'ACTIVE' AND b.permission_name IS NOT NULL
+        GROUP BY s.user_id, b.permission_name
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_permission')
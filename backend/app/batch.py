@@ -0,0 +1,36 @@
+"""Lecture groupée d'entités par identifiants.
+
+Les routes `/batch` reçoivent `?ids=1&ids=2&...` (au plus `BATCH_MAX_IDS`),
+filtrent une seule fois les entités visibles par l'utilisateur et les chargent
+en une requête `IN (...)` par type d'entité. La réponse est indexée par ID ; les
+identifiants inexistants ou non autorisés sont listés dans `missing`, sans les
+distinguer.
+"""
+from typing import Annotated, Any, Dict, Iterable, List
+
+from dotenv import load_dotenv
+from fastapi import Query
+import os
+
+load_dotenv(encoding="utf-8")
+
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+
+BatchIds = Annotated[
+    List[int],
+    Query(min_length=1, max_length=BATCH_MAX_IDS, description="Identifiants à récupérer (paramètre répété)")
+]
+
+
+def unique_ids(ids: Iterable[int]) -> List[int]:
+    """Identifiants dédoublonnés, dans l'ordre de la requête."""
+    return list(dict.fromkeys(ids))
+
+
+def keyed(message: str, ids: Iterable[int], found: Dict[int, Any]) -> Dict[str, Any]:
+    """Réponse d'une route `/batch` : entités trouvées par ID et IDs manquants."""
+    return {
+        "message": message,
+        "data": found,
+        "missing": [entity_id for entity_id in ids if entity_id not in found]
+    }
@@ -0,0 +1,83 @@
+"""Sous-système de cache de l'API.
+
+- `response_cache.cached(...)` : décorateur des routes GET, étiqueté par entité ;
+- `response_cache.invalidate(...)` : éviction précise depuis les routes d'écriture ;
+- `TTLCache` : petit cache mémoire pour les valeurs internes (droits, etc.) ;
+- `coalesce(...)` : regroupe les requêtes GET identiques et simultanées ;
+- `invalidation_bus` : propage les invalidations aux autres workers (LISTEN/NOTIFY).
+
+Le stockage est choisi par `CACHE_BACKEND` (`memory` par défaut, ou `redis`
+avec `CACHE_REDIS_URL`). `invalidate(...)` passe par le bus : les caches en
+mémoire de tous les workers sont évincés, pas seulement celui du worker courant.
+"""
+from dotenv import load_dotenv
+import os
+
+from app.database import engine
+from app.cache.backends import CacheBackend, MemoryBackend, RedisBackend, TTLCache
+from app.cache.bus import InvalidationBus, InvalidationListener
+from app.cache.http import etag_matches, etag_response, make_etag, serialize
+from app.cache.responses import ResponseCache
+from app.cache.singleflight import SingleFlight
+from app.cache.tags import entity_tag
+
+load_dotenv(encoding="utf-8")
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_BUS_ENABLED = os.getenv("CACHE_BUS_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_BUS_CHANNEL = os.getenv("CACHE_BUS_CHANNEL", "cgla_cache")
+CACHE_BUS_MAX_LAG = float(os.getenv("CACHE_BUS_MAX_LAG", "5"))
+CACHE_BUS_MAX_BATCH = int(os.getenv("CACHE_BUS_MAX_BATCH", "500"))
+
+
+def build_backend() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        return RedisBackend.from_url(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    return MemoryBackend(maxsize=CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(build_backend(), default_ttl=CACHE_DEFAULT_TTL)
+cached = response_cache.cached
+
+single_flight = SingleFlight()
+coalesce = single_flight.coalesce
+
+invalidation_bus = InvalidationBus(channel=CACHE_BUS_CHANNEL, engine=engine, enabled=CACHE_BUS_ENABLED)
+invalidate = invalidation_bus.publish
+
+# Familles d'étiquettes posées par `@cached` ; les autres (droits, jetons,
+# catalogue, ...) ont leurs propres abonnés et ne touchent pas aux réponses
+RESPONSE_CACHE_PREFIXES = ("car_wash:", "owner:", "benefit:", "stocks:")
+
+for index, prefix in enumerate(RESPONSE_CACHE_PREFIXES):
+    invalidation_bus.subscribe(
+        prefix,
+        lambda tags: response_cache.invalidate(*tags),
+        # Un seul vidage par flush ; un stockage partagé (Redis) n'est pas vidé
+        # quand un worker prend du retard
+        on_flush=None if index or response_cache.backend.shared else response_cache.clear
+    )
+
+
+def start_invalidation_listener() -> InvalidationListener:
+    """Démarre l'écoute du bus sur une connexion dédiée (une par worker)."""
+    connect_kwargs = engine.url.translate_connect_args(username="user", database="dbname")
+    listener = InvalidationListener(
+        invalidation_bus,
+        connect_kwargs,
+        max_lag=CACHE_BUS_MAX_LAG,
+        max_batch=CACHE_BUS_MAX_BATCH
+    )
+    listener.start()
+    return listener
+
+
+__all__ = [
+    "CacheBackend", "MemoryBackend", "RedisBackend", "TTLCache", "ResponseCache",
+    "response_cache", "cached", "invalidate", "entity_tag", "RESPONSE_CACHE_PREFIXES",
+    "SingleFlight", "single_flight", "coalesce",
+    "InvalidationBus", "InvalidationListener", "invalidation_bus", "start_invalidation_listener",
+    "serialize", "make_etag", "etag_matches", "etag_response",
+]
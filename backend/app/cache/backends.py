@@ -0,0 +1,190 @@
+"""Stockages du cache : LRU+TTL en mémoire et Redis optionnel.
+
+Les backends de réponses (`MemoryBackend`, `RedisBackend`) stockent des octets
+et indexent chaque entrée par étiquette exacte ; la sémantique des étiquettes
+(`entite:id`, `entite:*`) est gérée par `app.cache.tags`.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class TTLCache:
+    """Cache LRU en mémoire dont chaque entrée expire après `ttl` secondes."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class CacheBackend(ABC):
+    """Interface commune des stockages de réponses."""
+
+    # Un stockage partagé entre workers n'a pas besoin du bus d'invalidation
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Supprime les entrées portant l'une des étiquettes et renvoie leur nombre."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Stockage LRU+TTL propre au processus, avec index des étiquettes."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _drop(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            self._drop(key)
+            self._data[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._drop(next(iter(self._data)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+
+class RedisBackend(CacheBackend):
+    """Stockage partagé dans Redis ; chaque étiquette est un SET des clés associées.
+
+    `client` est un client `redis.Redis` (ou toute implémentation compatible,
+    par exemple `fakeredis.FakeRedis` pour les essais en local).
+    """
+
+    shared = True
+
+    def __init__(self, client: Any, prefix: str = "cgla:cache:", tag_ttl: int = 86400):
+        self.client = client
+        self.prefix = prefix
+        self.tag_ttl = tag_ttl
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "cgla:cache:") -> "RedisBackend":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Le backend de cache Redis nécessite le paquet `redis`") from e
+        return cls(redis.Redis.from_url(url), prefix=prefix)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}k:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}t:{tag}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self._key(key))
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        seconds = max(1, int(ttl))
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), value, ex=seconds)
+        for tag in tags:
+            pipe.sadd(self._tag(tag), self._key(key))
+            # L'index survit à ses entrées ; une clé déjà expirée y est inoffensive
+            pipe.expire(self._tag(tag), max(self.tag_ttl, seconds))
+        pipe.execute()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tag_keys = [self._tag(tag) for tag in tags]
+        if not tag_keys:
+            return 0
+        keys = self.client.sunion(tag_keys)
+        pipe = self.client.pipeline()
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(*tag_keys)
+        pipe.execute()
+        return len(keys)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
@@ -0,0 +1,186 @@
+"""Bus d'invalidation entre workers, porté par LISTEN/NOTIFY de Postgres.
+
+`publish(*tags)` applique l'invalidation dans le processus courant puis envoie
+un `NOTIFY` sur le canal `CACHE_BUS_CHANNEL`. Chaque worker écoute ce canal sur
+une connexion dédiée (thread `InvalidationListener`) et transmet les étiquettes
+reçues aux abonnés dont le préfixe correspond.
+
+Un worker qui a pu manquer des messages (reconnexion, retard supérieur à
+`max_lag` secondes, rafale de plus de `max_batch` messages) vide entièrement
+ses caches locaux au lieu de rejouer les invalidations une par une.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import func, select as sql_select
+
+logger = logging.getLogger(__name__)
+
+# Limite de Postgres pour la charge utile d'un NOTIFY (8000 octets)
+MAX_PAYLOAD = 7900
+FLUSH_ALL = "*"
+
+
+@dataclass
+class Subscriber:
+    prefix: str
+    on_tags: Callable[[List[str]], None]
+    on_flush: Optional[Callable[[], None]] = None
+    remote_only: bool = False
+
+
+class InvalidationBus:
+    """Registre des abonnés et publication des invalidations."""
+
+    def __init__(self, channel: str = "cgla_cache", engine=None, enabled: bool = True):
+        self.channel = channel
+        self.engine = engine
+        self.enabled = enabled
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._subscribers: List[Subscriber] = []
+
+    def subscribe(self, prefix: str, on_tags: Callable[[List[str]], None], on_flush: Optional[Callable[[], None]] = None, remote_only: bool = False) -> None:
+        """Enregistre un abonné aux étiquettes commençant par `prefix` ("" : toutes).
+
+        `remote_only` réserve l'abonné aux messages des autres workers, pour un
+        cache que le worker auteur de l'écriture a déjà mis à jour lui-même.
+        """
+        self._subscribers.append(Subscriber(prefix, on_tags, on_flush, remote_only))
+
+    def dispatch(self, tags: Iterable[str], remote: bool) -> None:
+        tags = list(tags)
+        if FLUSH_ALL in tags:
+            self.flush(remote)
+            return
+        for subscriber in self._subscribers:
+            if subscriber.remote_only and not remote:
+                continue
+            matching = [tag for tag in tags if tag.startswith(subscriber.prefix)]
+            if not matching:
+                continue
+            try:
+                subscriber.on_tags(matching)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'invalidation {matching} : {str(e)}")
+
+    def flush(self, remote: bool = True) -> None:
+        """Vide tous les caches locaux abonnés."""
+        for subscriber in self._subscribers:
+            if subscriber.on_flush is None or (subscriber.remote_only and not remote):
+                continue
+            try:
+                subscriber.on_flush()
+            except Exception as e:
+                logger.error(f"Erreur lors du vidage du cache ({subscriber.prefix or 'tout'}) : {str(e)}")
+
+    def publish(self, *tags: str) -> None:
+        """Invalide localement puis prévient les autres workers (à appeler après le commit)."""
+        if not tags:
+            return
+        self.dispatch(tags, remote=False)
+        if not self.enabled or self.engine is None:
+            return
+
+        payload = json.dumps({"o": self.origin, "ts": time.time(), "t": sorted(set(tags))})
+        if len(payload.encode()) > MAX_PAYLOAD:
+            payload = json.dumps({"o": self.origin, "ts": time.time(), "t": [FLUSH_ALL]})
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(sql_select(func.pg_notify(self.channel, payload)))
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication de l'invalidation {tags} : {str(e)}")
+
+
+class InvalidationListener(threading.Thread):
+    """Écoute le canal du bus sur une connexion psycopg2 dédiée et distribue les messages."""
+
+    def __init__(self, bus: InvalidationBus, connect_kwargs: dict, max_lag: float = 5, max_batch: int = 500, poll_timeout: float = 1, retry_delay: float = 1):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.bus = bus
+        self.connect_kwargs = connect_kwargs
+        self.max_lag = max_lag
+        self.max_batch = max_batch
+        self.poll_timeout = poll_timeout
+        self.retry_delay = retry_delay
+        self._stop_event = threading.Event()
+        self._connection = None
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop_event.set()
+        self.join(timeout)
+
+    def _connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(**self.connect_kwargs)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.bus.channel}"')
+        return connection
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def handle(self, payloads: List[str]) -> None:
+        """Traite un lot de notifications reçues en une fois."""
+        if len(payloads) > self.max_batch:
+            logger.warning(f"{len(payloads)} invalidations en attente : vidage complet des caches")
+            self.bus.flush()
+            return
+
+        tags = set()
+        now = time.time()
+        for payload in payloads:
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                logger.error(f"Message d'invalidation illisible : {payload[:200]}")
+                continue
+            if message.get("o") == self.bus.origin:
+                continue
+            if now - message.get("ts", now) > self.max_lag:
+                logger.warning(f"Invalidation reçue avec {now - message['ts']:.1f}s de retard : vidage complet des caches")
+                self.bus.flush()
+                return
+            tags.update(message.get("t", []))
+        if tags:
+            self.bus.dispatch(tags, remote=True)
+
+    def run(self) -> None:
+        connected_once = False
+        while not self._stop_event.is_set():
+            try:
+                if self._connection is None:
+                    self._connection = self._connect()
+                    if connected_once:
+                        # Des messages ont pu être perdus pendant la coupure
+                        self.bus.flush()
+                    connected_once = True
+
+                readable, _, _ = select.select([self._connection], [], [], self.poll_timeout)
+                if not readable:
+                    continue
+                self._connection.poll()
+                notifies = self._connection.notifies
+                payloads = [notify.payload for notify in notifies]
+                notifies.clear()
+                if payloads:
+                    self.handle(payloads)
+            except Exception as e:
+                logger.error(f"Écoute des invalidations interrompue : {str(e)}")
+                self._close()
+                self._stop_event.wait(self.retry_delay)
+        self._close()
@@ -0,0 +1,40 @@
+"""Utilitaires HTTP du cache : sérialisation, ETag et réponses 304."""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+from app.serialization import dumps
+
+
+def serialize(data: Any) -> bytes:
+    """Sérialise une réponse en JSON compact, prête à être mise en cache."""
+    return dumps(data)
+
+
+def make_etag(body: bytes) -> str:
+    """Calcule un ETag fort à partir du contenu sérialisé."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indique si l'en-tête If-None-Match de la requête correspond à l'ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def etag_response(request: Request, body: bytes, etag: str, max_age: int = 0, public: bool = False) -> Response:
+    """Renvoie le corps JSON avec son ETag, ou un 304 si le client l'a déjà.
+
+    Sur une route versionnée par `conditional_get`, l'ETag de ligne posé par
+    `RowVersionMiddleware` est le seul validateur : l'ETag du corps est omis.
+    """
+    headers = {"Cache-Control": f"{'public' if public else 'private'}, max-age={max_age}"}
+    if getattr(request.state, "row_version", None) is None:
+        headers["ETag"] = etag
+        if etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
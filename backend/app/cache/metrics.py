@@ -0,0 +1,30 @@
+"""Compteurs par route : succès/échecs du cache, requêtes regroupées, etc."""
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+class CacheMetrics:
+    """Paire de compteurs par route ; `ratio` = premier compteur / total."""
+
+    def __init__(self, counters: Tuple[str, str] = ("hits", "misses"), ratio: str = "hit_ratio"):
+        self.counters = counters
+        self.ratio = ratio
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.counters, 0))
+        self._lock = threading.Lock()
+
+    def incr(self, route: str, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[route][counter] += amount
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            data = {}
+            for route, counters in self._counters.items():
+                total = sum(counters.values())
+                data[route] = {**counters, self.ratio: round(counters[self.counters[0]] / total, 4) if total else 0}
+            return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
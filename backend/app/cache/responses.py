@@ -0,0 +1,112 @@
+"""Mise en cache des réponses GET, étiquetées par entité."""
+import functools
+import inspect
+import logging
+from typing import Any, Callable, Iterable, Tuple, Union
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.cache.backends import CacheBackend
+from app.cache.http import etag_response, make_etag, serialize
+from app.cache.metrics import CacheMetrics
+from app.cache.tags import eviction_tags, storage_tags
+
+logger = logging.getLogger(__name__)
+
+TagsSpec = Union[Iterable[str], Callable[..., Iterable[str]]]
+
+REQUEST_PARAM = "_cache_request"
+
+
+def auth_scope(kwargs: dict, scope: str) -> str:
+    """Partie de la clé qui isole les réponses par utilisateur, par rôle, ou les partage."""
+    current_user = kwargs.get("current_user")
+    if scope == "public" or not isinstance(current_user, dict):
+        return "public"
+    if scope == "role":
+        return f"role={current_user.get('role')}"
+    return f"user={current_user.get('role')}:{current_user.get('id')}"
+
+
+def request_key(request: Request, kwargs: dict, scope: str) -> Tuple[str, str]:
+    """Renvoie (route, clé) d'une requête : route, chemin, paramètres et portée."""
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    return route, f"{route}|{request.url.path}?{request.url.query}|{auth_scope(kwargs, scope)}"
+
+
+def with_request_param(func, wrapper):
+    """Ajoute à la signature lue par FastAPI un paramètre recevant la requête."""
+    signature = inspect.signature(func)
+    parameters = list(signature.parameters.values())
+    parameters.append(inspect.Parameter(REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+
+class ResponseCache:
+    """Associe un backend, des métriques et la politique de clés/étiquettes."""
+
+    def __init__(self, backend: CacheBackend, default_ttl: float = 60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.metrics = CacheMetrics()
+
+    def invalidate(self, *tags: str) -> int:
+        """Évince les entrées des entités modifiées (à appeler après le commit)."""
+        if not tags:
+            return 0
+        try:
+            return self.backend.invalidate_tags(eviction_tags(tags))
+        except Exception as e:
+            logger.error(f"Erreur lors de l'invalidation du cache {tags} : {str(e)}")
+            return 0
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def cached(self, tags: TagsSpec = (), ttl: float = None, scope: str = "user"):
+        """Décorateur pour une route GET : sert la réponse depuis le cache avec un ETag.
+
+        `tags` est une liste d'étiquettes ou une fonction recevant les paramètres de
+        la route (par ex. `lambda wash_id, **_: [f"car_wash:{wash_id}"]`).
+        `scope` isole les entrées par utilisateur (`user`), par rôle (`role`) ou
+        les partage entre tous (`public`).
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+
+        def decorator(func):
+            is_async = inspect.iscoroutinefunction(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request: Request = kwargs.pop(REQUEST_PARAM)
+                route, key = request_key(request, kwargs, scope)
+
+                try:
+                    cached_value = self.backend.get(key)
+                except Exception as e:
+                    logger.error(f"Erreur de lecture du cache {key} : {str(e)}")
+                    cached_value = None
+                if cached_value is not None:
+                    self.metrics.incr(route, "hits")
+                    etag, _, body = cached_value.partition(b"\n")
+                    return etag_response(request, body, etag.decode())
+
+                self.metrics.incr(route, "misses")
+                result = await func(*args, **kwargs) if is_async else await run_in_threadpool(func, *args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+
+                body = serialize(result)
+                etag = make_etag(body)
+                entry_tags = tags(**kwargs) if callable(tags) else tags
+                try:
+                    self.backend.set(key, etag.encode() + b"\n" + body, ttl, storage_tags(entry_tags))
+                except Exception as e:
+                    logger.error(f"Erreur d'écriture du cache {key} : {str(e)}")
+                return etag_response(request, body, etag)
+
+            return with_request_param(func, wrapper)
+
+        return decorator
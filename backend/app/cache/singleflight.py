@@ -0,0 +1,78 @@
+"""Regroupement des requêtes GET identiques et simultanées (« single-flight »).
+
+Tant qu'un calcul est en cours pour une clé (route, chemin, paramètres et portée
+d'autorisation), les requêtes identiques qui arrivent attendent ce même calcul
+au lieu de relancer toutes les requêtes SQL. Le résultat est sérialisé une fois
+et partagé ; rien n'est conservé après la fin du calcul.
+"""
+import asyncio
+import functools
+import inspect
+from typing import Dict
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.cache.http import etag_response, make_etag, serialize
+from app.cache.metrics import CacheMetrics
+from app.cache.responses import REQUEST_PARAM, request_key, with_request_param
+from app.database import SessionLocal
+
+
+class SingleFlight:
+    """Calculs en cours par clé, avec compteurs `coalesced` / `executed` par route."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.metrics = CacheMetrics(counters=("coalesced", "executed"), ratio="coalesced_ratio")
+
+    async def _compute(self, func, is_async: bool, args, kwargs):
+        # Le calcul partagé a ses propres sessions : celle du premier demandeur est
+        # fermée par FastAPI s'il se déconnecte, alors que les autres attendent encore
+        sessions = {name: SessionLocal() for name, value in kwargs.items() if isinstance(value, Session)}
+        try:
+            kwargs = {**kwargs, **sessions}
+            result = await func(*args, **kwargs) if is_async else await run_in_threadpool(func, *args, **kwargs)
+        finally:
+            for session in sessions.values():
+                session.close()
+        if isinstance(result, Response):
+            return result
+        body = serialize(result)
+        return body, make_etag(body)
+
+    def coalesce(self, scope: str = "user"):
+        """Décorateur pour une route GET coûteuse.
+
+        `scope` a le même sens que pour `cached` : seules les requêtes d'un même
+        utilisateur (`user`), d'un même rôle (`role`) ou toutes (`public`) sont
+        regroupées, selon ce dont dépend la réponse.
+        """
+        def decorator(func):
+            is_async = inspect.iscoroutinefunction(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request: Request = kwargs.pop(REQUEST_PARAM)
+                route, key = request_key(request, kwargs, scope)
+
+                task = self._inflight.get(key)
+                if task is None:
+                    self.metrics.incr(route, "executed")
+                    task = asyncio.ensure_future(self._compute(func, is_async, args, kwargs))
+                    self._inflight[key] = task
+                    task.add_done_callback(lambda done: self._inflight.pop(key) if self._inflight.get(key) is done else None)
+                else:
+                    self.metrics.incr(route, "coalesced")
+
+                # Un client qui se déconnecte n'annule pas le calcul attendu par les autres
+                result = await asyncio.shield(task)
+                if isinstance(result, Response):
+                    return result
+                body, etag = result
+                return etag_response(request, body, etag)
+
+            return with_request_param(func, wrapper)
+
+        return decorator
@@ -0,0 +1,44 @@
+"""Étiquettes d'entités du cache de réponses.
+
+Une entrée est étiquetée par les entités qu'elle contient : `car_wash:12` pour
+le détail d'une station, `car_wash:*` pour une liste de stations. Règles :
+
+- écrire l'entité `car_wash:12` évince `car_wash:12` et les listes `car_wash:*` ;
+- `invalidate("car_wash:*")` évince toute la famille `car_wash`.
+"""
+from typing import Iterable, List
+
+WILDCARD = "*"
+FAMILY = "#"
+
+
+def entity_tag(entity: str, entity_id=WILDCARD) -> str:
+    return f"{entity}:{entity_id}"
+
+
+def _split(tag: str):
+    entity, _, entity_id = tag.partition(":")
+    return entity, entity_id or WILDCARD
+
+
+def storage_tags(tags: Iterable[str]) -> List[str]:
+    """Étiquettes sous lesquelles indexer une entrée."""
+    expanded = []
+    for tag in tags:
+        entity, entity_id = _split(tag)
+        expanded.append(entity_tag(entity, entity_id))
+        expanded.append(entity_tag(entity, FAMILY))
+    return sorted(set(expanded))
+
+
+def eviction_tags(tags: Iterable[str]) -> List[str]:
+    """Étiquettes à évincer pour une écriture portant sur `tags`."""
+    expanded = []
+    for tag in tags:
+        entity, entity_id = _split(tag)
+        if entity_id == WILDCARD:
+            expanded.append(entity_tag(entity, FAMILY))
+        else:
+            expanded.append(entity_tag(entity, entity_id))
+            expanded.append(entity_tag(entity, WILDCARD))
+    return sorted(set(expanded))
@@ -0,0 +1,133 @@
+"""Catalogue des offres et de leurs avantages, précalculé et sérialisé.
+
+Le catalogue complet (offre x avantages) est construit en deux requêtes puis
+gardé en mémoire sous forme de corps JSON prêts à l'envoi, chacun avec son ETag.
+Les routes d'écriture des offres, avantages et offer_benefits appellent
+`offer_catalog.invalidate()`, relayé aux autres workers par le bus
+d'invalidation ; la reconstruction a lieu à la lecture suivante.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cache import invalidate, invalidation_bus, make_etag, serialize
+from app.models.benefit import Benefit
+from app.models.offer import Offer
+from app.models.offer_benefit import OfferBenefit
+
+Blob = Tuple[bytes, str]  # (corps JSON, ETag)
+
+PUBLIC_BENEFIT_FIELDS = ("id", "name", "description", "icon")
+
+
+def _blob(payload: Any) -> Blob:
+    body = serialize(payload)
+    return body, make_etag(body)
+
+
+@dataclass
+class CatalogSnapshot:
+    offers: List[Dict[str, Any]]
+    all_offers: Blob
+    public: Blob
+    offer_details: Dict[int, Blob] = field(default_factory=dict)
+    offer_benefits: Dict[int, Blob] = field(default_factory=dict)
+
+
+def build_snapshot(db: Session) -> CatalogSnapshot:
+    offers = db.execute(select(Offer).order_by(Offer.id)).scalars().all()
+    links = db.execute(
+        select(OfferBenefit.offer_id, Benefit)
+        .join(Benefit, Benefit.id == OfferBenefit.benefit_id)
+        .order_by(OfferBenefit.offer_id, Benefit.id)
+    ).all()
+
+    benefits_by_offer: Dict[int, List[Dict[str, Any]]] = {}
+    for offer_id, benefit in links:
+        benefits_by_offer.setdefault(offer_id, []).append(benefit.model_dump())
+
+    catalog = []
+    for offer in offers:
+        data = offer.model_dump()
+        data["benefits"] = benefits_by_offer.get(offer.id, [])
+        catalog.append(data)
+
+    public_catalog = [
+        {
+            "id": offer["id"],
+            "name": offer["name"],
+            "description": offer["description"],
+            "price": offer["price"],
+            "icon": offer["icon"],
+            "benefits": [{key: benefit[key] for key in PUBLIC_BENEFIT_FIELDS} for benefit in offer["benefits"]],
+        }
+        for offer in catalog
+    ]
+
+    return CatalogSnapshot(
+        offers=catalog,
+        all_offers=_blob({
+            "message": "Offers retrieved successfully",
+            "offers": catalog,
+            "next_cursor": None
+        }),
+        public=_blob({
+            "message": "Catalogue récupéré avec succès",
+            "offers": public_catalog
+        }),
+        offer_details={
+            offer["id"]: _blob({
+                "message": "Offre récupérée avec succès",
+                "data": offer
+            })
+            for offer in catalog
+        },
+        offer_benefits={
+            offer["id"]: _blob({
+                "message": "Benefits retrieved successfully",
+                "data": {
+                    "offer_id": offer["id"],
+                    "benefits": offer["benefits"]
+                }
+            })
+            for offer in catalog
+        },
+    )
+
+
+class OfferCatalog:
+    """Détient le dernier instantané du catalogue et le reconstruit après invalidation."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            generation = self._generation
+        snapshot = build_snapshot(db)
+        with self._lock:
+            # Une écriture survenue pendant la construction rend cet instantané caduc
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def reset(self, *_) -> None:
+        """Oublie l'instantané du worker courant."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def invalidate(self) -> None:
+        """Périme le catalogue dans tous les workers."""
+        invalidate("catalog")
+
+
+offer_catalog = OfferCatalog()
+invalidation_bus.subscribe("catalog", offer_catalog.reset, on_flush=offer_catalog.reset)
@@ -0,0 +1,146 @@
+"""Compression gzip/brotli des réponses.
+
+Seules les réponses envoyées d'un bloc (`more_body` absent) sont compressées :
+les flux (exports, fichiers) passent tels quels, comme les corps déjà encodés,
+les types non compressibles et ceux sous `COMPRESSION_MIN_SIZE` octets. Au-delà
+de `COMPRESSION_THREAD_SIZE` octets, la compression se fait dans un thread pour
+ne pas bloquer la boucle d'événements.
+
+Brotli est utilisé si le paquet `brotli` est installé et que le client l'accepte.
+Un ETag fort est affaibli (`W/`) sur une réponse compressée.
+"""
+import asyncio
+import gzip
+import os
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+load_dotenv(encoding="utf-8")
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") not in ("0", "false", "False")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_SIZE = int(os.getenv("COMPRESSION_THREAD_SIZE", "65536"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Analyse `Accept-Encoding` : encodage -> poids `q`."""
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        encodings[name.strip().lower()] = weight
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Meilleur encodage supporté accepté par le client (brotli d'abord à poids égal)."""
+    encodings = accepted_encodings(header)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_weight = None, 0.0
+    for name in candidates:
+        weight = encodings.get(name, encodings.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compresse les réponses complètes selon l'en-tête `Accept-Encoding`."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, thread_size: int = COMPRESSION_THREAD_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept)
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = {key.lower(): value for key, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # en attente du corps pour connaître sa taille
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # flux ou petite réponse : envoyée telle quelle
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = [(key, value) for key, value in start.get("headers", []) if key.lower() not in (b"content-length", b"vary")]
+            vary = [value for key, value in start.get("headers", []) if key.lower() == b"vary"]
+            if not any(b"accept-encoding" in value.lower() for value in vary):
+                vary.append(b"Accept-Encoding")
+            headers.append((b"vary", b", ".join(vary)))
+            if encoding is not None:
+                if len(body) >= self.thread_size:
+                    body = await asyncio.to_thread(compress, body, encoding)
+                else:
+                    body = compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+                # Le corps encodé n'est plus identique octet pour octet : un ETag fort devient faible
+                headers = [
+                    (key, b"W/" + value if key.lower() == b"etag" and not value.startswith(b"W/") else value)
+                    for key, value in headers
+                ]
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
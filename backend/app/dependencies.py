@@ -1,36 +1,54 @@
 from fastapi import Depends, HTTPException, status, Security
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.security import OAuth2PasswordBearer
-from typing import Annotated, Dict, Any, Optional
+from typing import Annotated, Dict, Any, FrozenSet, NamedTuple, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import event
+from sqlalchemy.orm import Session, aliased
 from dotenv import load_dotenv
 from app.database import SessionLocal
+from app.cache import TTLCache, invalidate, invalidation_bus
 from app.models.user import User, RoleUser
 from app.models.employee import RoleEmployee, Employee
 from app.models.subscription import Subscription, Status
-from app.models.benefit import Benefit
 from app.models.car_wash import CarWash
 from app.models.car_wash_employee import CarWashEmployee
-from app.models.offer_benefit import OfferBenefit
+from app.models.user_permission import UserPermission
+from app.models.principal_login import principal_login
+from app.identities import normalize_identifier
+from app.revocation import principal_type_of, token_versions
+from app.policy import is_allowed, permission_bit
+from sqlalchemy import and_, select
 from pydantic import BaseModel
 
 import os
+import hashlib
+import time
 from fastapi import APIRouter, Request
 
 load_dotenv(encoding="utf-8")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
+ENTITLEMENT_CACHE_TTL = int(os.getenv("ENTITLEMENT_CACHE_TTL", "60"))
+LOGIN_MISS_CACHE_TTL = int(os.getenv("LOGIN_MISS_CACHE_TTL", "30"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 
 
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/login")
 bearer_scheme = HTTPBearer()
 router = APIRouter()
+entitlement_cache = TTLCache(maxsize=10000, ttl=ENTITLEMENT_CACHE_TTL)
+# Identifiants inconnus récemment essayés : évite de relire la base pendant une rafale de tentatives
+login_miss_cache = TTLCache(maxsize=10000, ttl=LOGIN_MISS_CACHE_TTL)
+# Jetons déjà vérifiés (empreinte SHA-256 -> claims), gardés jusqu'à leur `exp`
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=0)
+_MISSING = object()
+_DENIED = object()
 
 def get_db():
     """Crée et gère une session de base de données."""
@@ -43,13 +61,45 @@ def get_db():
 DbDependency = Annotated[Session, Depends(get_db)]
 
 
+def get_unit_of_work():
+    """Session transactionnelle d'une requête : un seul commit, à la fin.
+
+    Les routes ajoutent leurs objets et appellent `flush()` pour obtenir les
+    identifiants générés ; la transaction est validée à la sortie de la route, ou
+    annulée si elle lève une exception. Les objets restent lisibles après le
+    commit (`expire_on_commit=False`), sans `refresh()`.
+    """
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+UnitOfWork = Annotated[Session, Depends(get_unit_of_work)]
+
+
+def after_commit(db: Session, callback, *args):
+    """Exécute `callback(*args)` une fois la transaction de `db` validée (invalidations de cache, etc.)."""
+    event.listen(db, "after_commit", lambda session: callback(*args), once=True)
+
+
 def authenticate_user(db: Session, identifier: str, password: str):
-    """Authentifie un utilisateur."""
-    user = db.query(User).where((User.username == identifier) | (User.email == identifier)).first()
-    if not user: 
-        user = db.query(Employee).where((Employee.username == identifier) | (Employee.email == identifier)).first()
-        if not user:
-            return False 
+    """Authentifie un utilisateur ou un employé par nom d'utilisateur ou email.
+
+    Une seule lecture par clé dans la vue `principal_login` ; les identifiants
+    inconnus sont mémorisés `LOGIN_MISS_CACHE_TTL` secondes.
+    """
+    identifier = normalize_identifier(identifier)
+    if login_miss_cache.get(identifier):
+        return False
+    user = db.execute(select(principal_login).where(principal_login.c.identifier == identifier)).first()
+    if not user:
+        login_miss_cache.set(identifier, True)
+        return False
     
     if not user.is_active:
         raise HTTPException(
@@ -67,6 +117,8 @@ def authenticate_user(db: Session, identifier: str, password: str):
 def create_access_token(user: BaseModel, expires_delta: timedelta = None):
     """Crée un token JWT."""
     encode = {'email': user.email, 'firstname': user.firstname, 'lastname': user.lastname, 'phone': user.phone, 'username': user.username, 'id': user.id, 'role': user.role, 'is_active': user.is_active}
+    # Version du compte à l'émission : le jeton est refusé dès qu'elle est dépassée
+    encode.update({'pt': principal_type_of(user), 'tv': getattr(user, 'token_version', 1)})
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -80,6 +132,21 @@ def get_access_token(token: str) -> Dict[str, Any]:
     decoded_jwt = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
     return decoded_jwt
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Décode un token JWT, en ne vérifiant la signature qu'à sa première présentation.
+
+    Les claims sont mis en cache sous l'empreinte du token jusqu'à son expiration ;
+    chaque appel renvoie une copie, que la route peut modifier sans risque.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = get_access_token(token)
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_cache.set(key, claims, ttl=ttl)
+    return dict(claims)
+
 
 # def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: DbDependency) -> User:
 #     """Récupère l'utilisateur actuel à partir du token JWT."""
@@ -106,7 +173,11 @@ def get_access_token(token: str) -> Dict[str, Any]:
 
 # def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Dict[str, Any]:
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(bearer_scheme)) -> Dict[str, Any]:
-    """Récupère l'utilisateur actuel à partir du token JWT."""
+    """Récupère l'utilisateur actuel à partir du token JWT.
+
+    FastAPI ne résout la dépendance qu'une fois par requête, même si plusieurs
+    dépendances (`require(...)`, `check_stock_access`, ...) la demandent.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Token incorrect ou expiré",
@@ -114,11 +185,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
     )
     try:
         token = credentials.credentials
-        user_data = get_access_token(token)
-        if not user_data:
+        user_data = decode_access_token(token)
+        if not user_data or token_versions.is_revoked(user_data):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    # Sans bus, seule la base connaît les révocations faites par les autres workers
+    if not invalidation_bus.enabled and await run_in_threadpool(token_versions.is_revoked_in_db, user_data):
+        raise credentials_exception
     
     return user_data
 
@@ -150,6 +224,64 @@ def check_manager(db: DbDependency, current_user: Annotated[User, Depends(get_cu
         )
     return current_user
 
+def require(action: str, resource: str, detail: str = "Vous n'êtes pas autorisé a effectué cette action"):
+    """Factory de dépendance : exige que le rôle de l'utilisateur autorise `action` sur `resource`.
+
+    Le couple est résolu en bit à la déclaration de la route ; à chaque requête,
+    la vérification se réduit à un test sur le masque compilé du rôle (`app.policy`).
+    """
+    bit = permission_bit(action, resource)
+
+    def checker(current_user: Dict[str, Any] = Depends(get_current_user)):
+        if not current_user['is_active']:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Utilisateur inactif"
+            )
+        if not is_allowed(current_user['role'], bit):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+        return current_user
+    return checker
+
+_MANAGE_STOCK = permission_bit("manage", "stock")
+
+def has_permission(db: Session, user_id: int, permission_name: str) -> bool:
+    """Indique si l'utilisateur dispose de la permission via son abonnement actif.
+
+    Une seule lecture par clé primaire dans `user_permission`, mise en cache par
+    utilisateur ; les reconstructions de la table évincent l'entrée concernée.
+    """
+    permissions = entitlement_cache.get(user_id)
+    if permissions is None:
+        permissions = {}
+        entitlement_cache.set(user_id, permissions)
+
+    valid_until = permissions.get(permission_name, _MISSING)
+    if valid_until is _MISSING:
+        permission = db.get(UserPermission, (user_id, permission_name))
+        valid_until = _DENIED if permission is None else permission.valid_until
+        permissions[permission_name] = valid_until
+
+    if valid_until is _DENIED:
+        return False
+    return valid_until is None or valid_until >= datetime.now()
+
+def evict_entitlements(*user_ids: int):
+    """Retire du cache de chaque worker les droits des utilisateurs dont l'abonnement a changé."""
+    invalidate(*[f"entitlements:{user_id}" for user_id in user_ids])
+
+def _drop_entitlements(tags):
+    for tag in tags:
+        entitlement_cache.delete(int(tag.split(":", 1)[1]))
+
+invalidation_bus.subscribe("entitlements:", _drop_entitlements, on_flush=entitlement_cache.clear)
+
+def _drop_login_misses(tags):
+    for tag in tags:
+        login_miss_cache.delete(tag.split(":", 1)[1])
+
+invalidation_bus.subscribe("identity:", _drop_login_misses, on_flush=login_miss_cache.clear)
+
 def check_advantage(db: DbDependency, current_user: Dict[str, Any] = Depends(get_current_user), required_benefit: str = None):
     """Vérifie si l'utilisateur a un abonnement actif avec l'avantage requis."""
     # Vérifier si l'utilisateur est un propriétaire de lavage
@@ -159,28 +291,17 @@ def check_advantage(db: DbDependency, current_user: Dict[str, Any] = Depends(get
             detail="Seuls les propriétaires de station lavage peuvent accéder à cette fonctionnalité"
         )
     
-    # Récupérer l'abonnement actif
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user['id'],
-        Subscription.status == Status.ACTIVE,
-        or_(Subscription.end_date.is_(None), Subscription.end_date >= datetime.now(timezone.utc))
-    ).first()
-    
-    if not subscription:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Aucun abonnement actif trouvé"
-        )
-    
-    # Vérifier si le benefit requis est lié à l'offre (join sur offer_benefit et benefit)
-    has_benefit = db.query(Benefit).join(
-        OfferBenefit, OfferBenefit.benefit_id == Benefit.id
-    ).filter(
-        OfferBenefit.offer_id == subscription.offer_id,
-        Benefit.permission_name == required_benefit  # Assure-toi que 'name' est unique pour les benefits
-    ).first()
-    
-    if not has_benefit:
+    if not has_permission(db, current_user['id'], required_benefit):
+        # Chemin d'échec uniquement : distinguer l'absence d'abonnement d'un avantage manquant
+        subscription = db.query(Subscription.id).filter(
+            Subscription.user_id == current_user['id'],
+            Subscription.status == Status.ACTIVE
+        ).first()
+        if not subscription:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Aucun abonnement actif trouvé"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"L'abonnement ne permet pas l'accès à la fonctionnalité : {required_benefit}"
@@ -209,6 +330,7 @@ def check_subscription_status(subscription: Subscription):
     """
     if subscription.status == Status.PENDING:
         return "pending"
+    # Date de fin avant le statut : un abonnement échu reste ACTIVE jusqu'au prochain balayage
     elif subscription.end_date and subscription.end_date < datetime.now():
         return "expired"
     elif subscription.status == Status.ACTIVE:
@@ -216,65 +338,128 @@ def check_subscription_status(subscription: Subscription):
     else:
         return "inactive"
     
-def check_garage_access(db: DbDependency, current_user: Dict[str, Any] = Depends(get_current_user), wash_id: Optional[int] = None):
+# Avantages lus avec le lavage : `check_garage_access` et `check_stock_access` partagent la même lecture
+STATION_BENEFITS = ("gestion_stock", "stock_managment")
+
+
+class StationAccess(NamedTuple):
+    """Lavage vu par l'utilisateur courant, lu en une seule requête par `station_access`."""
+    owner_id: Optional[int]          # None si le lavage n'existe pas
+    owner_role: Optional[str]
+    assigned: bool                   # l'employé courant est assigné au lavage
+    benefits: FrozenSet[str]         # avantages en cours de validité du propriétaire
+    active_subscription: bool        # le propriétaire a un abonnement actif
+
+    def entitled(self, benefit: str) -> bool:
+        return benefit in self.benefits
+
+
+def station_access(request: Request, db: Session, current_user: Dict[str, Any], wash_id: Optional[int]) -> StationAccess:
+    """Propriétaire, assignation de l'employé courant et avantages du propriétaire, en une requête.
+
+    Le résultat est mémorisé par lavage sur `request.state` : `check_garage_access`,
+    `check_stock_access` et les vérifications des routes le relisent sans
+    nouvelle requête pendant toute la requête HTTP.
+    """
+    memo = getattr(request.state, "station_access", None)
+    if memo is None:
+        memo = request.state.station_access = {}
+    if wash_id in memo:
+        return memo[wash_id]
+
+    employee_id = current_user['id'] if current_user['role'] == RoleEmployee.station_manager else None
+    active_subscription = (
+        select(Subscription.id)
+        .where(Subscription.user_id == CarWash.user_id, Subscription.status == Status.ACTIVE)
+        .exists()
+    )
+    permissions = {benefit: aliased(UserPermission) for benefit in STATION_BENEFITS}
+    query = (
+        select(
+            CarWash.user_id,
+            User.role,
+            CarWashEmployee.employee_id.is_not(None),
+            active_subscription,
+            *[column for permission in permissions.values() for column in (permission.permission_name.is_not(None), permission.valid_until)]
+        )
+        .select_from(CarWash)
+        .join(User, User.id == CarWash.user_id)
+        .outerjoin(CarWashEmployee, and_(CarWashEmployee.car_wash_id == CarWash.id, CarWashEmployee.employee_id == employee_id))
+    )
+    for benefit, permission in permissions.items():
+        query = query.outerjoin(permission, and_(permission.user_id == CarWash.user_id, permission.permission_name == benefit))
+    row = db.execute(query.where(CarWash.id == wash_id)).first()
+
+    if row is None:
+        access = StationAccess(None, None, False, frozenset(), False)
+    else:
+        owner_id, owner_role, assigned, subscribed, *grants = row
+        now = datetime.now()
+        benefits = frozenset(
+            benefit
+            for benefit, granted, valid_until in zip(STATION_BENEFITS, grants[::2], grants[1::2])
+            if granted and (valid_until is None or valid_until >= now)
+        )
+        access = StationAccess(owner_id, owner_role, bool(assigned), benefits, bool(subscribed))
+    memo[wash_id] = access
+    return access
+
+
+def require_owner_benefit(access: StationAccess, benefit: str):
+    """Mêmes refus que `check_advantage`, appliqués au propriétaire du lavage."""
+    if access.owner_role != RoleUser.station_owner:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seuls les propriétaires de station lavage peuvent accéder à cette fonctionnalité"
+        )
+    if not access.entitled(benefit):
+        if not access.active_subscription:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Aucun abonnement actif trouvé"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"L'abonnement ne permet pas l'accès à la fonctionnalité : {benefit}"
+        )
+
+
+def check_garage_access(request: Request, db: DbDependency, current_user: Dict[str, Any] = Depends(get_current_user), wash_id: Optional[int] = None):
     """Vérifie l'accès au garage pour station_owner ou station_manager."""
-    if current_user['role'] not in [RoleUser.station_owner, RoleEmployee.station_manager]:
+    if not is_allowed(current_user['role'], _MANAGE_STOCK):
         raise HTTPException(403, "Rôle non autorisé pour accéder à un garage")
 
+    access = station_access(request, db, current_user, wash_id)
     if current_user['role'] == RoleUser.station_owner:
         # Vérifier si le garage appartient au propriétaire
-        car_wash = db.query(CarWash).filter(CarWash.id == wash_id, CarWash.user_id == current_user['id']).first()
-        if not car_wash:
+        if access.owner_id != current_user['id']:
             raise HTTPException(403, "Vous n'êtes pas propriétaire de ce garage")
-        # Vérifier le benefit (ex. pour gestion_stock ou autres)
-        check_advantage(db, current_user, required_benefit="gestion_stock")
-    
+        require_owner_benefit(access, "gestion_stock")
+
     elif current_user['role'] == RoleEmployee.station_manager:
         # Vérifier assignation a la station lavage
-        assignment = db.query(CarWashEmployee).filter(
-            CarWashEmployee.car_wash_id == wash_id,
-            CarWashEmployee.employee_id == current_user['id']
-        ).first()
-        if not assignment:
+        if not access.assigned:
             raise HTTPException(403, "Vous n'êtes pas assigné à ce garage")
         # Vérifier que le propriétaire du garage a le benefit nécessaire
-        car_wash = db.query(CarWash).filter(CarWash.id == wash_id).first()
-        if car_wash:
-            owner = db.query(User).filter(User.id == car_wash.user_id).first()
-            if owner:
-                check_advantage(db, {
-                    'id': owner.id,
-                    'role': owner.role,
-                    'is_active': owner.is_active,
-                    'email': owner.email,
-                    'firstname': owner.firstname,
-                    'lastname': owner.lastname,
-                    'phone': owner.phone,
-                    'username': owner.username
-                }, required_benefit="gestion_stock")
-    
+        require_owner_benefit(access, "gestion_stock")
+
     return current_user
 
-def check_stock_access(db: DbDependency, current_user: Dict[str, Any] = Depends(get_current_user), wash_id: int = None):
+def check_stock_access(request: Request, db: DbDependency, current_user: Dict[str, Any] = Depends(get_current_user), wash_id: int = None):
     """Vérifie l'accès à la gestion de stock pour une station lavage."""
-    if current_user['role'] not in [RoleUser.station_owner, RoleEmployee.station_manager]:
+    if not is_allowed(current_user['role'], _MANAGE_STOCK):
         raise HTTPException(403, "Rôle non autorisé")
-    
-    # Pour propriétaire : Check benefit
+
+    access = station_access(request, db, current_user, wash_id)
+    # Pour propriétaire : Vérifie si c'est le propriétaire du garage, puis le benefit
     if current_user['role'] == RoleUser.station_owner:
-        check_advantage(db, current_user, "stock_managment")
-        # Vérifie si c'est le propriétaire du garage
-        car_wash = db.query(CarWash).filter(CarWash.id == wash_id, CarWash.user_id == current_user['id']).first()
-        if not car_wash:
+        if access.owner_id != current_user['id']:
             raise HTTPException(403, "Non propriétaire du garage")
-    
+        require_owner_benefit(access, "stock_managment")
+
     # Pour employé : Vérifie assignation au garage (pas de benefit perso)
     elif current_user['role'] == RoleEmployee.station_manager:
-        assignment = db.query(CarWashEmployee).filter(
-            CarWashEmployee.car_wash_id == wash_id,
-            CarWashEmployee.employee_id == current_user['id']
-        ).first()
-        if not assignment:
+        if not access.assigned:
             raise HTTPException(403, "Non assigné à ce garage")
-    
-    return current_user
\ No newline at end of file
+
+    return current_user
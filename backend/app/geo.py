@@ -0,0 +1,158 @@
+"""Index spatial en mémoire pour la recherche des stations de lavage les plus proches.
+
+Les coordonnées sont rangées dans une grille régulière (cellules de `cell_size`
+degrés). Une recherche ne parcourt que les cellules couvrant la boîte englobante
+du rayon demandé, puis classe les candidats par distance exacte (haversine).
+"""
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cache import invalidate, invalidation_bus
+from app.models.car_wash import CarWash
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distance orthodromique en kilomètres entre deux points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Boîte englobante (lat_min, lat_max, lng_min, lng_max) d'un cercle de rayon `radius_km`.
+
+    Même rayon terrestre que `haversine_km` et écart de longitude exact
+    (`asin(sin d / cos lat)`, plus large que `d / cos lat` aux hautes latitudes) :
+    aucun point du cercle n'est hors de la boîte.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    lat_min, lat_max = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    if lat_max >= 90 or lat_min <= -90:
+        # Le cercle contient un pôle : toutes les longitudes
+        dlng = 180.0
+    else:
+        dlng = min(180.0, math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat))))))
+    return lat_min, lat_max, lng - dlng, lng + dlng
+
+
+class GridIndex:
+    """Grille de points (id, latitude, longitude) indexée par cellule."""
+
+    def __init__(self, cell_size: float = 0.1):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[int, Tuple[float, float]]] = defaultdict(dict)
+        self._points: Dict[int, Tuple[float, float]] = {}
+        self._cols = int(math.ceil(360 / cell_size))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lng / self.cell_size)) % self._cols
+
+    def add(self, point_id: int, lat: float, lng: float) -> None:
+        self.remove(point_id)
+        self._points[point_id] = (lat, lng)
+        self._cells[self._cell(lat, lng)][point_id] = (lat, lng)
+
+    def remove(self, point_id: int) -> None:
+        previous = self._points.pop(point_id, None)
+        if previous is None:
+            return
+        cell = self._cell(*previous)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(point_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def nearest(self, lat: float, lng: float, radius_km: float, limit: int = 20) -> List[Tuple[float, int]]:
+        """Renvoie jusqu'à `limit` couples (distance_km, id) dans le rayon, du plus proche au plus loin."""
+        lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+        row_min, row_max = int(math.floor(lat_min / self.cell_size)), int(math.floor(lat_max / self.cell_size))
+        col_min, col_max = int(math.floor(lng_min / self.cell_size)), int(math.floor(lng_max / self.cell_size))
+        if col_max - col_min + 1 >= self._cols:
+            col_min, col_max = 0, self._cols - 1
+
+        candidates: List[Tuple[float, int]] = []
+        seen_cols: Set[int] = set()
+        for col in range(col_min, col_max + 1):
+            wrapped = col % self._cols
+            if wrapped in seen_cols:
+                continue
+            seen_cols.add(wrapped)
+            for row in range(row_min, row_max + 1):
+                bucket = self._cells.get((row, wrapped))
+                if not bucket:
+                    continue
+                for point_id, (p_lat, p_lng) in bucket.items():
+                    if p_lat < lat_min or p_lat > lat_max:
+                        continue
+                    distance = haversine_km(lat, lng, p_lat, p_lng)
+                    if distance <= radius_km:
+                        candidates.append((distance, point_id))
+        return heapq.nsmallest(limit, candidates)
+
+
+class StationLocator:
+    """Index des stations chargé à la demande depuis la base et reconstruit s'il est périmé."""
+
+    def __init__(self, cell_size: float = 0.1, max_age: float = 300):
+        self.cell_size = cell_size
+        self.max_age = max_age
+        self._index: Optional[GridIndex] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session) -> GridIndex:
+        index = GridIndex(self.cell_size)
+        rows: Iterable = db.execute(
+            select(CarWash.id, CarWash.latitude, CarWash.longitude).where(
+                CarWash.latitude.is_not(None),
+                CarWash.longitude.is_not(None)
+            )
+        )
+        for station_id, lat, lng in rows:
+            index.add(station_id, lat, lng)
+        return index
+
+    def index(self, db: Session) -> GridIndex:
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at > self.max_age:
+                self._index = self._load(db)
+                self._built_at = time.monotonic()
+            return self._index
+
+    def upsert(self, station_id: int, lat: Optional[float], lng: Optional[float]) -> None:
+        """Répercute la création ou la modification d'une station sans tout recharger.
+
+        Les autres workers, qui ne connaissent pas les coordonnées, rechargent leur
+        index à la recherche suivante.
+        """
+        with self._lock:
+            if self._index is not None:
+                if lat is None or lng is None:
+                    self._index.remove(station_id)
+                else:
+                    self._index.add(station_id, lat, lng)
+        invalidate(f"geo:{station_id}")
+
+    def invalidate(self, *_) -> None:
+        with self._lock:
+            self._index = None
+
+
+station_locator = StationLocator()
+invalidation_bus.subscribe("geo:", station_locator.invalidate, on_flush=station_locator.invalidate, remote_only=True)
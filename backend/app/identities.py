@@ -0,0 +1,142 @@
+"""Unicité des identifiants de connexion entre utilisateurs et employés.
+
+Chaque nom d'utilisateur et chaque email, normalisés, occupent une ligne de
+`principal_identity`. Les insertions, modifications et suppressions de `User` et
+`Employee` mettent la table à jour dans la même transaction : un doublon, même
+entre un utilisateur et un employé, est refusé par la clé primaire au `flush()`.
+Les routes n'ont donc plus à chercher un doublon avant d'écrire ; elles
+traduisent l'`IntegrityError` avec `identity_conflict`.
+
+Après validation, chaque nouvel identifiant est publié (`identity:<identifiant>`)
+pour que les workers l'oublient de leur cache d'identifiants inconnus.
+"""
+import re
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, event, insert, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import invalidate
+from app.database import SessionLocal
+from app.models.employee import Employee
+from app.models.principal_identity import PrincipalIdentity
+from app.models.user import User
+
+PRINCIPAL_TYPES = {User: "user", Employee: "employee"}
+IDENTITY_KINDS = ("username", "email")
+
+CONFLICT_MESSAGES = {
+    "username": "Nom d'utilisateur déjà pris",
+    "email": "Email déjà utilisé",
+}
+
+_NEW_IDENTIFIERS = "new_identifiers"
+
+_DUPLICATE_KEY = re.compile(r"Key \((\w+)\)=\((.*)\) already exists")
+
+
+def normalize_identifier(value: str) -> str:
+    return value.strip().lower()
+
+
+def _rows(target, kinds) -> list:
+    principal_type = PRINCIPAL_TYPES[type(target)]
+    rows = {}
+    for kind in kinds:
+        # Nom d'utilisateur identique à l'email : une seule ligne, sous le premier type
+        identifier = normalize_identifier(getattr(target, kind))
+        rows.setdefault(identifier, {
+            "identifier": identifier,
+            "kind": kind,
+            "principal_type": principal_type,
+            "principal_id": target.id,
+        })
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_NEW_IDENTIFIERS, set()).update(rows)
+    return list(rows.values())
+
+
+def _forget(connection, target, kinds) -> None:
+    table = PrincipalIdentity.__table__
+    connection.execute(
+        delete(table).where(
+            table.c.principal_type == PRINCIPAL_TYPES[type(target)],
+            table.c.principal_id == target.id,
+            table.c.kind.in_(kinds)
+        )
+    )
+
+
+def _after_insert(mapper, connection, target) -> None:
+    connection.execute(insert(PrincipalIdentity.__table__).values(_rows(target, IDENTITY_KINDS)))
+
+
+def _after_update(mapper, connection, target) -> None:
+    state = inspect(target)
+    if any(state.attrs[kind].history.has_changes() for kind in IDENTITY_KINDS):
+        # Réécrire les deux identifiants : une ligne peut porter à la fois le nom d'utilisateur et l'email
+        _forget(connection, target, IDENTITY_KINDS)
+        connection.execute(insert(PrincipalIdentity.__table__).values(_rows(target, IDENTITY_KINDS)))
+
+
+def _after_delete(mapper, connection, target) -> None:
+    _forget(connection, target, IDENTITY_KINDS)
+
+
+for _model in PRINCIPAL_TYPES:
+    event.listen(_model, "after_insert", _after_insert)
+    event.listen(_model, "after_update", _after_update)
+    event.listen(_model, "after_delete", _after_delete)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _announce_identifiers(session: Session) -> None:
+    identifiers = session.info.pop(_NEW_IDENTIFIERS, None)
+    if identifiers:
+        invalidate(*[f"identity:{identifier}" for identifier in identifiers])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_identifiers(session: Session) -> None:
+    session.info.pop(_NEW_IDENTIFIERS, None)
+
+
+def conflicting_kind(error: IntegrityError) -> Optional[str]:
+    """Identifiant en double ("username" ou "email") signalé par PostgreSQL, si connu."""
+    diag = getattr(error.orig, "diag", None)
+    match = _DUPLICATE_KEY.search(getattr(diag, "message_detail", None) or str(error.orig))
+    if not match:
+        return None
+    column, value = match.groups()
+    if column in IDENTITY_KINDS:
+        # Contraintes uniques propres à `user` / `employees`
+        return column
+    if column == "identifier" and isinstance(error.params, dict):
+        # Insertion multi-lignes : retrouver le type de l'identifiant refusé dans ses paramètres
+        params: Dict[str, object] = error.params
+        for key, param in params.items():
+            if key.startswith("identifier") and param == value:
+                return params.get(key.replace("identifier", "kind", 1))
+    return None
+
+
+def is_duplicate(error: IntegrityError) -> bool:
+    """Violation d'unicité (et non de clé étrangère, de NOT NULL, ...)."""
+    return getattr(error.orig, "pgcode", None) == "23505" or "UNIQUE constraint failed" in str(error.orig)
+
+
+def identity_conflict(error: IntegrityError, error_detail: str, duplicate_detail: Optional[str] = None) -> HTTPException:
+    """Traduit l'échec d'écriture d'un compte en erreur HTTP.
+
+    Un doublon d'identifiant donne une 400 avec le message habituel (ou
+    `duplicate_detail`), toute autre violation une 500 avec `error_detail`.
+    """
+    if not is_duplicate(error):
+        return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_detail)
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=duplicate_detail or CONFLICT_MESSAGES.get(conflicting_kind(error), "Nom d'utilisateur ou email déjà utilisé")
+    )
@@ -1,11 +1,50 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager, suppress
 from typing import Union
 from sqlalchemy import inspect
+from dotenv import load_dotenv
+import asyncio
+import os
 
-from app.routers import auth, users, offers, benefits, offer_benefits, subscriptions, manager_section, manager_page, car_washes, employees, stock_managments, stock_histories
+from app.routers import auth, users, offers, benefits, offer_benefits, subscriptions, manager_section, manager_page, car_washes, employees, stock_managments, stock_histories, stats, exports, reports
+from app.subscription_sweeper import run_sweeper
+from app.reports import report_generator
+from app.cache import CACHE_BUS_ENABLED, start_invalidation_listener
+from app.versioning import RowVersionMiddleware
+from app.serialization import FastJSONResponse
+from app.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from app.revocation import token_versions
+from app.refresh_tokens import run_pruner
 
-app = FastAPI(title="Système de gestion de lavage auto")
+load_dotenv(encoding="utf-8")
+
+SUBSCRIPTION_SWEEP_INTERVAL = float(os.getenv("SUBSCRIPTION_SWEEP_INTERVAL", "60"))
+REFRESH_PRUNE_INTERVAL = float(os.getenv("REFRESH_PRUNE_INTERVAL", "3600"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarre les tâches de fond au lancement et les arrête à l'extinction."""
+    tasks = []
+    if SUBSCRIPTION_SWEEP_INTERVAL > 0:
+        tasks.append(asyncio.create_task(run_sweeper(SUBSCRIPTION_SWEEP_INTERVAL)))
+    if REFRESH_PRUNE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(run_pruner(REFRESH_PRUNE_INTERVAL)))
+    listener = start_invalidation_listener() if CACHE_BUS_ENABLED else None
+    # Après le démarrage de l'écoute : aucune révocation ne peut passer entre les deux
+    await asyncio.to_thread(token_versions.load)
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if listener is not None:
+        await asyncio.to_thread(listener.stop)
+    report_generator.shutdown()
+
+
+app = FastAPI(title="Système de gestion de lavage auto", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Configurer le middleware CORS
 app.add_middleware(
@@ -16,6 +55,13 @@ app.add_middleware(
     allow_headers=["*"],                      # Autorise tous les headers
 )
 
+# ETag et Last-Modified des routes à version de ligne (voir app.versioning)
+app.add_middleware(RowVersionMiddleware)
+
+# Compression gzip/brotli des réponses volumineuses (voir app.compression)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(manager_section.router)
@@ -27,4 +73,7 @@ app.include_router(subscriptions.router)
 app.include_router(employees.router)
 app.include_router(car_washes.router)
 app.include_router(stock_managments.router)
-app.include_router(stock_histories.router)
\ No newline at end of file
+app.include_router(stock_histories.router)
+app.include_router(stats.router)
+app.include_router(exports.router)
+app.include_router(reports.router)
\ No newline at end of file
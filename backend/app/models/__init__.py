@@ -8,5 +8,8 @@ from .offer_benefit import OfferBenefit
 from .subscription import Subscription
 from .manager_quota import ManagerQuota
 from .wash_record import WashRecord
+from .user_permission import UserPermission
+from .principal_identity import PrincipalIdentity
+from .refresh_token import RefreshToken
 
-__all__ = ["User", 'ManagerQuota', "UserCreate", "CarWash", "CarWashEmployee", "StockManagment", "Offer", "Benefit", "OfferBenefit", "Subscription", "WashRecord"]
\ No newline at end of file
+__all__ = ["User", 'ManagerQuota', "UserCreate", "CarWash", "CarWashEmployee", "StockManagment", "Offer", "Benefit", "OfferBenefit", "Subscription", "WashRecord", "UserPermission", "PrincipalIdentity", "RefreshToken"]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from sqlmodel import SQLModel, Field
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 class BenefitBase(SQLModel):
     name: Optional[str] = Field(default=None, nullable=True)
@@ -17,4 +18,18 @@ class BenefitUpdate(SQLModel):
     icon: Optional[str] = None
 
 class Benefit(BenefitBase, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
\ No newline at end of file
+    id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=1, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class BenefitRead(BenefitBase):
+    id: int
+    version: int = 1
+    updated_at: Optional[datetime] = None
+
+
+class BenefitList(SQLModel):
+    message: str
+    benefits: List[BenefitRead]
+    next_cursor: Optional[str] = None
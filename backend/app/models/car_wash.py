@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
 from sqlalchemy.orm import relationship
 from typing import Optional, TYPE_CHECKING, List
+from datetime import datetime
 from importlib import import_module
 
 # Import conditionnel pour éviter les imports circulaires
@@ -17,6 +18,8 @@ class CarWashBase(SQLModel):
     city: Optional[str] = Field(default=None, nullable=True)
     country: Optional[str] = Field(default=None, nullable=True)
     address: Optional[str] = Field(default=None, nullable=True)
+    latitude: Optional[float] = Field(default=None, nullable=True, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, nullable=True, ge=-180, le=180)
 
 class CarWashCreate(CarWashBase):
     name: str = Field(nullable=False)
@@ -31,10 +34,14 @@ class CarWashUpdate(CarWashBase):
     city: Optional[str] = None
     country: Optional[str] = None
     address: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class CarWash(CarWashBase, table=True):
     __tablename__ = "car_wash"
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=1, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     # user: "User" = Relationship(back_populates="car_wash")
    
     employees: List["Employee"] = Relationship(
@@ -44,3 +51,14 @@ class CarWash(CarWashBase, table=True):
     )
     stocks: List["StockManagment"] = Relationship(back_populates="station")
 
+
+class CarWashRead(CarWashBase):
+    id: int
+    version: int = 1
+    updated_at: Optional[datetime] = None
+
+
+class CarWashList(SQLModel):
+    message: str
+    data: List[CarWashRead]
+    next_cursor: Optional[str] = None
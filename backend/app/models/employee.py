@@ -83,6 +83,7 @@ class Employee(EmployeeBase, table=True):
     hashed_password: str = Field(exclude=True)
     can_add: bool = Field(default=False)
     can_edit: bool = Field(default=False)
+    token_version: int = Field(default=1, nullable=False, exclude=True)  # Incrémenté pour révoquer les jetons émis (voir app.revocation)
     
     # Relations
     owner: "User" = Relationship(
@@ -94,3 +95,18 @@ class Employee(EmployeeBase, table=True):
         back_populates="employees",
         sa_relationship_kwargs={"secondary": "car_wash_employee"}
     )
+
+
+class EmployeeRead(EmployeeBase):
+    """Représentation renvoyée par l'API (sans mot de passe)."""
+    email: str
+    id: int
+    owner_id: Optional[int] = None
+    can_add: bool = False
+    can_edit: bool = False
+
+
+class EmployeeList(SQLModel):
+    message: str
+    users: List[EmployeeRead]
+    next_cursor: Optional[str] = None
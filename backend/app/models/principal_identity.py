@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+
+class PrincipalIdentity(SQLModel, table=True):
+    """Identifiants de connexion (nom d'utilisateur et email) de tous les comptes.
+
+    La clé primaire sur l'identifiant normalisé garantit l'unicité entre `user`
+    et `employees`. Table tenue à jour par `app.identities` à chaque écriture
+    d'un compte : ne jamais l'écrire directement depuis une route.
+    """
+    __tablename__ = "principal_identity"
+    __table_args__ = (
+        Index("ix_principal_identity_principal", "principal_type", "principal_id"),
+    )
+    identifier: str = Field(primary_key=True)  # Normalisé : sans espaces autour, en minuscules
+    kind: str = Field(nullable=False)  # "username" ou "email"
+    principal_type: str = Field(nullable=False)  # "user" ou "employee"
+    principal_id: int = Field(nullable=False)
@@ -0,0 +1,24 @@
+from sqlalchemy import Boolean, Column, Integer, MetaData, String, Table
+
+# Vue SQL (migration 9c4e1a7b2f58) : métadonnées séparées pour que
+# `SQLModel.metadata.create_all` et l'autogénération d'Alembic l'ignorent.
+view_metadata = MetaData()
+
+# Une ligne par identifiant normalisé (nom d'utilisateur ou email), avec ce qu'il
+# faut pour authentifier le compte et signer son jeton : une seule lecture par clé.
+principal_login = Table(
+    "principal_login",
+    view_metadata,
+    Column("identifier", String, primary_key=True),
+    Column("principal_type", String),  # "user" ou "employee"
+    Column("id", Integer),
+    Column("username", String),
+    Column("email", String),
+    Column("firstname", String),
+    Column("lastname", String),
+    Column("phone", String),
+    Column("role", String),
+    Column("is_active", Boolean),
+    Column("hashed_password", String),
+    Column("token_version", Integer),
+)
@@ -0,0 +1,21 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class RefreshToken(SQLModel, table=True):
+    """Jeton de rafraîchissement, stocké haché (SHA-256) et à usage unique.
+
+    Chaque rafraîchissement consomme le jeton (`used_at`) et en émet un nouveau
+    de la même famille ; la réutilisation d'un jeton consommé révoque la famille.
+    Géré par `app.refresh_tokens`.
+    """
+    __tablename__ = "refresh_token"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    token_hash: str = Field(unique=True, index=True)
+    family_id: str = Field(index=True)
+    principal_type: str = Field(nullable=False)  # "user" ou "employee"
+    principal_id: int = Field(nullable=False)
+    token_version: int = Field(nullable=False)  # Version du compte à l'émission (voir app.revocation)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    expires_at: datetime = Field(nullable=False, index=True)
+    used_at: Optional[datetime] = Field(default=None, nullable=True)
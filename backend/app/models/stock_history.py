@@ -17,4 +17,14 @@ class StockHistoryBase(SQLModel):
 class StockHistory(StockHistoryBase, table=True):
     __tablename__ = "stock_histories"
     id: Optional[int] = Field(default=None, primary_key=True)
-    stock: "StockManagment" = Relationship(back_populates="history")
\ No newline at end of file
+    stock: "StockManagment" = Relationship(back_populates="history")
+
+
+class StockHistoryRead(StockHistoryBase):
+    id: int
+
+
+class StockHistoryList(SQLModel):
+    message: str
+    data: List[StockHistoryRead]
+    next_cursor: Optional[str] = None
@@ -35,5 +35,19 @@ class StockManagmentUpdate(SQLModel):
 class StockManagment(StockManagmentBase, table=True):
     __tablename__ = "stock_managments"
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=1, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     station: "CarWash" = Relationship(back_populates="stocks")
-    history: "StockHistory" = Relationship(back_populates="stock")
\ No newline at end of file
+    history: "StockHistory" = Relationship(back_populates="stock")
+
+
+class StockManagmentRead(StockManagmentBase):
+    id: int
+    version: int = 1
+    updated_at: Optional[datetime] = None
+
+
+class StockManagmentList(SQLModel):
+    message: str
+    stocks: List[StockManagmentRead]
+    next_cursor: Optional[str] = None
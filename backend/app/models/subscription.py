@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 from enum import Enum
 from datetime import datetime
@@ -23,4 +24,7 @@ class SubscriptionUpdate(SQLModel):
     end_date: Optional[datetime] = None
 
 class Subscription(SubscriptionBase, table=True):
+    __table_args__ = (
+        Index("ix_subscription_user_id_status", "user_id", "status"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
\ No newline at end of file
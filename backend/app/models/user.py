@@ -81,6 +81,9 @@ class User(UserBase, table=True):
     hashed_password: str = Field(exclude=True)
     can_add: bool = Field(default=False)
     can_edit: bool = Field(default=False)
+    version: int = Field(default=1, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    token_version: int = Field(default=1, nullable=False, exclude=True)  # Incrémenté pour révoquer les jetons émis (voir app.revocation)
 
     quotas: List["ManagerQuota"] = Relationship(back_populates="user")
 
@@ -112,4 +115,21 @@ class User(UserBase, table=True):
     owner_wash_records: List["WashRecord"] = Relationship(
         back_populates="owner_station",
         sa_relationship_kwargs={"foreign_keys": "[WashRecord.wash_id]"}
-    )
\ No newline at end of file
+    )
+
+
+class UserRead(UserBase):
+    """Représentation renvoyée par l'API (sans mot de passe)."""
+    # Adresse déjà validée à l'écriture : pas de revalidation à chaque lecture
+    email: str
+    id: int
+    can_add: bool = False
+    can_edit: bool = False
+    version: int = 1
+    updated_at: Optional[datetime] = None
+
+
+class UserList(SQLModel):
+    message: str
+    users: List[UserRead]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class UserPermission(SQLModel, table=True):
+    """Permissions dénormalisées d'un utilisateur, issues de son abonnement actif.
+
+    Table reconstruite par `app.permissions` à chaque changement d'abonnement,
+    d'offre ou d'avantage : ne jamais l'écrire directement depuis une route.
+    """
+    __tablename__ = "user_permission"
+    user_id: int = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    permission_name: str = Field(primary_key=True)
+    valid_until: Optional[datetime] = Field(default=None, nullable=True)  # Fin de l'abonnement, None si illimité
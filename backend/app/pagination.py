@@ -0,0 +1,121 @@
+"""Pagination par clé (keyset) et sélection de champs pour les routes de liste.
+
+Les routes de liste acceptent :
+- `?limit=` : nombre d'éléments par page ;
+- `?cursor=` : curseur opaque renvoyé dans `next_cursor` par la page précédente
+  (`PAGE_DEFAULT_LIMIT` éléments si `limit` est absent) ;
+- `?fields=id,name,...` : colonnes à charger (`load_only`) et à renvoyer.
+
+Les pages sont triées par `id` croissant ; le curseur encode le dernier `id`
+servi, si bien qu'une page ne coûte qu'un parcours d'index quel que soit son rang.
+Sans `limit` ni `cursor`, la route renvoie toute la liste comme avant la
+pagination : les clients existants ne sont pas tronqués.
+"""
+import base64
+import binascii
+import json
+from typing import Annotated, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, Query, status
+from sqlalchemy.orm import Query as OrmQuery, load_only
+import os
+
+load_dotenv(encoding="utf-8")
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "500"))
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
+
+
+class PageParams:
+    """Paramètres de pagination communs, injectés par `Pagination`."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(default=None, ge=1, le=PAGE_MAX_LIMIT),
+        cursor: Optional[str] = Query(default=None),
+        fields: Optional[str] = Query(default=None, description="Champs à renvoyer, séparés par des virgules"),
+    ):
+        self.after = decode_cursor(cursor)
+        # None : liste complète, seulement si le client ne pagine pas du tout
+        self.limit = limit if limit is not None or cursor is None else PAGE_DEFAULT_LIMIT
+        self.fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    @property
+    def is_default(self) -> bool:
+        return self.after is None and self.fields is None
+
+    def selected_fields(self, allowed: Iterable[str]) -> Optional[List[str]]:
+        """Champs demandés, `id` compris, ou None pour l'objet complet."""
+        if self.fields is None:
+            return None
+        allowed = list(allowed)
+        unknown = [field for field in self.fields if field not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Champs inconnus : {', '.join(unknown)}. Champs disponibles : {', '.join(allowed)}"
+            )
+        return ["id", *[field for field in dict.fromkeys(self.fields) if field != "id"]]
+
+
+Pagination = Annotated[PageParams, Depends()]
+
+
+def model_fields(model) -> List[str]:
+    """Colonnes exposées d'un modèle (hors champs exclus comme `hashed_password`)."""
+    columns = set(model.__table__.columns.keys())
+    return [name for name, field in model.model_fields.items() if name in columns and not field.exclude]
+
+
+def paginate(query: OrmQuery, model, page: PageParams) -> Tuple[Sequence[Any], Optional[str]]:
+    """Applique curseur, limite et `load_only` à une requête ; renvoie (éléments, next_cursor)."""
+    fields = page.selected_fields(model_fields(model))
+    if page.after is not None:
+        query = query.filter(model.id > page.after)
+    if fields:
+        query = query.options(load_only(*[getattr(model, field) for field in fields]))
+
+    query = query.order_by(model.id)
+    if page.limit is None:
+        rows, next_cursor = query.all(), None
+    else:
+        rows = query.limit(page.limit + 1).all()
+        next_cursor = encode_cursor(rows[page.limit - 1].id) if len(rows) > page.limit else None
+        rows = rows[:page.limit]
+    if fields:
+        # Sérialisation manuelle : l'objet complet déclencherait le chargement des colonnes différées
+        return [{field: getattr(row, field) for field in fields} for row in rows], next_cursor
+    return rows, next_cursor
+
+
+def paginate_items(items: Sequence[Dict[str, Any]], allowed: Iterable[str], page: PageParams) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Même pagination sur une liste de dictionnaires déjà triée par `id` (données en mémoire)."""
+    fields = page.selected_fields(allowed)
+    if page.after is not None:
+        items = [item for item in items if item["id"] > page.after]
+    if page.limit is None:
+        selected, next_cursor = items, None
+    else:
+        selected = items[:page.limit]
+        next_cursor = encode_cursor(selected[-1]["id"]) if len(items) > page.limit else None
+    if fields:
+        selected = [{field: item[field] for field in fields} for item in selected]
+    return list(selected), next_cursor
@@ -0,0 +1,149 @@
+"""Maintenance de la table dénormalisée `user_permission`.
+
+Chaque fonction `rebuild_*` supprime puis réinsère les permissions des
+utilisateurs concernés dans la transaction de l'appelant : c'est le commit de
+la route qui rend la reconstruction visible, ou le rollback qui l'annule.
+Les fonctions renvoient les utilisateurs touchés pour que l'appelant évince
+leurs droits du cache après le commit (`evict_entitlements`).
+
+Commandes :
+    python -m app.permissions backfill   # reconstruit toute la table
+    python -m app.permissions check      # compare la table à la source
+"""
+import argparse
+import sys
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.benefit import Benefit
+from app.models.offer_benefit import OfferBenefit
+from app.models.subscription import Subscription, Status
+from app.models.user_permission import UserPermission
+
+
+def _source_query(user_ids: Optional[Iterable[int]] = None) -> Select:
+    """Permissions attendues : abonnements actifs -> offer_benefit -> benefit."""
+    # Une date de fin NULL signifie « sans limite » et l'emporte sur les autres
+    valid_until = case(
+        (func.count() > func.count(Subscription.end_date), None),
+        else_=func.max(Subscription.end_date)
+    )
+    query = (
+        select(Subscription.user_id, Benefit.permission_name, valid_until.label("valid_until"))
+        .join(OfferBenefit, OfferBenefit.offer_id == Subscription.offer_id)
+        .join(Benefit, Benefit.id == OfferBenefit.benefit_id)
+        .where(Subscription.status == Status.ACTIVE, Benefit.permission_name.is_not(None))
+        .group_by(Subscription.user_id, Benefit.permission_name)
+    )
+    if user_ids is not None:
+        query = query.where(Subscription.user_id.in_(list(user_ids)))
+    return query
+
+
+def rebuild_for_users(db: Session, user_ids: Iterable[int]) -> List[int]:
+    """Reconstruit les permissions des utilisateurs donnés."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return []
+    db.flush()
+    db.execute(delete(UserPermission).where(UserPermission.user_id.in_(user_ids)))
+    db.execute(
+        insert(UserPermission).from_select(
+            ["user_id", "permission_name", "valid_until"],
+            _source_query(user_ids)
+        )
+    )
+    return user_ids
+
+
+def _subscribers(db: Session, offer_ids) -> List[int]:
+    db.flush()
+    return db.execute(
+        select(Subscription.user_id).distinct().where(
+            Subscription.offer_id.in_(offer_ids),
+            Subscription.status == Status.ACTIVE
+        )
+    ).scalars().all()
+
+
+def rebuild_for_offer(db: Session, offer_id: int) -> List[int]:
+    """Reconstruit les permissions des abonnés actifs d'une offre."""
+    return rebuild_for_users(db, _subscribers(db, [offer_id]))
+
+
+def subscribers_of_benefit(db: Session, benefit_id: int) -> List[int]:
+    """Abonnés actifs d'une offre contenant l'avantage donné."""
+    offers = select(OfferBenefit.offer_id).where(OfferBenefit.benefit_id == benefit_id)
+    return _subscribers(db, offers.scalar_subquery())
+
+
+def rebuild_for_benefit(db: Session, benefit_id: int) -> List[int]:
+    """Reconstruit les permissions des abonnés dont l'offre contient l'avantage."""
+    return rebuild_for_users(db, subscribers_of_benefit(db, benefit_id))
+
+
+def rebuild_all(db: Session) -> int:
+    """Reconstruit entièrement la table et renvoie le nombre de lignes insérées."""
+    db.flush()
+    db.execute(delete(UserPermission))
+    result = db.execute(
+        insert(UserPermission).from_select(
+            ["user_id", "permission_name", "valid_until"],
+            _source_query()
+        )
+    )
+    return result.rowcount
+
+
+def find_inconsistencies(db: Session) -> Tuple[Set[tuple], Set[tuple]]:
+    """Renvoie (lignes manquantes, lignes en trop) par rapport à la source."""
+    expected = {tuple(row) for row in db.execute(_source_query())}
+    actual = {
+        tuple(row) for row in db.execute(
+            select(UserPermission.user_id, UserPermission.permission_name, UserPermission.valid_until)
+        )
+    }
+    return expected - actual, actual - expected
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.database import SessionLocal
+    from app.models import employee, stock_history  # noqa: F401 (enregistre tous les mappers)
+
+    parser = argparse.ArgumentParser(prog="python -m app.permissions", description="Maintenance de la table user_permission.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("backfill", help="reconstruit toute la table à partir des abonnements actifs")
+    check = subparsers.add_parser("check", help="vérifie que la table correspond aux abonnements actifs")
+    check.add_argument("--fix", action="store_true", help="reconstruit la table si une incohérence est trouvée")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "backfill":
+            count = rebuild_all(db)
+            db.commit()
+            print(f"{count} permission(s) matérialisée(s)")
+            return 0
+
+        missing, extra = find_inconsistencies(db)
+        for row in sorted(missing, key=str):
+            print(f"manquante : {row}")
+        for row in sorted(extra, key=str):
+            print(f"en trop : {row}")
+        if not missing and not extra:
+            print("user_permission est cohérente")
+            return 0
+        if args.fix:
+            count = rebuild_all(db)
+            db.commit()
+            print(f"table reconstruite : {count} permission(s)")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
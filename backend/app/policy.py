@@ -0,0 +1,95 @@
+"""Matrice des permissions par rôle.
+
+`POLICY` décrit, pour chaque rôle (`RoleUser` comme `RoleEmployee`), les
+actions autorisées sur chaque ressource. Elle est compilée à l'import : chaque
+couple (action, ressource) reçoit un bit, chaque rôle un masque. Vérifier une
+permission revient à un `&` entre deux entiers, quel que soit le nombre de règles.
+
+La matrice reprend « PROPOSITION DE PERMISSION PAR COMPTE » pour les fonctions
+déjà exposées par l'API (lavages, laveurs, stock) ; paiements, états financiers
+et salaires n'ont pas encore de routes.
+
+Les routes passent par `require(action, ressource)` (voir `app.dependencies`) ;
+le filtrage des données (ses propres lavages, ses propres employés, ...) et les
+avantages d'abonnement restent vérifiés par les routes et `check_advantage`.
+"""
+from typing import Dict, Iterator, Mapping, Tuple, Union
+
+from app.models.employee import RoleEmployee
+from app.models.user import RoleUser
+
+Role = Union[RoleUser, RoleEmployee]
+
+POLICY: Dict[Role, Dict[str, Tuple[str, ...]]] = {
+    RoleUser.super_admin: {
+        "offer": ("read", "create", "update", "delete"),
+        "benefit": ("read", "create", "update", "delete"),
+        "offer_benefit": ("read", "create", "delete"),
+        "user": ("read", "create", "delete", "manage", "export", "report"),
+        "employee": ("read",),
+        "car_wash": ("read", "export", "report"),
+        "subscription": ("report",),
+        "manager": ("read", "assign"),
+        "stats": ("read",),
+    },
+    RoleUser.system_manager: {
+        "user": ("read", "create", "delete"),
+        "car_wash": ("create",),
+        "wash_record": ("read",),
+        "quota": ("read",),
+    },
+    RoleUser.station_owner: {
+        "user": ("read", "create", "delete"),
+        "employee": ("read", "create", "update", "delete", "assign"),
+        "car_wash": ("list", "read", "export"),
+        "subscription": ("create",),
+        "stock": ("manage",),
+        "stock_history": ("list",),
+    },
+    RoleEmployee.station_manager: {
+        "employee": ("create",),
+        "stock": ("manage",),
+    },
+    RoleEmployee.car_washer: {},
+    RoleEmployee.station_client: {},
+}
+
+
+def compile_policy(policy: Mapping[Role, Mapping[str, Tuple[str, ...]]]) -> Tuple[Dict[Tuple[str, str], int], Dict[str, int]]:
+    """Renvoie (bit de chaque couple (action, ressource), masque de chaque rôle)."""
+    bits: Dict[Tuple[str, str], int] = {}
+    masks: Dict[str, int] = {}
+    for role, grants in policy.items():
+        mask = 0
+        for resource, actions in grants.items():
+            for action in actions:
+                mask |= bits.setdefault((action, resource), 1 << len(bits))
+        # Les rôles arrivent des claims du jeton sous forme de chaîne
+        masks[role.value] = mask
+    return bits, masks
+
+
+PERMISSION_BITS, ROLE_MASKS = compile_policy(POLICY)
+
+
+def permission_bit(action: str, resource: str) -> int:
+    """Bit du couple (action, ressource) ; une faute de frappe échoue dès la déclaration de la route."""
+    try:
+        return PERMISSION_BITS[(action, resource)]
+    except KeyError:
+        raise ValueError(f"Permission inconnue : {action} {resource}") from None
+
+
+def is_allowed(role: str, bit: int) -> bool:
+    return bool(ROLE_MASKS.get(role, 0) & bit)
+
+
+def allowed(role: str, action: str, resource: str) -> bool:
+    return is_allowed(role, permission_bit(action, resource))
+
+
+def permission_table() -> Iterator[Tuple[str, str, str, bool]]:
+    """Parcourt chaque rôle x (action, ressource) avec la décision compilée."""
+    for role in ROLE_MASKS:
+        for action, resource in PERMISSION_BITS:
+            yield role, action, resource, allowed(role, action, resource)
@@ -0,0 +1,142 @@
+"""Jetons de rafraîchissement à rotation.
+
+Le jeton d'accès est court (`ACCESS_TOKEN_MINUTES`) et vérifié sans état ; le
+jeton de rafraîchissement, opaque, est stocké haché et ne sert qu'une fois :
+`rotate` le consomme par un seul UPDATE indexé sur son empreinte et en émet un
+nouveau. Présenter un jeton déjà consommé révoque toute sa famille (vol probable).
+Un jeton émis avant une révocation du compte (`token_version`) est refusé.
+
+Les jetons expirés sont supprimés par lots par `run_pruner`.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Tuple, Union
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.employee import Employee
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.revocation import principal_type_of
+
+load_dotenv(encoding="utf-8")
+
+ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", "15"))
+REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", "30"))
+REFRESH_PRUNE_BATCH = int(os.getenv("REFRESH_PRUNE_BATCH", "1000"))
+
+PRINCIPAL_MODELS = {"user": User, "employee": Employee}
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue(db: Session, principal: Any, family_id: str = None) -> str:
+    """Ajoute à la session un nouveau jeton pour le compte et renvoie sa valeur en clair."""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=_hash(token),
+        family_id=family_id or uuid.uuid4().hex,
+        principal_type=principal_type_of(principal),
+        principal_id=principal.id,
+        token_version=getattr(principal, "token_version", 1),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_DAYS)
+    ))
+    return token
+
+
+def rotate(db: Session, token: str) -> Tuple[Union[User, Employee], str]:
+    """Consomme le jeton et renvoie (compte, nouveau jeton) ; valide la transaction."""
+    refused = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Jeton de rafraîchissement invalide ou expiré",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token_hash = _hash(token)
+    now = datetime.utcnow()
+    consumed = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.expires_at > now
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.family_id, RefreshToken.principal_type, RefreshToken.principal_id, RefreshToken.token_version)
+    ).first()
+
+    if consumed is None:
+        previous = db.execute(
+            select(RefreshToken.family_id, RefreshToken.used_at).where(RefreshToken.token_hash == token_hash)
+        ).first()
+        if previous is not None and previous.used_at is not None:
+            # Jeton déjà consommé : probablement volé, on révoque toute la famille
+            family_id = previous.family_id
+            db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.family_id == family_id, RefreshToken.used_at.is_(None))
+                .values(used_at=now)
+            )
+            db.commit()
+            logger.warning(f"Jeton de rafraîchissement réutilisé : famille {family_id} révoquée")
+        raise refused
+
+    family_id, principal_type, principal_id, token_version = consumed
+    principal = db.get(PRINCIPAL_MODELS[principal_type], principal_id)
+    if principal is None or not principal.is_active or principal.token_version != token_version:
+        db.commit()
+        raise refused
+
+    new_token = issue(db, principal, family_id)
+    db.commit()
+    return principal, new_token
+
+
+def prune_expired(db: Session, batch_size: int = REFRESH_PRUNE_BATCH) -> int:
+    """Supprime les jetons expirés par lots de `batch_size`, une transaction par lot."""
+    total = 0
+    while True:
+        expired = select(RefreshToken.id).where(RefreshToken.expires_at < datetime.utcnow()).limit(batch_size)
+        deleted = db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(expired.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def prune_once() -> int:
+    db = SessionLocal()
+    try:
+        deleted = prune_expired(db)
+        if deleted:
+            logger.info(f"{deleted} jeton(s) de rafraîchissement expiré(s) supprimé(s)")
+        return deleted
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erreur lors de la purge des jetons de rafraîchissement : {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+
+async def run_pruner(interval: float):
+    """Boucle de fond : purge toutes les `interval` secondes sans bloquer la boucle d'événements."""
+    while True:
+        await asyncio.to_thread(prune_once)
+        await asyncio.sleep(interval)
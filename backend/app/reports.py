@@ -0,0 +1,150 @@
+"""Génération des rapports XLSX.
+
+Les classeurs sont écrits en mode `write_only` (les lignes partent sur disque au
+fur et à mesure) à partir de requêtes paginées par clé, dans un pool de threads
+dédié pour ne pas bloquer la boucle d'événements. Le fichier produit est gardé
+`REPORT_CACHE_TTL` secondes, indexé par le nom du rapport et ses paramètres ;
+les demandes simultanées d'un même rapport attendent la même génération.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Sequence
+
+from dotenv import load_dotenv
+from openpyxl import Workbook
+from sqlalchemy import Select
+
+from app.database import SessionLocal
+
+load_dotenv(encoding="utf-8")
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "5000"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "300"))
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cgla-reports"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReportSpec:
+    """Rapport d'une feuille : `query` sélectionne les colonnes, `key` (la première) sert à paginer."""
+    name: str
+    sheet: str
+    headers: Sequence[str]
+    query: Select
+    key: Any
+    params: Dict[str, Any]
+
+    @property
+    def cache_key(self) -> str:
+        raw = json.dumps({"name": self.name, "params": self.params}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # openpyxl n'accepte que des dates naïves
+        return value.replace(tzinfo=None)
+    return value
+
+
+def write_workbook(spec: ReportSpec, path: str) -> int:
+    """Écrit le classeur dans `path` et renvoie le nombre de lignes."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=spec.sheet)
+    sheet.append(list(spec.headers))
+
+    count = 0
+    last_key = None
+    db = SessionLocal()
+    try:
+        while True:
+            query = spec.query
+            if last_key is not None:
+                query = query.where(spec.key > last_key)
+            rows = db.execute(query.order_by(spec.key).limit(REPORT_PAGE_SIZE)).all()
+            for row in rows:
+                sheet.append([_cell(value) for value in row])
+            count += len(rows)
+            if len(rows) < REPORT_PAGE_SIZE:
+                break
+            last_key = rows[-1][0]
+    finally:
+        db.close()
+
+    workbook.save(path)
+    return count
+
+
+class ReportGenerator:
+    """Pool de génération et cache disque des rapports."""
+
+    def __init__(self, directory: str = REPORT_CACHE_DIR, ttl: float = REPORT_CACHE_TTL, workers: int = REPORT_WORKERS):
+        self.directory = directory
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _path(self, spec: ReportSpec) -> str:
+        return os.path.join(self.directory, f"{spec.name}-{spec.cache_key}.xlsx")
+
+    def _fresh(self, path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(path) < self.ttl
+        except OSError:
+            return False
+
+    def _prune(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".xlsx", ".tmp")) and not self._fresh(entry.path):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _generate(self, spec: ReportSpec, path: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        self._prune()
+        started = time.monotonic()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            count = write_workbook(spec, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info(f"Rapport {spec.name} généré : {count} ligne(s) en {time.monotonic() - started:.1f}s")
+        return path
+
+    async def get(self, spec: ReportSpec) -> str:
+        """Renvoie le chemin d'un rapport à jour, en le générant si besoin."""
+        path = self._path(spec)
+        if self._fresh(path):
+            return path
+
+        task = self._inflight.get(path)
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = loop.run_in_executor(self._executor, self._generate, spec, path)
+            self._inflight[path] = task
+            task.add_done_callback(lambda _: self._inflight.pop(path, None))
+        return await asyncio.shield(task)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+report_generator = ReportGenerator()
+
@@ -0,0 +1,142 @@
+"""Révocation des jetons par version de compte.
+
+`User` et `Employee` portent un compteur `token_version`, incrémenté dès que
+`is_active`, `role` ou le mot de passe changent ; le jeton embarque la version
+de son émission (claim `tv`) et le type de compte (`pt`). Un jeton plus ancien
+que la version courante est refusé.
+
+Chaque worker garde en mémoire les versions courantes des seuls comptes déjà
+incrémentés : chargées au démarrage, puis tenues à jour par le bus
+d'invalidation (`token_version:<type>:<id>:<version>`, publié après commit).
+La vérification ne coûte donc aucune requête.
+
+Sans bus (`CACHE_BUS_ENABLED=0`), les révocations faites par les autres workers
+n'arrivent pas : `get_current_user` relit alors la version en base à chaque
+requête (`is_revoked_in_db`).
+"""
+import logging
+import threading
+from typing import Any, Dict, Mapping, Tuple
+
+from sqlalchemy import event, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.cache import invalidate, invalidation_bus
+from app.database import SessionLocal
+from app.models.employee import Employee
+from app.models.user import User
+
+PRINCIPAL_TYPES = {User: "user", Employee: "employee"}
+PRINCIPAL_MODELS = {name: model for model, name in PRINCIPAL_TYPES.items()}
+REVOKING_FIELDS = ("is_active", "role", "hashed_password")
+
+_CHANGED_VERSIONS = "changed_token_versions"
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVersions:
+    """Versions courantes des comptes dont `token_version` a dépassé 1."""
+
+    def __init__(self):
+        self._versions: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def current(self, principal_type: str, principal_id: int) -> int:
+        return self._versions.get((principal_type, principal_id), 1)
+
+    def update(self, principal_type: str, principal_id: int, version: int) -> None:
+        key = (principal_type, principal_id)
+        with self._lock:
+            if version > self._versions.get(key, 1):
+                self._versions[key] = version
+
+    def load(self) -> int:
+        """Recharge toutes les versions depuis la base ; renvoie le nombre de comptes concernés."""
+        query = union_all(
+            select(literal("user"), User.id, User.token_version).where(User.token_version > 1),
+            select(literal("employee"), Employee.id, Employee.token_version).where(Employee.token_version > 1),
+        )
+        db = SessionLocal()
+        try:
+            rows = db.execute(query).all()
+        finally:
+            db.close()
+        versions = {(principal_type, principal_id): version for principal_type, principal_id, version in rows}
+        with self._lock:
+            # Garder les versions plus récentes reçues pendant la lecture
+            for key, version in self._versions.items():
+                if version > versions.get(key, 1):
+                    versions[key] = version
+            self._versions = versions
+        return len(versions)
+
+    def is_revoked(self, claims: Mapping[str, Any]) -> bool:
+        """Indique si le jeton a été émis avant la dernière révocation de son compte."""
+        return claims.get("tv", 1) < self.current(claims.get("pt", "user"), claims.get("id"))
+
+    def stored(self, principal_type: str, principal_id: int) -> int:
+        """Version lue en base (1 pour un compte inconnu), mémorisée au passage."""
+        model = PRINCIPAL_MODELS.get(principal_type)
+        if model is None:
+            return 1
+        db = SessionLocal()
+        try:
+            version = db.scalar(select(model.token_version).where(model.id == principal_id)) or 1
+        finally:
+            db.close()
+        self.update(principal_type, principal_id, version)
+        return version
+
+    def is_revoked_in_db(self, claims: Mapping[str, Any]) -> bool:
+        """Comme `is_revoked`, avec la version courante relue en base."""
+        return claims.get("tv", 1) < self.stored(claims.get("pt", "user"), claims.get("id"))
+
+
+token_versions = TokenVersions()
+
+
+def principal_type_of(principal: Any) -> str:
+    """Type de compte ("user" ou "employee") d'un modèle ou d'une ligne de `principal_login`."""
+    return getattr(principal, "principal_type", None) or PRINCIPAL_TYPES.get(type(principal), "user")
+
+
+def _bump_token_version(mapper, connection, target) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in REVOKING_FIELDS):
+        target.token_version = (target.token_version or 1) + 1
+        if state.session is not None:
+            state.session.info.setdefault(_CHANGED_VERSIONS, {})[(PRINCIPAL_TYPES[type(target)], target.id)] = target.token_version
+
+
+for _model in PRINCIPAL_TYPES:
+    event.listen(_model, "before_update", _bump_token_version)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _announce_versions(session: Session) -> None:
+    versions = session.info.pop(_CHANGED_VERSIONS, None)
+    if versions:
+        invalidate(*[f"token_version:{principal_type}:{principal_id}:{version}" for (principal_type, principal_id), version in versions.items()])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_versions(session: Session) -> None:
+    session.info.pop(_CHANGED_VERSIONS, None)
+
+
+def _apply_versions(tags) -> None:
+    for tag in tags:
+        _, principal_type, principal_id, version = tag.split(":")
+        token_versions.update(principal_type, int(principal_id), int(version))
+
+
+def _reload_versions() -> None:
+    # Messages perdus (reconnexion, retard) : on relit l'état complet
+    try:
+        token_versions.load()
+    except Exception:
+        logger.exception("Rechargement des versions de jetons impossible")
+
+
+invalidation_bus.subscribe("token_version:", _apply_versions, on_flush=_reload_versions)
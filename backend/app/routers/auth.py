@@ -3,7 +3,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated, Dict, Any
 from datetime import timedelta
 from dotenv import load_dotenv
+from pydantic import BaseModel
 from app.dependencies import DbDependency, create_access_token, get_access_token, authenticate_user, get_current_user
+from app import refresh_tokens
+from app.refresh_tokens import ACCESS_TOKEN_MINUTES
 
 
 
@@ -15,6 +18,26 @@ router = APIRouter(
     tags= ['auth']
 )
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+def token_response(user, refresh_token: str, message: str) -> Dict[str, Any]:
+    """Jeton d'accès court et nouveau jeton de rafraîchissement du compte."""
+    return {
+        "access_token": create_access_token(user, timedelta(minutes=ACCESS_TOKEN_MINUTES)),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_MINUTES * 60,
+        "refresh_token": refresh_token,
+        "message": message,
+        'user': {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "role": user.role
+        }
+    }
+
 @router.post('/login', status_code=status.HTTP_200_OK)
 async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: DbDependency):
     user = authenticate_user(db, form_data.username, form_data.password)
@@ -24,19 +47,15 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    token = create_access_token(user, timedelta(minutes=600))
-    return {
-        "access_token": token, 
-        "token_type": "bearer", 
-        "message": "Connexion réussie", 
-        # "role": user.role
-        'user': {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "role": user.role
-        }
-    }
+    refresh_token = refresh_tokens.issue(db, user)
+    db.commit()
+    return token_response(user, refresh_token, "Connexion réussie")
+
+@router.post('/refresh', status_code=status.HTTP_200_OK)
+async def refresh(data: RefreshRequest, db: DbDependency):
+    """Échange un jeton de rafraîchissement contre un nouveau jeton d'accès (et un nouveau jeton de rafraîchissement)."""
+    user, refresh_token = refresh_tokens.rotate(db, data.refresh_token)
+    return token_response(user, refresh_token, "Jeton rafraîchi")
 
 @router.get('/me', status_code=status.HTTP_200_OK)
 async def get_my_access(current_user: Dict[str, Any] = Depends(get_current_user)):
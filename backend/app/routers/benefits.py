@@ -1,7 +1,12 @@
 from fastapi import Depends, APIRouter, HTTPException, status
-from app.models.benefit import Benefit, BenefitCreate, BenefitUpdate
+from app.models.benefit import Benefit, BenefitCreate, BenefitUpdate, BenefitList
 from app.models.user import User
-from app.dependencies import DbDependency, check_superadmin
+from app.dependencies import DbDependency, require, evict_entitlements
+from app.permissions import rebuild_for_benefit, rebuild_for_users, subscribers_of_benefit
+from app.catalog import offer_catalog
+from app.cache import cached, invalidate
+from app.versioning import conditional_get, entity_version
+from app.pagination import Pagination, paginate
 from typing import Annotated
 
 router = APIRouter(
@@ -10,14 +15,19 @@ router = APIRouter(
 )
 
 @router.get('/all', status_code=status.HTTP_200_OK)
-async def get_all_benefits(db: DbDependency, current_user: Annotated[User, Depends(check_superadmin)]):
+@cached(tags=["benefit:*"], scope="role")
+async def get_all_benefits(db: DbDependency, page: Pagination, current_user: Annotated[User, Depends(require("read", "benefit"))]):
     """Recupérer tous les avantages."""
     try:
-        benefits = db.query(Benefit).all()
-        return {
+        benefits, next_cursor = paginate(db.query(Benefit), Benefit, page)
+        payload = {
             "message": "Benefits retrieved successfully",
-            "benefits": benefits
+            "benefits": benefits,
+            "next_cursor": next_cursor
         }
+        return payload if page.fields else BenefitList(**payload)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,7 +35,8 @@ async def get_all_benefits(db: DbDependency, current_user: Annotated[User, Depen
         )
     
 @router.get('/{benefit_id}', status_code=status.HTTP_200_OK)
-async def get_one_benefit(db: DbDependency, benefit_id: int, current_user: Annotated[User, Depends(check_superadmin)]):
+@cached(tags=lambda benefit_id, **_: [f"benefit:{benefit_id}"], scope="role")
+async def get_one_benefit(db: DbDependency, benefit_id: int, current_user: Annotated[User, Depends(require("read", "benefit"))], version=conditional_get("benefit", entity_version(Benefit, "benefit_id"))):
     """Recupérer un seul avantage."""
     try:
         benefit = db.query(Benefit).filter(Benefit.id == benefit_id).first()
@@ -47,7 +58,7 @@ async def get_one_benefit(db: DbDependency, benefit_id: int, current_user: Annot
         )
     
 @router.post('/create', status_code=status.HTTP_201_CREATED)
-async def create_benefit(db: DbDependency, benefit_data: BenefitCreate, current_user: Annotated[User, Depends(check_superadmin)]):
+async def create_benefit(db: DbDependency, benefit_data: BenefitCreate, current_user: Annotated[User, Depends(require("create", "benefit"))]):
     """Créer un avantage."""
     new_benefit = Benefit(
         name = benefit_data.name if benefit_data.name else None,
@@ -66,6 +77,7 @@ async def create_benefit(db: DbDependency, benefit_data: BenefitCreate, current_
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la création de l'avantage: {str(e)}"
         )
+    invalidate(f"benefit:{new_benefit.id}")
     
     return {
         "message": "Benefit created successfully", 
@@ -73,7 +85,7 @@ async def create_benefit(db: DbDependency, benefit_data: BenefitCreate, current_
     }
 
 @router.put('/update/{benefit_id}', status_code=status.HTTP_200_OK)
-async def update_benefit(db: DbDependency, benefit_data: BenefitUpdate, benefit_id: int, current_user: Annotated[User, Depends(check_superadmin)]):
+async def update_benefit(db: DbDependency, benefit_data: BenefitUpdate, benefit_id: int, current_user: Annotated[User, Depends(require("update", "benefit"))]):
     """Met a jour un avantage existant."""
     benefit = db.query(Benefit).filter(Benefit.id == benefit_id).first()
     if not benefit:
@@ -82,11 +94,12 @@ async def update_benefit(db: DbDependency, benefit_data: BenefitUpdate, benefit_
             detail="No benefit found"
         )
     
-    benefit.name = benefit_data.name if benefit_data.name else benefit.name,
-    benefit.permission_name = benefit_data.permission_name if benefit_data.permission_name else benefit.permission_name,
-    benefit.description = benefit_data.description if benefit_data.description else benefit.description,
+    benefit.name = benefit_data.name if benefit_data.name else benefit.name
+    benefit.permission_name = benefit_data.permission_name if benefit_data.permission_name else benefit.permission_name
+    benefit.description = benefit_data.description if benefit_data.description else benefit.description
     benefit.icon = benefit_data.icon if benefit_data.icon else benefit.icon
     try:
+        affected_users = rebuild_for_benefit(db, benefit_id)
         db.commit()
         db.refresh(benefit)
     except Exception as e:
@@ -95,6 +108,9 @@ async def update_benefit(db: DbDependency, benefit_data: BenefitUpdate, benefit_
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la mise a jour de l'avantage: {str(e)}"
         )
+    evict_entitlements(*affected_users)
+    offer_catalog.invalidate()
+    invalidate(f"benefit:{benefit_id}")
         
     return {
         "message": "Benefit updated successfully", 
@@ -102,7 +118,7 @@ async def update_benefit(db: DbDependency, benefit_data: BenefitUpdate, benefit_
     }
 
 @router.delete('/delete/{benefit_id}', status_code=status.HTTP_200_OK)
-async def delete_benefit(db: DbDependency, benefit_id: int, current_user: Annotated[User, Depends(check_superadmin)]):
+async def delete_benefit(db: DbDependency, benefit_id: int, current_user: Annotated[User, Depends(require("delete", "benefit"))]):
     """Supprime un avantage existant."""
     benefit = db.query(Benefit).filter(Benefit.id == benefit_id).first()
     if not benefit:
@@ -112,7 +128,9 @@ async def delete_benefit(db: DbDependency, benefit_id: int, current_user: Annota
         )
     
     try:
+        affected_users = subscribers_of_benefit(db, benefit_id)
         db.delete(benefit)
+        rebuild_for_users(db, affected_users)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -120,6 +138,9 @@ async def delete_benefit(db: DbDependency, benefit_id: int, current_user: Annota
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la suppression de l'avantage: {str(e)}"
         )
+    evict_entitlements(*affected_users)
+    offer_catalog.invalidate()
+    invalidate(f"benefit:{benefit_id}")
     
     return {"message": "Offre deleted successfully"}
         
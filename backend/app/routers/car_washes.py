@@ -1,11 +1,19 @@
-from fastapi import Depends, APIRouter, HTTPException, status
-from app.models.car_wash import CarWash, CarWashCreate, CarWashUpdate
+from fastapi import Depends, APIRouter, HTTPException, status, Query
+from app.models.car_wash import CarWash, CarWashCreate, CarWashUpdate, CarWashList
 from app.models.car_wash_employee import CarWashEmployee
 from app.models.user import RoleUser
 from app.models.employee import Employee, RoleEmployee, EmployeeCreate
 from app.models.offer import Offer
 from app.models.user import User, UserCreate
-from app.dependencies import DbDependency, bcrypt_context, create_access_token, check_superadmin, check_advantage, get_advantage_checker, get_current_user
+from app.dependencies import DbDependency, UnitOfWork, after_commit, bcrypt_context, create_access_token, check_superadmin, check_advantage, get_advantage_checker, get_current_user, require
+from app.geo import station_locator
+from app.cache import cached, invalidate
+from app.versioning import conditional_get, entity_version
+from app.pagination import Pagination, paginate
+from app.batch import BatchIds, keyed, unique_ids
+from app.identities import identity_conflict
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from typing import Annotated, Dict, Any, List
 from copy import deepcopy
 from pydantic import BaseModel
@@ -17,41 +25,81 @@ router = APIRouter(
 )
 
 @router.get('/', status_code=status.HTTP_200_OK)
-async def get_all_stations(db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+@cached(tags=lambda current_user, **_: [f"owner:{current_user['id']}"])
+async def get_all_stations(db: DbDependency, page: Pagination, current_user: Annotated[User, Depends(require("list", "car_wash", "Vous n'êtes pas autorisé à voir tous les lavages"))]):
     """Voir tous les lavages de l'utilisateur connecté."""
 
-    if current_user['role'] != 'station_owner':
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vous n'êtes pas autorisé à voir tous les lavages"
-        )
-    car_wash = db.query(CarWash).filter(CarWash.user_id == current_user['id']).all()
+    car_wash, next_cursor = paginate(db.query(CarWash).filter(CarWash.user_id == current_user['id']), CarWash, page)
+    payload = {
+        "message": "Lavages récupérés avec succès",
+        "data": car_wash,
+        "next_cursor": next_cursor
+    }
+    return payload if page.fields else CarWashList(**payload)
+
+@router.get('/nearby', status_code=status.HTTP_200_OK)
+async def get_nearby_stations(
+    db: DbDependency,
+    current_user: Annotated[User, Depends(get_current_user)],
+    latitude: float = Query(ge=-90, le=90),
+    longitude: float = Query(ge=-180, le=180),
+    radius_km: float = Query(default=10, gt=0, le=500),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """Récupère les lavages les plus proches d'une position, du plus proche au plus loin."""
+    nearest = station_locator.index(db).nearest(latitude, longitude, radius_km, limit)
+    if not nearest:
+        return {
+            "message": "Aucun lavage trouvé à proximité",
+            "data": []
+        }
+
+    stations = {
+        car_wash.id: car_wash
+        for car_wash in db.query(CarWash).filter(CarWash.id.in_([station_id for _, station_id in nearest])).all()
+    }
+    data = [
+        {"distance_km": round(distance, 3), "lavage": stations[station_id]}
+        for distance, station_id in nearest
+        if station_id in stations
+    ]
     return {
         "message": "Lavages récupérés avec succès",
-        "data": car_wash
+        "data": data
+    }
+
+@router.get('/batch', status_code=status.HTTP_200_OK)
+async def get_stations_batch(ids: BatchIds, db: DbDependency, current_user: Annotated[User, Depends(require("read", "car_wash", "Vous n'êtes pas autorisé à voir ces lavages"))]):
+    """Récupère plusieurs lavages et leurs employés, indexés par ID : tous pour le super admin, les siens pour un propriétaire."""
+    ids = unique_ids(ids)
+    query = db.query(CarWash).options(selectinload(CarWash.employees)).filter(CarWash.id.in_(ids))
+    if current_user['role'] == RoleUser.station_owner:
+        query = query.filter(CarWash.user_id == current_user['id'])
+
+    stations = {
+        car_wash.id: {"lavage": car_wash, "employees": car_wash.employees}
+        for car_wash in query.all()
     }
+    return keyed("Lavages récupérés avec succès", ids, stations)
+
 
 @router.get("/{wash_id}", status_code=status.HTTP_200_OK)
-async def get_one_station_info(wash_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+@cached(tags=lambda wash_id, **_: [f"car_wash:{wash_id}"], scope="public")
+async def get_one_station_info(wash_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)], version=conditional_get("car_wash", entity_version(CarWash, "wash_id"))):
     """Récupère les information d'un lavage de l'utilisateur connecté"""
-    car_wash = db.query(CarWash).filter(CarWash.id == wash_id).first()
+    # Employés chargés en une seule requête supplémentaire, quel que soit leur nombre
+    car_wash = db.query(CarWash).options(selectinload(CarWash.employees)).filter(CarWash.id == wash_id).first()
 
     if not car_wash:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lavage non trouvé"
         )
-    car_wash_employees = db.query(CarWashEmployee).filter(CarWashEmployee.car_wash_id == car_wash.id).all()
 
-    employees = []
-    for employee in car_wash_employees:
-        employee_info = db.query(Employee).filter(Employee.id == employee.employee_id).first()
-        employees.append(employee_info)
-    
     return {
         "message": "Lavage récupéré avec succès",
         "lavage": car_wash,
-        "employees": employees
+        "employees": car_wash.employees
     }
 
 
@@ -64,7 +112,9 @@ async def create_station(db: DbDependency, washing_data: CarWashCreate, current_
         image=washing_data.image,
         city=washing_data.city,
         country=washing_data.country,
-        address=washing_data.address
+        address=washing_data.address,
+        latitude=washing_data.latitude,
+        longitude=washing_data.longitude
     )
     try:
         db.add(new_station)
@@ -76,6 +126,8 @@ async def create_station(db: DbDependency, washing_data: CarWashCreate, current_
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la création de l'offre: {str(e)}"
         )
+    station_locator.upsert(new_station.id, new_station.latitude, new_station.longitude)
+    invalidate(f"owner:{current_user['id']}")
     
     return {
         "message": "Lavage créé avec succès",
@@ -84,7 +136,7 @@ async def create_station(db: DbDependency, washing_data: CarWashCreate, current_
 
 
 @router.post('/create/{wash_id}/employee', status_code=status.HTTP_201_CREATED)
-async def create_user_employee_for_station(db: DbDependency, wash_id: int, user_data: EmployeeCreate, current_user: Annotated[User, Depends(get_current_user)]):
+async def create_user_employee_for_station(db: UnitOfWork, wash_id: int, user_data: EmployeeCreate, current_user: Annotated[User, Depends(get_current_user)]):
     """
         Créer un compte employer pour un lavage spécifique.
         Seuls les station_owner propriétaires du lavage peuvent effectuer cette action.
@@ -105,24 +157,8 @@ async def create_user_employee_for_station(db: DbDependency, wash_id: int, user_
             detail="Vous n'êtes pas autorisé à créer des employés pour cette station"
         )
     
-    # Vérifier si un utilisateur avec le même username ou email existe
-    existing_user = db.query(Employee).filter(
-        (Employee.username == user_data.username) | (User.email == user_data.email)
-    ).first()
-
-    if existing_user:
-        if existing_user.username == user_data.username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Nom d'utilisateur déjà pris"
-            )
-        if existing_user.email == user_data.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email déjà utilisé"
-            )
-    
-    new_user = User(
+    new_user = Employee(
+        owner_id = current_user['id'],
         username = user_data.username,
         email = user_data.email,
         hashed_password = bcrypt_context.hash(user_data.password),
@@ -137,24 +173,26 @@ async def create_user_employee_for_station(db: DbDependency, wash_id: int, user_
         can_edit=False
     )
 
+    # L'employé et son affectation sont validés ensemble à la sortie de la route ;
+    # les doublons de nom d'utilisateur ou d'email sont refusés par la base au flush
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)  # Rafraîchir pour obtenir les valeurs générées (par exemple, id)
+        db.flush()  # Obtenir l'id généré sans valider
 
         car_wash_employee = CarWashEmployee(
             car_wash_id = car_wash.id,
             employee_id = new_user.id
         )
         db.add(car_wash_employee)
-        db.commit()
-        db.refresh(car_wash_employee)
+        db.flush()
+    except IntegrityError as e:
+        raise identity_conflict(e, "Erreur lors de la création de l'utilisateur")
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erreur lors de la création de l'utilisateur"
         )
+    after_commit(db, invalidate, f"car_wash:{car_wash.id}")
     return {
         "message": "User created successfully", 
         "data": { 
@@ -170,37 +208,25 @@ async def create_user_employee_for_station(db: DbDependency, wash_id: int, user_
     }
 
 @router.get('/{wash_id}/employee', status_code=status.HTTP_200_OK)
+@cached(tags=lambda wash_id, **_: [f"car_wash:{wash_id}"], scope="public")
 async def get_all_employee_from_station(db: DbDependency, wash_id: int, current_user: Annotated[User, Depends(get_current_user)]):
     """Voir tous les  employee d'un lavage spécifique."""
-    car_wash = db.query(CarWash).filter(CarWash.id == wash_id).first()
+    car_wash = db.query(CarWash).options(selectinload(CarWash.employees)).filter(CarWash.id == wash_id).first()
     if not car_wash:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Lavage not found'
         )
-    
-    try:
-        car_wash_employees = db.query(CarWashEmployee).filter(CarWashEmployee.car_wash_id == car_wash.id).all()
-        if not car_wash_employees:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No employees found"
-            )
-        
-        employees_list = []
-        for employees in car_wash_employees:
-            user = db.query(User).filter(User.id == employees.employee_id).first()
-            employees_list.append(user)
-
-        return {
-            "message": "Employees retrieved successfully",
-            "data": employees_list
-        }
-    except Exception as e:
+    if not car_wash.employees:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving employees: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No employees found"
         )
+
+    return {
+        "message": "Employees retrieved successfully",
+        "data": car_wash.employees
+    }
     
 """pour quant tu seras pret a mettre les abonnements"""
 # @router.post("/")
@@ -5,7 +5,12 @@ from app.models.user import RoleUser
 from app.models.employee import Employee, RoleEmployee, EmployeeCreate, EmployeeUpdate
 from app.models.offer import Offer
 from app.models.user import User, UserCreate
-from app.dependencies import DbDependency, bcrypt_context, create_access_token, check_superadmin, check_advantage, get_advantage_checker, get_current_user
+from app.dependencies import DbDependency, bcrypt_context, create_access_token, check_superadmin, check_advantage, get_advantage_checker, get_current_user, require
+from app.cache import invalidate
+from app.versioning import touch
+from app.batch import BatchIds, keyed, unique_ids
+from app.identities import identity_conflict
+from sqlalchemy.exc import IntegrityError
 from typing import Annotated, Dict, Any, List
 from copy import deepcopy
 from pydantic import BaseModel
@@ -23,26 +28,8 @@ router = APIRouter(
 
 
 @router.post('/employee/create', status_code=status.HTTP_201_CREATED)
-async def create_employee(employee_data: EmployeeCreate, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def create_employee(employee_data: EmployeeCreate, db: DbDependency, current_user: Annotated[User, Depends(require("create", "employee", "Vous n'avez pas les droits pour créer un employee."))]):
     """Créer un employee pour un lavage."""
-    if current_user['role'] != RoleUser.station_owner:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'avez pas les droits pour créer un employee."
-        )
-    
-    existing_employee = db.query(Employee).where(((Employee.username == employee_data.username) | (Employee.email == employee_data.email))).first()
-    if existing_employee:
-        if existing_employee.username == employee_data.username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Nom d'utilisateur déjà pris"
-            )
-        if existing_employee.email == employee_data.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email déjà utilisé"
-            )
     
     # Vérifie si le champ `role` est envoyé
     if employee_data.role:
@@ -51,8 +38,18 @@ async def create_employee(employee_data: EmployeeCreate, db: DbDependency, curre
         # Valeur par défaut si non précisé
         role_to_assign = RoleEmployee.car_washer
 
+    owner_id = current_user['id']
+    if current_user['role'] == RoleEmployee.station_manager:
+        # Le gérant enregistre des laveurs pour le propriétaire de son lavage
+        if role_to_assign != RoleEmployee.car_washer:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Un gérant ne peut enregistrer que des laveurs."
+            )
+        owner_id = db.query(Employee.owner_id).filter(Employee.id == current_user['id']).scalar()
+
     new_employee = Employee(
-        owner_id = current_user['id'],
+        owner_id = owner_id,
         username = employee_data.username,
         email = employee_data.email,
         hashed_password = bcrypt_context.hash(employee_data.password),
@@ -64,11 +61,14 @@ async def create_employee(employee_data: EmployeeCreate, db: DbDependency, curre
         role=role_to_assign  # Rôle par défaut
     )
 
-    # Ajouter et persister dans la base de données
+    # Ajouter et persister dans la base de données ; les doublons sont refusés par la base
     try:
         db.add(new_employee)
         db.commit()
         db.refresh(new_employee) 
+    except IntegrityError as e:
+        db.rollback()
+        raise identity_conflict(e, "Erreur lors de la création de l'employé")
     except Exception as e:
         logger.error(f"Erreur lors de la création de l'employé : {str(e)}")
         db.rollback()
@@ -81,15 +81,21 @@ async def create_employee(employee_data: EmployeeCreate, db: DbDependency, curre
         "user": new_employee
     }
 
+@router.get("/employee/batch", status_code=status.HTTP_200_OK)
+async def get_employees_batch(ids: BatchIds, db: DbDependency, current_user: Annotated[User, Depends(require("read", "employee", "Vous n'avez pas les droits pour voir ces employés."))]):
+    """Récupère plusieurs employés, indexés par ID : tous pour le super admin, les siens pour un propriétaire."""
+    ids = unique_ids(ids)
+    query = db.query(Employee).filter(Employee.id.in_(ids))
+    if current_user['role'] == RoleUser.station_owner:
+        query = query.filter(Employee.owner_id == current_user['id'])
+
+    employees = {employee.id: employee for employee in query.all()}
+    return keyed("Employés récupérés avec succès", ids, employees)
+
 @router.put("/employee/edit/{employee_id}", status_code=status.HTTP_201_CREATED)
-async def edit_employee(employee_id: int, employee_data: EmployeeUpdate, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def edit_employee(employee_id: int, employee_data: EmployeeUpdate, db: DbDependency, current_user: Annotated[User, Depends(require("update", "employee", "Vous n'avez pas les droits pour éditer un employee."))]):
     """Récupère les informations d'un employee pour l'édition."""
     logger.info(f"Récupération des informations de l'employee ID={employee_id} pour édition")
-    if current_user['role'] != RoleUser.station_owner:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'avez pas les droits pour éditer un employee."
-        )
     
     employee = db.query(Employee).filter(Employee.id == employee_id, Employee.owner_id == current_user['id']).first()
     if not employee:
@@ -106,16 +112,23 @@ async def edit_employee(employee_id: int, employee_data: EmployeeUpdate, db: DbD
     employee.age = employee_data.age if employee_data.age else employee.age
     employee.hashed_password = bcrypt_context.hash(employee_data.password) if employee_data.password else employee.hashed_password
     employee.role = employee_data.role if employee_data.role else employee.role
+    station_ids = [station.id for station in employee.assigned_station]
+    station_tags = [f"car_wash:{station_id}" for station_id in station_ids]
 
     try:
+        touch(db, CarWash, station_ids)
         db.commit()
         db.refresh(employee)
+    except IntegrityError as e:
+        db.rollback()
+        raise identity_conflict(e, "Erreur lors de la mise a jour de l'employee")
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la mise a jour de l'offre: {str(e)}"
         )
+    invalidate(*station_tags)
     
     return {
         "message": "Employee modifié avec succès",
@@ -123,15 +136,9 @@ async def edit_employee(employee_id: int, employee_data: EmployeeUpdate, db: DbD
     }
 
 @router.delete("/employee/delete/{employee_id}", status_code=status.HTTP_200_OK)
-async def delete_employee(employee_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def delete_employee(employee_id: int, db: DbDependency, current_user: Annotated[User, Depends(require("delete", "employee", "Vous n'avez pas les droits pour supprimer un employee."))]):
     """Supprime un employee."""
     logger.info(f"Tentative de suppression de l'employee ID={employee_id}")
-
-    if current_user['role'] != RoleUser.station_owner:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'avez pas les droits pour supprimer un employee."
-        )
     
     employee = db.query(Employee).filter(Employee.id == employee_id, Employee.owner_id == current_user['id']).first()
     if not employee:
@@ -140,7 +147,10 @@ async def delete_employee(employee_id: int, db: DbDependency, current_user: Anno
             detail="Employee non trouvé"
         )
     
+    station_ids = [station.id for station in employee.assigned_station]
+    station_tags = [f"car_wash:{station_id}" for station_id in station_ids]
     try:
+        touch(db, CarWash, station_ids)
         db.delete(employee)
         db.commit()
         logger.info(f"Employee supprimé : {employee.username}, ID={employee.id}")
@@ -150,19 +160,15 @@ async def delete_employee(employee_id: int, db: DbDependency, current_user: Anno
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la suppression de l'employee: {str(e)}"
         )
+    invalidate(*station_tags)
     
     return {
         "message": "Employee supprimé avec succès"
     }
 
 @router.post('/station/assign', status_code=status.HTTP_201_CREATED)
-async def assign_employee_to_station(db: DbDependency, car_wash_employee_data: CarWashEmployee, current_user: Annotated[User, Depends(get_current_user)]):
+async def assign_employee_to_station(db: DbDependency, car_wash_employee_data: CarWashEmployee, current_user: Annotated[User, Depends(require("assign", "employee", "Vous n'avez pas les droits pour assigner un employee à un lavage."))]):
     """Assigner un employee à un lavage."""
-    if current_user['role'] != RoleUser.station_owner:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'avez pas les droits pour assigner un employee à un lavage."
-        )
     
     car_wash = db.query(CarWash).filter(CarWash.id == car_wash_employee_data.car_wash_id, CarWash.user_id == current_user['id']).first()
     if not car_wash:
@@ -203,6 +209,7 @@ async def assign_employee_to_station(db: DbDependency, car_wash_employee_data: C
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de l'assignation de l'employee au lavage: {str(e)}"
         )
+    invalidate(f"car_wash:{new_assignment.car_wash_id}")
     
     return {
         "message": "Employee assigné au lavage avec succès",
@@ -0,0 +1,127 @@
+"""Exports en flux (NDJSON ou CSV) des grandes collections.
+
+Les lignes sont lues par lots depuis un curseur côté serveur (`yield_per`) et
+écrites au fil de l'eau dans la réponse : la mémoire utilisée ne dépend pas du
+nombre de lignes exportées.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Annotated, Any, Dict, Iterator, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from dotenv import load_dotenv
+import os
+
+from app.database import SessionLocal
+from app.dependencies import check_stock_access, require, get_current_user
+from app.models.car_wash import CarWash
+from app.models.stock_history import StockHistory
+from app.models.stock_managment import StockManagment
+from app.models.user import RoleUser, User
+from app.pagination import model_fields
+
+load_dotenv(encoding="utf-8")
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+ExportFormat = Annotated[str, Query(pattern="^(ndjson|csv)$")]
+
+router = APIRouter(
+    prefix="/exports",
+    tags=['exports']
+)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _rows(query: Select) -> Iterator[List[Any]]:
+    """Parcourt la requête par lots sur sa propre session.
+
+    La session de la requête HTTP est fermée avant l'envoi du corps : le
+    générateur ouvre donc la sienne et la ferme à la fin du flux.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            yield [[_plain(value) for value in row] for row in batch]
+    finally:
+        db.close()
+
+
+def _ndjson(columns: List[str], query: Select) -> Iterator[bytes]:
+    for batch in _rows(query):
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, separators=(",", ":")) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+def _csv(columns: List[str], query: Select) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM pour qu'Excel détecte l'UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for batch in _rows(query):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_export(name: str, model, query: Select, export_format: str) -> StreamingResponse:
+    """Réponse en flux des colonnes exposées de `model` sélectionnées par `query`."""
+    columns = model_fields(model)
+    query = query.with_only_columns(*[getattr(model, column) for column in columns]).order_by(model.id)
+    body = _csv(columns, query) if export_format == "csv" else _ndjson(columns, query)
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get('/owners', status_code=status.HTTP_200_OK)
+def export_owners(current_user: Annotated[Dict[str, Any], Depends(require("export", "user"))], format: ExportFormat = "ndjson"):
+    """Exporte les propriétaires de stations."""
+    return stream_export("proprietaires", User, select(User).where(User.role == RoleUser.station_owner), format)
+
+
+@router.get('/stations', status_code=status.HTTP_200_OK)
+def export_stations(current_user: Annotated[Dict[str, Any], Depends(require("export", "car_wash", "Vous n'êtes pas autorisé à exporter les lavages"))], format: ExportFormat = "ndjson"):
+    """Exporte les lavages : tous pour le super admin, les siens pour un propriétaire."""
+    query = select(CarWash)
+    if current_user['role'] == RoleUser.station_owner:
+        query = query.where(CarWash.user_id == current_user['id'])
+    return stream_export("lavages", CarWash, query, format)
+
+
+@router.get('/stations/{wash_id}/stock-histories', status_code=status.HTTP_200_OK)
+def export_stock_histories(wash_id: int, current_user: Annotated[Dict[str, Any], Depends(check_stock_access)], format: ExportFormat = "ndjson"):
+    """Exporte l'historique des stocks d'un lavage."""
+    query = (
+        select(StockHistory)
+        .join(StockManagment, StockManagment.id == StockHistory.stock_id)
+        .where(StockManagment.station_id == wash_id)
+    )
+    return stream_export(f"historique-stocks-{wash_id}", StockHistory, query, format)
@@ -7,7 +7,9 @@ from app.models.wash_record import WashRecord
 from app.models.subscription import Subscription
 from app.models.offer import Offer
 from datetime import date
-from app.dependencies import DbDependency, bcrypt_context, check_manager, check_superadmin, get_current_user
+from app.dependencies import DbDependency, bcrypt_context, check_manager, check_superadmin, get_current_user, require
+from app.geo import station_locator
+from app.cache import invalidate
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select as sa_select
 import logging
@@ -23,12 +25,9 @@ router = APIRouter(
 
 
 @router.get('/', status_code=status.HTTP_200_OK)
-async def get_wash_record_by_manager(db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def get_wash_record_by_manager(db: DbDependency, current_user: Annotated[User, Depends(require("read", "wash_record", "Accès interdit"))]):
     """Recuperer les utilisateurs enregistrer par le manager"""
 
-    if current_user['role'] != RoleUser.system_manager:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
-    
     wash_records = db.query(WashRecord).filter(WashRecord.manager_id == current_user["id"]).all()
     users = []
     for wash_record in wash_records: 
@@ -45,12 +44,9 @@ async def get_wash_record_by_manager(db: DbDependency, current_user: Annotated[U
     }
 
 @router.post('/create/car-wash/{user_id}', status_code=status.HTTP_200_OK)
-async def create_car_wash_for_user(user_id: int, car_wash_data: CarWashUpdate, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def create_car_wash_for_user(user_id: int, car_wash_data: CarWashUpdate, db: DbDependency, current_user: Annotated[User, Depends(require("create", "car_wash", "Accès interdit"))]):
     """Créer un garage pour un utilisateur donné."""
     
-    if current_user['role'] != RoleUser.system_manager:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
-    
     user = db.query(User).filter(User.id == user_id, User.role == RoleUser.station_owner).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé ou n'est pas un station_owner")
@@ -58,6 +54,8 @@ async def create_car_wash_for_user(user_id: int, car_wash_data: CarWashUpdate, d
     new_car_wash = CarWash(
         user_id= user.id,
         name= car_wash_data.name if car_wash_data.name else None,
+        latitude= car_wash_data.latitude,
+        longitude= car_wash_data.longitude,
     )
     
     try:
@@ -67,6 +65,8 @@ async def create_car_wash_for_user(user_id: int, car_wash_data: CarWashUpdate, d
     except IntegrityError as e:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erreur lors de la création du garage")
+    station_locator.upsert(new_car_wash.id, new_car_wash.latitude, new_car_wash.longitude)
+    invalidate(f"owner:{user.id}")
     
     return {
         "message": "Garage créé avec succès",
@@ -74,12 +74,9 @@ async def create_car_wash_for_user(user_id: int, car_wash_data: CarWashUpdate, d
     }
 
 @router.get('/details/{wash_id}', status_code=status.HTTP_200_OK)
-async def get_wash_record_details_by_manager(wash_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def get_wash_record_details_by_manager(wash_id: int, db: DbDependency, current_user: Annotated[User, Depends(require("read", "wash_record", "Accès interdit"))]):
     """Recuperer les informations des lavages enregistrer par le manager"""
 
-    if current_user['role'] != RoleUser.system_manager:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
-    
     wash_record = db.query(WashRecord).filter(WashRecord.wash_id == wash_id, WashRecord.manager_id == current_user['id']).first()
     
     if not wash_record:
@@ -103,14 +100,11 @@ async def get_wash_record_details_by_manager(wash_id: int, db: DbDependency, cur
 @router.get('/quotas', status_code=status.HTTP_200_OK)
 async def get_manager_quota(
     db: DbDependency, 
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(require("read", "quota", "Accès interdit"))]
 ):
     """
     Récupère le quota du manager et ce qu'il reste à faire pour la période définie par le quota.
     """
-    if current_user['role'] != RoleUser.system_manager:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
-
     initial_quota = db.query(ManagerQuota).filter(ManagerQuota.manager_id == current_user['id']).first()
 
     if not initial_quota:
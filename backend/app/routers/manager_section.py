@@ -4,9 +4,10 @@ from app.models.user import RoleUser, User, UserCreate, UserUpdate
 from app.models.manager_quota import ManagerQuota, CreateQuota
 from app.models.wash_record import WashRecord
 from datetime import date
-from app.dependencies import DbDependency, bcrypt_context, check_manager, check_superadmin, get_current_user
+from app.dependencies import DbDependency, bcrypt_context, check_manager, check_superadmin, get_current_user, require
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select as sa_select
+from app.cache import coalesce
 import logging
 
 # Configurer les logs
@@ -19,11 +20,9 @@ router = APIRouter(
 )
 
 @router.get('/all', status_code=status.HTTP_200_OK)
-async def get_managers( db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+@coalesce(scope="role")
+def get_managers(db: DbDependency, current_user: Annotated[User, Depends(require("read", "manager", "Accès interdit"))]):
     """ Récupère la liste des managers. """
-    if current_user['role'] != RoleUser.super_admin:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
-
     managers = db.query(User).filter(User.role == RoleUser.system_manager).all()
 
     manager_details = []
@@ -67,13 +66,9 @@ async def get_managers( db: DbDependency, current_user: Annotated[User, Depends(
     return {"managers": manager_details}
 
 @router.get("/details/{manager_id}", status_code=status.HTTP_200_OK)
-async def get_manager_detail_with_quota_and_record(manager_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def get_manager_detail_with_quota_and_record(manager_id: int, db: DbDependency, current_user: Annotated[User, Depends(require("read", "manager", "Privilège reserver au superadmin "))]):
     """Récuperer un manager et ses informations"""
 
-    if current_user["role"] != RoleUser.super_admin:
-        raise HTTPException(status_code=403, detail="Privilège reserver au superadmin ")
-    
-
     manager = db.query(User).filter(User.id == manager_id, User.role == RoleUser.system_manager).first()
 
     if not manager:
@@ -106,12 +101,8 @@ async def get_manager_detail_with_quota_and_record(manager_id: int, db: DbDepend
     }
 
 @router.post("/quota_assign/{manager_id}", status_code=status.HTTP_200_OK)
-async def create_manager_quotas(manager_id: int, quota_data: CreateQuota, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def create_manager_quotas(manager_id: int, quota_data: CreateQuota, db: DbDependency, current_user: Annotated[User, Depends(require("assign", "manager", "Vous n'avez pas accès a ce prilivège"))]):
     """Créer un quota pour un utilisateur"""
-
-    if current_user["role"] != RoleUser.super_admin:
-        raise HTTPException(status_code=403, detail="Vous n'avez pas accès a ce prilivège")
-    
     user = db.query(User).filter(User.id == manager_id).first()
 
     if not user:
@@ -1,11 +1,16 @@
-from fastapi import Depends, APIRouter, HTTPException, status
+from fastapi import Depends, APIRouter, HTTPException, status, Request
 from app.models.benefit import Benefit
 from app.models.offer import Offer
 from app.models.offer_benefit import OfferBenefit
 from app.models.user import User
-from app.dependencies import DbDependency, check_superadmin
+from app.dependencies import DbDependency, require, evict_entitlements
+from app.permissions import rebuild_for_offer
+from app.cache import etag_response
+from app.catalog import offer_catalog
 from typing import Annotated, List
 from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
 
 router = APIRouter(
     prefix="/offer_benefits",
@@ -21,39 +26,26 @@ class OfferBenefitsResponse(BaseModel):
     data: dict
 
 @router.get('/{offer_id}', status_code=status.HTTP_200_OK)
-async def get_benefits_for_offer(db: DbDependency, offer_id: int, current_user: Annotated[User, Depends(check_superadmin)]):
+async def get_benefits_for_offer(request: Request, db: DbDependency, offer_id: int, current_user: Annotated[User, Depends(require("read", "offer_benefit"))]):
     """Retrieve all benefits associated with a specific offer."""
-    offer = db.query(Offer).filter(Offer.id == offer_id).first()
-    if not offer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Offer not found"
-        )
-    
-    # Récupérer les avantages associés via la table offer_benefit
     try:
-        benefits = (
-            db.query(Benefit)
-            .join(OfferBenefit, OfferBenefit.benefit_id == Benefit.id)
-            .filter(OfferBenefit.offer_id == offer_id)
-            .all()
-        )
-        return {
-            "message": "Benefits retrieved successfully",
-            "data": {
-                "offer_id": offer_id,
-                "benefits": benefits
-            }
-        }
+        benefits = offer_catalog.snapshot(db).offer_benefits.get(offer_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving benefits for offer: {str(e)}"
         )
+    if not benefits:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Offer not found"
+        )
+    body, etag = benefits
+    return etag_response(request, body, etag)
 
 
 @router.post('/create/{offer_id}', status_code=status.HTTP_201_CREATED)
-async def assign_benefits_to_offer(db: DbDependency, offer_id: int, assignment_data: List[int], current_user: Annotated[User, Depends(check_superadmin)]):
+async def assign_benefits_to_offer(db: DbDependency, offer_id: int, assignment_data: List[int], current_user: Annotated[User, Depends(require("create", "offer_benefit"))]):
     """Assigner un ou plusieurs avantages a une offre."""
     # Vérifier que l'offre existe
     offer = db.query(Offer).filter(Offer.id == offer_id).first()
@@ -63,53 +55,58 @@ async def assign_benefits_to_offer(db: DbDependency, offer_id: int, assignment_d
             detail="Offer not found"
         )
     
-    # Vérifier que tous les avantages existent et éviter les doublons
-    for benefit_id in assignment_data:
-        benefit = db.query(Benefit).filter(Benefit.id == benefit_id).first()
-        if not benefit:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Benefit with id {benefit_id} not found"
-            )
-        
-        # Vérifier si l'association existe déjà
-        existing = db.query(OfferBenefit).filter(
-            OfferBenefit.offer_id == offer_id,
-            OfferBenefit.benefit_id == benefit_id
-        ).first()
-        if existing:
+    # Vérifier que tous les avantages existent, en une requête
+    benefit_ids = list(dict.fromkeys(assignment_data))
+    existing_ids = set(db.scalars(select(Benefit.id).where(Benefit.id.in_(benefit_ids))))
+    missing_ids = [benefit_id for benefit_id in benefit_ids if benefit_id not in existing_ids]
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Benefit with id {', '.join(map(str, missing_ids))} not found"
+        )
+    if not benefit_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucun avantage à assigner"
+        )
+
+    try:
+        # Créer les associations en une seule insertion ; les doublons sont ignorés
+        created_ids = list(db.scalars(
+            insert(OfferBenefit)
+            .values([{"offer_id": offer_id, "benefit_id": benefit_id} for benefit_id in benefit_ids])
+            .on_conflict_do_nothing()
+            .returning(OfferBenefit.benefit_id)
+        ))
+        if not created_ids:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="L'avantage a déjà été assigné à cette offre"
             )
-
-        # Créer l'association dans offer_benefit
-        offer_benefit = OfferBenefit(
-            offer_id=offer_id, 
-            benefit_id=benefit_id
-        )
-        db.add(offer_benefit)
-
-    # Valider les modifications dans la base de données
-    try:
+        affected_users = rebuild_for_offer(db, offer_id)
         db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error assigning benefits to offer: {str(e)}"
         )
+    evict_entitlements(*affected_users)
+    offer_catalog.invalidate()
     
     return {
         "message": "Benefits assigned to offer successfully",
         "data": {
             "offer_id": offer_id,
-            "benefit_ids": assignment_data
+            "benefit_ids": created_ids
         }
     }
 
 @router.delete('/remove', status_code=status.HTTP_200_OK, response_model=OfferBenefitsResponse)
-async def remove_benefits_from_offer(db: DbDependency, removal_data: RemoveBenefitsFromOffer, current_user: Annotated[User, Depends(check_superadmin)]):
+async def remove_benefits_from_offer(db: DbDependency, removal_data: RemoveBenefitsFromOffer, current_user: Annotated[User, Depends(require("delete", "offer_benefit"))]):
     """Supprimer un ou plusieurs avantage dans une offre."""
     offer = db.query(Offer).filter(Offer.id == removal_data.offer_id).first()
     if not offer:
@@ -118,23 +115,18 @@ async def remove_benefits_from_offer(db: DbDependency, removal_data: RemoveBenef
             detail="Offer not found"
         )
 
-    # Supprimer les associations
-    deleted_count = 0
-    for benefit_id in removal_data.benefit_ids:
-        # Vérifier si l'association existe
-        association = db.query(OfferBenefit).filter(
+    # Supprimer les associations en une seule requête ; les absentes sont ignorées
+    deleted_ids = list(db.scalars(
+        delete(OfferBenefit)
+        .where(
             OfferBenefit.offer_id == removal_data.offer_id,
-            OfferBenefit.benefit_id == benefit_id
-        ).first()
-        if not association:
-            continue  # Ignorer si l'association n'existe pas
-        
-        # Supprimer l'association
-        db.delete(association)
-        deleted_count += 1
+            OfferBenefit.benefit_id.in_(removal_data.benefit_ids)
+        )
+        .returning(OfferBenefit.benefit_id)
+    ))
     
     # Si aucune association n'a été trouvée, signaler un avertissement
-    if deleted_count == 0:
+    if not deleted_ids:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No matching benefit associations found for the offer"
@@ -142,6 +134,7 @@ async def remove_benefits_from_offer(db: DbDependency, removal_data: RemoveBenef
     
     # Valider les modifications
     try:
+        affected_users = rebuild_for_offer(db, removal_data.offer_id)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -149,11 +142,13 @@ async def remove_benefits_from_offer(db: DbDependency, removal_data: RemoveBenef
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error removing benefits from offer: {str(e)}"
         )
+    evict_entitlements(*affected_users)
+    offer_catalog.invalidate()
     
     return {
         "message": "Benefits removed from offer successfully",
         "data": {
             "offer_id": removal_data.offer_id,
-            "benefit_ids": removal_data.benefit_ids
+            "benefit_ids": deleted_ids
         }
     }
@@ -1,10 +1,20 @@
-from fastapi import Depends, APIRouter, HTTPException, status
+from fastapi import Depends, APIRouter, HTTPException, status, Request
 from app.models.offer import Offer, OfferCreate, OfferUpdate
 from app.models.offer_benefit import OfferBenefit
 from app.models.benefit import Benefit
 from app.models.user import User
-from app.dependencies import DbDependency, check_superadmin
+from app.dependencies import DbDependency, require
+from app.cache import etag_response
+from app.catalog import offer_catalog
+from app.pagination import Pagination, model_fields, paginate_items
 from typing import Annotated
+from sqlalchemy import delete
+from dotenv import load_dotenv
+import os
+
+load_dotenv(encoding="utf-8")
+
+PUBLIC_CATALOG_MAX_AGE = int(os.getenv("PUBLIC_CATALOG_MAX_AGE", "300"))
 
 router = APIRouter(
     prefix="/offers",
@@ -12,66 +22,59 @@ router = APIRouter(
 )
 
 @router.get('/all', status_code=status.HTTP_200_OK)
-async def get_all_offer(db: DbDependency, current_user: Annotated[User, Depends(check_superadmin)]):
-    """Recupérer toutes les offres."""
+async def get_all_offer(request: Request, db: DbDependency, page: Pagination, current_user: Annotated[User, Depends(require("read", "offer"))]):
+    """Recupérer toutes les offres avec leurs avantages."""
+    try:
+        snapshot = offer_catalog.snapshot(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving offers: {str(e)}"
+        )
+    if page.is_default and (page.limit is None or len(snapshot.offers) <= page.limit):
+        # Première page complète : corps précalculé
+        body, etag = snapshot.all_offers
+        return etag_response(request, body, etag)
+
+    offers, next_cursor = paginate_items(snapshot.offers, [*model_fields(Offer), "benefits"], page)
+    return {
+        "message": "Offers retrieved successfully",
+        "offers": offers,
+        "next_cursor": next_cursor
+    }
+
+@router.get('/public/catalog', status_code=status.HTTP_200_OK)
+async def get_public_catalog(request: Request, db: DbDependency):
+    """Catalogue public des offres pour la page des tarifs (sans authentification)."""
     try:
-        offers = db.query(Offer).all()
-        return {
-            "message": "Offers retrieved successfully",
-            "offers": offers
-        }
+        body, etag = offer_catalog.snapshot(db).public
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving offers: {str(e)}"
         )
+    return etag_response(request, body, etag, max_age=PUBLIC_CATALOG_MAX_AGE, public=True)
     
 @router.get("/{offer_id}", status_code=status.HTTP_200_OK)
-async def get_one_offer(db: DbDependency, offer_id: int, current_user: Annotated[User, Depends(check_superadmin)]):
-    """Recupérer une seule offre."""
+async def get_one_offer(request: Request, db: DbDependency, offer_id: int, current_user: Annotated[User, Depends(require("read", "offer"))]):
+    """Recupérer une seule offre avec ses avantages."""
     try:
-        offre = db.query(Offer).filter(Offer.id == offer_id).first()
-        if not offre:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail='Offre non trouvée'
-            )
-        
-        # Récupérer les bénéfices liés à cette offre
-        avantages = db.query(Benefit.id, Benefit.name, Benefit.description, Benefit.icon).join(
-            OfferBenefit, OfferBenefit.benefit_id == Benefit.id
-        ).filter(
-            OfferBenefit.offer_id == offer_id
-        ).all()
-
-        # Préparer la structure de réponse
-        offre_dict = offre.__dict__.copy()
-        offre_dict.pop('_sa_instance_state', None)
-        # Les tuples retournés par .all() n'ont pas de __dict__, il faut les transformer manuellement
-        avantages_list = []
-        for benef in avantages:
-            avantages_list.append({
-                "id": benef.id,
-                "name": benef.name,
-                "description": benef.description,
-                "icon": benef.icon
-            })
-        offre_dict["benefits"] = avantages_list
-        data = offre_dict
-        return {
-            "message": "Offre récupérée avec succès",
-            "data": data
-        }
-    except HTTPException:
-        raise
+        offre = offer_catalog.snapshot(db).offer_details.get(offer_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving offers: {str(e)}"
         )
+    if not offre:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Offre non trouvée'
+        )
+    body, etag = offre
+    return etag_response(request, body, etag)
 
 @router.post('/create', status_code=status.HTTP_201_CREATED)
-async def create_offer(db: DbDependency, offer_data: OfferCreate, current_user: Annotated[User, Depends(check_superadmin)]):
+async def create_offer(db: DbDependency, offer_data: OfferCreate, current_user: Annotated[User, Depends(require("create", "offer"))]):
     """Crée une nouvelle offre."""
     new_offer = Offer(
         name = offer_data.name,
@@ -89,6 +92,7 @@ async def create_offer(db: DbDependency, offer_data: OfferCreate, current_user:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la création de l'offre: {str(e)}"
         )
+    offer_catalog.invalidate()
     
     return {
         "status": 201,
@@ -97,7 +101,7 @@ async def create_offer(db: DbDependency, offer_data: OfferCreate, current_user:
     }
 
 @router.put('/update/{offer_id}', status_code=status.HTTP_200_OK)
-async def update_offer(db: DbDependency, offer_id: int, offer_data: OfferUpdate, current_user: Annotated[User, Depends(check_superadmin)]):
+async def update_offer(db: DbDependency, offer_id: int, offer_data: OfferUpdate, current_user: Annotated[User, Depends(require("update", "offer"))]):
     """Met à jour une offre existante."""
     offer = db.query(Offer).filter(Offer.id == offer_id).first()
     if not offer:
@@ -118,6 +122,7 @@ async def update_offer(db: DbDependency, offer_id: int, offer_data: OfferUpdate,
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la mise a jour de l'offre: {str(e)}"
         )
+    offer_catalog.invalidate()
     
     return {
         "message": "Offer updated successfully", 
@@ -125,7 +130,7 @@ async def update_offer(db: DbDependency, offer_id: int, offer_data: OfferUpdate,
     }
 
 @router.delete('/delete/{offer_id}', status_code=status.HTTP_200_OK)
-async def delete_offer(db: DbDependency, offer_id: int, current_user: Annotated[User, Depends(check_superadmin)]):
+async def delete_offer(db: DbDependency, offer_id: int, current_user: Annotated[User, Depends(require("delete", "offer"))]):
     """Supprimer une offre existante."""
     offer = db.query(Offer).filter(Offer.id == offer_id).first()
     if not offer:
@@ -134,14 +139,9 @@ async def delete_offer(db: DbDependency, offer_id: int, current_user: Annotated[
             detail="Offer not found"
         )
 
-    
-    offer_benefit = db.query(OfferBenefit).filter(OfferBenefit.offer_id == offer_id).all()
-
     try:
-        # Supprimer l'offre et ses associations
-        for benefit in offer_benefit:
-            db.delete(benefit)
-        db.flush()  # S'assure que les suppressions sont prises en compte avant de supprimer l'offre
+        # Supprimer les associations en une requête, puis l'offre
+        db.execute(delete(OfferBenefit).where(OfferBenefit.offer_id == offer_id))
         db.delete(offer)
         db.commit()
     except Exception as e:
@@ -150,6 +150,7 @@ async def delete_offer(db: DbDependency, offer_id: int, current_user: Annotated[
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la suppression de l'offre: {str(e)}"
         )
+    offer_catalog.invalidate()
     
     return {"message": "Offre deleted successfully"}
 
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from app.models.car_wash import CarWash
+from app.models.offer import Offer
+from app.models.stock_history import StockHistory
+from app.models.stock_managment import StockManagment
+from app.models.subscription import Subscription, Status
+from app.models.user import User, RoleUser
+from app.dependencies import check_stock_access, require
+from app.reports import ReportSpec, report_generator
+from typing import Annotated, Dict, Any, Optional
+from datetime import date
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+router = APIRouter(
+    prefix="/reports",
+    tags=['reports']
+)
+
+
+async def report_response(spec: ReportSpec) -> FileResponse:
+    path = await report_generator.get(spec)
+    return FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=f"{spec.name}-{date.today():%Y%m%d}.xlsx",
+        headers={"Cache-Control": "private, no-store"}
+    )
+
+
+@router.get('/stations.xlsx', status_code=status.HTTP_200_OK)
+async def get_stations_report(current_user: Annotated[Dict[str, Any], Depends(require("report", "car_wash"))]):
+    """Rapport des lavages et de leurs propriétaires."""
+    query = (
+        select(CarWash.id, CarWash.name, CarWash.city, CarWash.country, CarWash.address, CarWash.latitude, CarWash.longitude, User.username, User.email)
+        .join(User, User.id == CarWash.user_id)
+    )
+    return await report_response(ReportSpec(
+        name="lavages",
+        sheet="Lavages",
+        headers=["ID", "Nom", "Ville", "Pays", "Adresse", "Latitude", "Longitude", "Propriétaire", "Email du propriétaire"],
+        query=query,
+        key=CarWash.id,
+        params={}
+    ))
+
+
+@router.get('/users.xlsx', status_code=status.HTTP_200_OK)
+async def get_users_report(current_user: Annotated[Dict[str, Any], Depends(require("report", "user"))], role: Optional[RoleUser] = Query(default=None)):
+    """Rapport des utilisateurs, éventuellement filtré par rôle."""
+    query = select(User.id, User.username, User.email, User.firstname, User.lastname, User.phone, User.role, User.is_active, User.is_verified)
+    if role is not None:
+        query = query.where(User.role == role)
+    return await report_response(ReportSpec(
+        name="utilisateurs",
+        sheet="Utilisateurs",
+        headers=["ID", "Nom d'utilisateur", "Email", "Prénom", "Nom", "Téléphone", "Rôle", "Actif", "Vérifié"],
+        query=query,
+        key=User.id,
+        params={"role": role}
+    ))
+
+
+@router.get('/subscriptions.xlsx', status_code=status.HTTP_200_OK)
+async def get_subscriptions_report(current_user: Annotated[Dict[str, Any], Depends(require("report", "subscription"))], subscription_status: Optional[Status] = Query(default=None, alias="status")):
+    """Rapport des abonnements, éventuellement filtré par statut."""
+    query = (
+        select(Subscription.id, User.username, User.email, Offer.name, Subscription.status, Subscription.start_date, Subscription.end_date)
+        .join(User, User.id == Subscription.user_id)
+        .join(Offer, Offer.id == Subscription.offer_id)
+    )
+    if subscription_status is not None:
+        query = query.where(Subscription.status == subscription_status)
+    return await report_response(ReportSpec(
+        name="abonnements",
+        sheet="Abonnements",
+        headers=["ID", "Utilisateur", "Email", "Offre", "Statut", "Début", "Fin"],
+        query=query,
+        key=Subscription.id,
+        params={"status": subscription_status}
+    ))
+
+
+@router.get('/stations/{wash_id}/stock-histories.xlsx', status_code=status.HTTP_200_OK)
+async def get_stock_histories_report(wash_id: int, current_user: Annotated[Dict[str, Any], Depends(check_stock_access)]):
+    """Rapport de l'historique des stocks d'un lavage."""
+    query = (
+        select(StockHistory.id, StockManagment.name, StockHistory.name, StockHistory.operation, StockHistory.operator_name, StockHistory.quantity, StockHistory.last_updated)
+        .join(StockManagment, StockManagment.id == StockHistory.stock_id)
+        .where(StockManagment.station_id == wash_id)
+    )
+    return await report_response(ReportSpec(
+        name=f"historique-stocks-{wash_id}",
+        sheet="Historique des stocks",
+        headers=["ID", "Stock", "Libellé", "Opération", "Opérateur", "Quantité", "Date"],
+        query=query,
+        key=StockHistory.id,
+        params={"wash_id": wash_id}
+    ))
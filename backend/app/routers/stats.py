@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy import select, func, and_, or_, case
+from sqlalchemy.orm import Session
+from app.models.user import User, RoleUser
+from app.models.car_wash import CarWash
+from app.models.subscription import Subscription, Status
+from app.models.manager_quota import ManagerQuota
+from app.models.wash_record import WashRecord
+from app.dependencies import DbDependency, require
+from app.cache import cached, response_cache, single_flight
+from typing import Annotated, Dict, Any
+from datetime import timedelta
+from dotenv import load_dotenv
+import os
+
+load_dotenv(encoding="utf-8")
+
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "30"))
+EXPIRING_WITHIN_DAYS = int(os.getenv("STATS_EXPIRING_WITHIN_DAYS", "7"))
+
+router = APIRouter(
+    prefix="/stats",
+    tags=['stats']
+)
+
+
+def compute_overview(db: Session) -> Dict[str, Any]:
+    """Calcule tous les indicateurs du tableau de bord en une seule requête SQL (CTE)."""
+    now = func.now()
+    is_active = and_(
+        Subscription.status == Status.ACTIVE,
+        or_(Subscription.end_date.is_(None), Subscription.end_date >= now)
+    )
+
+    users = select(
+        func.count().filter(User.role == RoleUser.station_owner).label("owners"),
+        func.count().filter(User.role == RoleUser.system_manager).label("managers"),
+    ).cte("users_totals")
+
+    stations = select(func.count(CarWash.id).label("stations")).cte("stations_totals")
+
+    subscriptions = select(
+        func.count().filter(is_active).label("active"),
+        func.count().filter(
+            is_active,
+            Subscription.end_date < now + timedelta(days=EXPIRING_WITHIN_DAYS)
+        ).label("expiring"),
+    ).cte("subscriptions_totals")
+
+    # Progression de chaque manager sur la période de son quota
+    per_manager = (
+        select(
+            ManagerQuota.id.label("quota_id"),
+            ManagerQuota.quota.label("quota"),
+            ManagerQuota.remuneration.label("remuneration"),
+            func.count(WashRecord.id).label("done"),
+        )
+        .select_from(ManagerQuota)
+        .outerjoin(WashRecord, and_(
+            WashRecord.manager_id == ManagerQuota.manager_id,
+            WashRecord.wash_date >= ManagerQuota.period_start,
+            WashRecord.wash_date <= ManagerQuota.period_end,
+        ))
+        .group_by(ManagerQuota.id, ManagerQuota.quota, ManagerQuota.remuneration)
+        .cte("quota_per_manager")
+    )
+
+    quotas = select(
+        func.coalesce(func.sum(per_manager.c.quota), 0).label("target"),
+        func.coalesce(func.sum(per_manager.c.done), 0).label("done"),
+        func.coalesce(func.sum(case(
+            (per_manager.c.quota > 0, per_manager.c.done * func.coalesce(per_manager.c.remuneration, 0) / per_manager.c.quota),
+            else_=0,
+        )), 0).label("remuneration_due"),
+    ).cte("quota_totals")
+
+    row = db.execute(select(
+        select(users.c.owners).scalar_subquery().label("owners"),
+        select(users.c.managers).scalar_subquery().label("managers"),
+        select(stations.c.stations).scalar_subquery().label("stations"),
+        select(subscriptions.c.active).scalar_subquery().label("active_subscriptions"),
+        select(subscriptions.c.expiring).scalar_subquery().label("expiring_subscriptions"),
+        select(quotas.c.target).scalar_subquery().label("quota_target"),
+        select(quotas.c.done).scalar_subquery().label("quota_done"),
+        select(quotas.c.remuneration_due).scalar_subquery().label("remuneration_due"),
+    )).one()
+
+    quota_target = int(row.quota_target)
+    quota_done = int(row.quota_done)
+    return {
+        "owners": row.owners,
+        "managers": row.managers,
+        "stations": row.stations,
+        "subscriptions": {
+            "active": row.active_subscriptions,
+            "expiring": row.expiring_subscriptions,
+            "expiring_within_days": EXPIRING_WITHIN_DAYS,
+        },
+        "quotas": {
+            "target": quota_target,
+            "done": quota_done,
+            "remaining": max(quota_target - quota_done, 0),
+            "progress": round(quota_done / quota_target, 4) if quota_target else 0,
+            "remuneration_due": float(row.remuneration_due),
+        },
+    }
+
+
+@router.get('/overview', status_code=status.HTTP_200_OK)
+@cached(ttl=STATS_CACHE_TTL, scope="role")
+async def get_overview(db: DbDependency, current_user: Annotated[Dict[str, Any], Depends(require("read", "stats"))]):
+    """Récupère les totaux du tableau de bord super admin."""
+    return {
+        "message": "Statistiques récupérées avec succès",
+        "data": compute_overview(db)
+    }
+
+@router.get('/cache', status_code=status.HTTP_200_OK)
+async def get_cache_metrics(current_user: Annotated[Dict[str, Any], Depends(require("read", "stats"))]):
+    """Succès et échecs du cache de réponses et requêtes regroupées, par route (worker courant)."""
+    return {
+        "message": "Métriques du cache récupérées avec succès",
+        "data": {
+            "responses": response_cache.metrics.snapshot(),
+            "coalescing": single_flight.metrics.snapshot()
+        }
+    }
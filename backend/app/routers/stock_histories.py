@@ -1,13 +1,15 @@
 from fastapi import Depends, APIRouter, HTTPException, status
 from app.models.car_wash import CarWash, CarWashCreate, CarWashUpdate
 from app.models.car_wash_employee import CarWashEmployee
-from app.models.stock_history import StockHistory
+from app.models.stock_history import StockHistory, StockHistoryList
 from app.models.user import User, UserCreate
-from app.dependencies import DbDependency, bcrypt_context, create_access_token, check_superadmin, check_advantage, get_advantage_checker, get_current_user
+from app.dependencies import DbDependency, bcrypt_context, create_access_token, check_superadmin, check_advantage, get_advantage_checker, get_current_user, require
 from typing import Annotated, Dict, Any, List
 from copy import deepcopy
 from pydantic import BaseModel
 from datetime import timedelta
+from app.pagination import Pagination, paginate
+from app.serialization import json_response
 
 router = APIRouter(
     prefix="/stock_histories",
@@ -15,16 +17,13 @@ router = APIRouter(
 )
 
 @router.get('/{stock_id}', status_code=status.HTTP_200_OK)
-async def get_all_stock_histories(stock_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def get_all_stock_histories(stock_id: int, db: DbDependency, page: Pagination, current_user: Annotated[User, Depends(require("list", "stock_history", "Vous n'êtes pas autorisé à voir tous les historiques de stock"))]):
     """Voir tous les historiques de stock de l'utilisateur connecté."""
 
-    if current_user['role'] != 'station_owner':
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vous n'êtes pas autorisé à voir tous les historiques de stock"
-        )
-    histories = db.query(StockHistory).filter(StockHistory.stock_id == stock_id).all()
-    return {
+    histories, next_cursor = paginate(db.query(StockHistory).filter(StockHistory.stock_id == stock_id), StockHistory, page)
+    payload = {
         "message": "Historiques de stock récupérés avec succès",
-        "data": histories
-    }
\ No newline at end of file
+        "data": histories,
+        "next_cursor": next_cursor
+    }
+    return json_response(payload if page.fields else StockHistoryList(**payload))
\ No newline at end of file
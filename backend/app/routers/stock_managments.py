@@ -6,12 +6,15 @@ from app.models.wash_record import WashRecord
 from app.models.subscription import Subscription
 from app.models.offer import Offer
 from app.models.car_wash import CarWash
-from app.models.stock_managment import StockManagment, StockManagmentCreate, StockManagmentUpdate, StockManagmentQuantityUpdate
+from app.models.stock_managment import StockManagment, StockManagmentCreate, StockManagmentUpdate, StockManagmentQuantityUpdate, StockManagmentList
 from app.models.stock_history import StockHistory
 from datetime import date
 from app.dependencies import DbDependency, bcrypt_context, check_manager, check_stock_access, get_current_user
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select as sa_select
+from app.cache import cached, invalidate
+from app.versioning import collection_version, conditional_get
+from app.pagination import Pagination, paginate
 import logging
 
 router = APIRouter(
@@ -20,12 +23,15 @@ router = APIRouter(
 )
 
 @router.get("/{wash_id}/stocks")
-def get_stocks(wash_id: int, db: DbDependency, current_user: Dict[str, Any] = Depends(check_stock_access)):
-    stocks = db.query(StockManagment).filter(StockManagment.station_id == wash_id).all()
-    return {
+@cached(tags=lambda wash_id, **_: [f"stocks:{wash_id}"], scope="public")
+def get_stocks(wash_id: int, db: DbDependency, page: Pagination, current_user: Dict[str, Any] = Depends(check_stock_access), version=conditional_get("stocks", collection_version(StockManagment, StockManagment.station_id, "wash_id"))):
+    stocks, next_cursor = paginate(db.query(StockManagment).filter(StockManagment.station_id == wash_id), StockManagment, page)
+    payload = {
         "message": "Stocks récupérés avec succès",
-        "stocks": stocks
+        "stocks": stocks,
+        "next_cursor": next_cursor
     }
+    return payload if page.fields else StockManagmentList(**payload)
 
 @router.post("/{wash_id}/stocks/create", status_code=status.HTTP_201_CREATED)
 def create_stock(wash_id: int, stock_data: StockManagmentCreate, db: DbDependency, current_user: Dict[str, Any] = Depends(check_stock_access)):
@@ -47,6 +53,7 @@ def create_stock(wash_id: int, stock_data: StockManagmentCreate, db: DbDependenc
         db.rollback()
         logging.error(f"Erreur d'intégrité lors de l'ajout du stock : {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erreur lors de l'ajout du stock")
+    invalidate(f"stocks:{wash_id}")
     
     return {
         "message": "Stock ajouté avec succès",
@@ -75,6 +82,7 @@ def update_stock(stock_id: int, stock_data: StockManagmentUpdate, db: DbDependen
         db.rollback()
         logging.error(f"Erreur d'intégrité lors de la mise à jour du stock : {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erreur lors de la mise à jour du stock")
+    invalidate(f"stocks:{stock.station_id}")
     
     return {
         "message": "Stock mis à jour avec succès",
@@ -111,6 +119,7 @@ def add_stock(stock_id: int, stock_data: StockManagmentQuantityUpdate, db: DbDep
         db.rollback()
         logging.error(f"Erreur d'intégrité lors de la mise à jour du stock : {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erreur lors de la mise à jour du stock")
+    invalidate(f"stocks:{stock.station_id}")
     
     return {
         "message": "Stock mis à jour avec succès",
@@ -147,6 +156,7 @@ def remove_stock(stock_id: int, stock_data: StockManagmentQuantityUpdate, db: Db
         db.rollback()
         logging.error(f"Erreur d'intégrité lors de la mise à jour du stock : {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erreur lors de la mise à jour du stock")
+    invalidate(f"stocks:{stock.station_id}")
     
     return {
         "message": "Stock mis à jour avec succès",
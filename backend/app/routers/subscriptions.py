@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 from app.models.subscription import Subscription, SubscriptionCreate, SubscriptionUpdate, Status
 from app.models.offer import Offer
 from app.models.user import User, RoleUser
-from app.dependencies import DbDependency, check_subscription_status, check_advantage, get_advantage_checker, get_current_user
+from app.dependencies import DbDependency, check_subscription_status, check_advantage, get_advantage_checker, get_current_user, evict_entitlements, require
+from app.permissions import rebuild_for_users
+from app.cache import invalidate
 from typing import Annotated
 
 router = APIRouter(
@@ -31,14 +33,18 @@ async def get_subscription_status(db: DbDependency, current_user: Annotated[User
 @router.post('/renew', status_code=status.HTTP_200_OK)
 async def renew_subscription(db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
     """Renouvelle l'abonnement existant de l'utilisateur."""
-    subscription = db.query(Subscription).filter(Subscription.user_id == current_user['id'], Subscription.status == Status.ACTIVE).first()
+    # Un abonnement expiré a été passé à INACTIVE par le balayeur : on reprend le plus récent
+    subscription = db.query(Subscription).filter(
+        Subscription.user_id == current_user['id'],
+        Subscription.status.in_([Status.ACTIVE, Status.INACTIVE])
+    ).order_by(Subscription.end_date.desc().nulls_last()).first()
     if not subscription:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Aucun abonnement actif trouvé"
         )
     
-    if subscription.end_date >= datetime.now():
+    if subscription.status == Status.ACTIVE and (subscription.end_date is None or subscription.end_date >= datetime.now()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="L'abonnement est encore actif"
@@ -48,6 +54,7 @@ async def renew_subscription(db: DbDependency, current_user: Annotated[User, Dep
     subscription.end_date = datetime.now() + timedelta(days=30)
     subscription.status = Status.ACTIVE
     try:
+        rebuild_for_users(db, [current_user['id']])
         db.commit()
         db.refresh(subscription)
     except Exception as e:
@@ -56,6 +63,8 @@ async def renew_subscription(db: DbDependency, current_user: Annotated[User, Dep
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la création de l'abonnement: {str(e)}"
         )
+    evict_entitlements(current_user['id'])
+    invalidate(f"owner:{current_user['id']}")
     
     return {
         "message": "Abonnement rénouveler avec succès",
@@ -63,14 +72,8 @@ async def renew_subscription(db: DbDependency, current_user: Annotated[User, Dep
     }
 
 @router.post('/subscribe', status_code=status.HTTP_201_CREATED)
-async def create_subscription(db: DbDependency, subscription_data: SubscriptionCreate, current_user: Annotated[User, Depends(get_current_user)]):
+async def create_subscription(db: DbDependency, subscription_data: SubscriptionCreate, current_user: Annotated[User, Depends(require("create", "subscription", "Seuls les propriétaire de lavage peuvent s'abonner à une offre"))]):
     """Créer un abonnement en liant un utilisateur a une offre."""
-     # Vérifier que l'utilisateur est un propriétaire de lavage
-    if current_user['role'] != RoleUser.station_owner:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Seuls les propriétaire de lavage peuvent s'abonner à une offre"
-        )
     
     # Vérifier si l'utilisateur a déjà un abonnement actif
     existing_subscription = db.query(Subscription).filter(
@@ -102,6 +105,7 @@ async def create_subscription(db: DbDependency, subscription_data: SubscriptionC
 
     try:
         db.add(new_subscription)
+        rebuild_for_users(db, [current_user['id']])
         db.commit()
         db.refresh(new_subscription)
     except Exception as e:
@@ -110,6 +114,8 @@ async def create_subscription(db: DbDependency, subscription_data: SubscriptionC
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la création de l'abonnement: {str(e)}"
         )
+    evict_entitlements(current_user['id'])
+    invalidate(f"owner:{current_user['id']}")
     
     return {
         "message": "Abonnement créé avec succès",
@@ -1,15 +1,20 @@
 from sqlalchemy.future import select
 from typing import Annotated, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.models.user import RoleUser, User, UserCreate, UserUpdate
-from app.models.employee import RoleEmployee, Employee, EmployeeCreate, EmployeeUpdate
+from app.models.user import RoleUser, User, UserCreate, UserUpdate, UserList
+from app.models.employee import RoleEmployee, Employee, EmployeeCreate, EmployeeUpdate, EmployeeList
 from app.models.manager_quota import ManagerQuota
 from app.models.wash_record import WashRecord
 from app.models.car_wash import CarWash
 from app.models.subscription import Subscription
 from datetime import date
-from app.dependencies import DbDependency, bcrypt_context, check_manager, check_superadmin, get_current_user
+from app.dependencies import DbDependency, UnitOfWork, bcrypt_context, check_manager, require, get_current_user
 from sqlalchemy.exc import IntegrityError
+from app.cache import cached, coalesce, invalidate
+from app.versioning import conditional_get, entity_version, touch
+from app.pagination import Pagination, paginate
+from app.batch import BatchIds, keyed, unique_ids
+from app.identities import identity_conflict
 import logging
 
 # Configurer les logs
@@ -22,39 +27,39 @@ router = APIRouter(
 )
 
 @router.get("/all", status_code=status.HTTP_200_OK)
-async def get_all_users(db: DbDependency, current_user: Dict[str, Any] = Depends(get_current_user)):
+@coalesce()
+def get_all_users(db: DbDependency, page: Pagination, current_user: Dict[str, Any] = Depends(require("read", "user"))):
     """Récupère tous les utilisateurs."""
     logger.info("Récupération de tous les utilisateurs")
+    envelope = UserList
     if current_user['role'] == RoleUser.super_admin:
-        users = db.query(User).filter(User.id != current_user['id']).all()
+        users, next_cursor = paginate(db.query(User).filter(User.id != current_user['id']), User, page)
     elif current_user['role'] == RoleUser.system_manager:
-        wash_records = db.query(WashRecord).filter(WashRecord.manager_id == current_user["id"]).all()
-        
-        users = []
-        for wash_record in wash_records: 
-            user = db.query(User).filter(
-                User.id == wash_record.wash_id, 
-                User.role == RoleUser.station_owner
-            ).first()
-            if user:
-                users.append(user)
-    elif current_user['role'] == RoleUser.station_owner:
-        users = db.query(Employee).filter(
-            Employee.owner_id == current_user['id']
-        ).all()
+        # Propriétaires des lavages enregistrés par le manager
+        owner_ids = db.query(WashRecord.wash_id).filter(WashRecord.manager_id == current_user["id"])
+        users, next_cursor = paginate(
+            db.query(User).filter(User.id.in_(owner_ids.scalar_subquery()), User.role == RoleUser.station_owner),
+            User,
+            page
+        )
     else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'êtes pas autorisé a effectué cette action"
+        # Propriétaire de lavage : ses employés
+        envelope = EmployeeList
+        users, next_cursor = paginate(
+            db.query(Employee).filter(Employee.owner_id == current_user['id']),
+            Employee,
+            page
         )
     
-    return {
+    payload = {
         "message": "Liste des utilisateurs récupérée avec succès",
-        "users": users
+        "users": users,
+        "next_cursor": next_cursor
     }
+    return payload if page.fields else envelope(**payload)
 
 @router.post('/status', status_code=status.HTTP_200_OK)
-async def update_user_status(user_id: int, is_active: bool, db: DbDependency, current_user: Dict[str, Any] = Depends(check_superadmin)):
+async def update_user_status(user_id: int, is_active: bool, db: DbDependency, current_user: Dict[str, Any] = Depends(require("manage", "user"))):
     """Met à jour le statut d'un utilisateur (actif/inactif)."""
     logger.info(f"Mise à jour du statut de l'utilisateur ID={user_id} à {'actif' if is_active else 'inactif'}")
     user = db.query(User).filter(User.id == user_id).first()
@@ -66,13 +71,14 @@ async def update_user_status(user_id: int, is_active: bool, db: DbDependency, cu
     user.is_active = is_active
     db.commit()
     db.refresh(user)
+    invalidate(f"owner:{user.id}")
     return {
         "message": "Statut de l'utilisateur mis à jour avec succès",
         "user": user
     }
 
 @router.post('/role', status_code=status.HTTP_200_OK)
-async def update_user_role(user_id: int, role: RoleUser, db: DbDependency, current_user: Annotated[User, Depends(check_superadmin)]):
+async def update_user_role(user_id: int, role: RoleUser, db: DbDependency, current_user: Annotated[User, Depends(require("manage", "user"))]):
     """Met à jour le rôle d'un utilisateur."""
     logger.info(f"Mise à jour du rôle de l'utilisateur ID={user_id} à {role}")
     user = db.query(User).filter(User.id == user_id).first()
@@ -84,13 +90,15 @@ async def update_user_role(user_id: int, role: RoleUser, db: DbDependency, curre
     user.role = role
     db.commit()
     db.refresh(user)
+    invalidate(f"owner:{user.id}")
     return {
         "message": "Rôle de l'utilisateur mis à jour avec succès",
         "user": user
     }
 
 @router.get("/show/{user_id}", status_code=status.HTTP_200_OK)
-async def show_user_detail(user_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+@cached(tags=lambda user_id, **_: [f"owner:{user_id}"], scope="public")
+async def show_user_detail(user_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)], version=conditional_get("user", entity_version(User, "user_id"))):
     """Voir les détails d'un utilisateur"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -109,29 +117,29 @@ async def show_user_detail(user_id: int, db: DbDependency, current_user: Annotat
     }
    
 
+@router.get("/batch", status_code=status.HTTP_200_OK)
+async def show_users_batch(ids: BatchIds, db: DbDependency, current_user: Dict[str, Any] = Depends(require("read", "user"))):
+    """Voir les détails de plusieurs utilisateurs et leurs lavages, indexés par ID."""
+    ids = unique_ids(ids)
+    query = db.query(User).filter(User.id.in_(ids))
+    if current_user['role'] == RoleUser.system_manager:
+        # Propriétaires des lavages enregistrés par le manager
+        owner_ids = db.query(WashRecord.wash_id).filter(WashRecord.manager_id == current_user["id"])
+        query = query.filter(User.id.in_(owner_ids.scalar_subquery()), User.role == RoleUser.station_owner)
+    elif current_user['role'] == RoleUser.station_owner:
+        query = query.filter(User.id == current_user['id'])
+
+    users = {user.id: {"user": user, "car_wash": []} for user in query.all()}
+    if users:
+        for car_wash in db.query(CarWash).filter(CarWash.user_id.in_(list(users))).order_by(CarWash.id):
+            users[car_wash.user_id]["car_wash"].append(car_wash)
+    return keyed("Informations des utilisateurs récupérées avec succès", ids, users)
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def create_user(user_data: UserCreate, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def create_user(user_data: UserCreate, db: UnitOfWork, current_user: Annotated[User, Depends(require("create", "user", "Vous n'avez pas les droits pour créer un utilisateur."))]):
     logger.info(f"Tentative de création d'utilisateur : {user_data.username}, {user_data.email}")
 
-    # Vérifie si l'utilisateur actuel a les droits nécessaires
-    if current_user['role'] not in [RoleUser.super_admin, RoleUser.system_manager, RoleUser.station_owner]:
-        logger.warning(f"Utilisateur {current_user['username']} n'a pas les droits pour créer un utilisateur.")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'avez pas les droits pour créer un utilisateur."
-        )
-    existing_user = db.query(User).where(((User.username == user_data.username) | (User.email == user_data.email))).first()
-    if existing_user:
-        if existing_user.username == user_data.username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Nom d'utilisateur déjà pris"
-            )
-        if existing_user.email == user_data.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email déjà utilisé"
-            )
     # Vérifie si le champ `role` est envoyé
     if user_data.role:
         if current_user['role'] == RoleUser.super_admin:
@@ -157,11 +165,11 @@ async def create_user(user_data: UserCreate, db: DbDependency, current_user: Ann
         role=role_to_assign  # Rôle par défaut
     )
 
-    # Ajouter et persister dans la base de données
+    # Ajouter dans la transaction de la requête (validée à la sortie de la route) ;
+    # les doublons de nom d'utilisateur ou d'email sont refusés par la base au flush
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)  # Rafraîchir pour obtenir les valeurs générées (par exemple, id)
+        db.flush()  # Obtenir l'id généré sans valider
         if current_user['role'] == RoleUser.system_manager:
             wash_record = WashRecord(
                 manager_id=current_user['id'],
@@ -169,12 +177,14 @@ async def create_user(user_data: UserCreate, db: DbDependency, current_user: Ann
                 wash_id=new_user.id
             )
             db.add(wash_record)
-            db.commit()
+            db.flush()
         
         logger.info(f"Utilisateur créé : {new_user.username}, ID={new_user.id}")
+    except IntegrityError as e:
+        # Annulation laissée à `UnitOfWork`, qui reçoit l'exception
+        raise identity_conflict(e, "Erreur lors de la création de l'utilisateur")
     except Exception as e:
         logger.error(f"Erreur lors de la création de l'utilisateur : {str(e)}")
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erreur lors de la création de l'utilisateur"
@@ -215,16 +225,27 @@ async def edit_user(user_id: int, user_data: UserUpdate, db: DbDependency, curre
     user.age = user_data.age if user_data.age else user.age
     user.hashed_password = bcrypt_context.hash(user_data.password) if user_data.password else user.hashed_password
     user.role = user_data.role if user_data.role else user.role
+    if isinstance(user, Employee):
+        station_ids = [station.id for station in user.assigned_station]
+        # Les lavages affichent leurs employés : leur ETag doit changer aussi
+        touch(db, CarWash, station_ids)
+        tags = [f"car_wash:{station_id}" for station_id in station_ids]
+    else:
+        tags = [f"owner:{user.id}"]
 
     try:
         db.commit()
         db.refresh(user)
+    except IntegrityError as e:
+        db.rollback()
+        raise identity_conflict(e, "Erreur lors de la mise a jour de l'utilisateur")
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la mise a jour de l'offre: {str(e)}"
         )
+    invalidate(*tags)
     
     return {
         "message": "Utilisateur modifié avec succès",
@@ -238,19 +259,6 @@ async def create_user_admin(
     db: DbDependency,
 ):
     """Créer un utilisateur super admin."""
-    # Vérification email ou username existants
-    existing_user = db.execute(
-        select(User).where(
-            (User.email == user_data.email) | (User.username == user_data.username)
-        )
-    ).scalar_one_or_none()
-
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Un utilisateur avec cet email ou ce nom d'utilisateur existe déjà."
-        )
-
     # Création du nouvel utilisateur
     new_user = User(
         username=user_data.username,
@@ -268,6 +276,14 @@ async def create_user_admin(
         db.commit()
         db.refresh(new_user)
         return new_user
+    except IntegrityError as e:
+        # Email ou nom d'utilisateur déjà pris, refusé par la base
+        db.rollback()
+        raise identity_conflict(
+            e,
+            "Erreur lors de la création de l'utilisateur admin",
+            duplicate_detail="Un utilisateur avec cet email ou ce nom d'utilisateur existe déjà."
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -277,30 +293,34 @@ async def create_user_admin(
 
 
 @router.delete("/delete/{user_id}", status_code=status.HTTP_200_OK)
-async def delete_user(user_id: int, db: DbDependency, current_user: Annotated[User, Depends(get_current_user)]):
+async def delete_user(user_id: int, db: DbDependency, current_user: Annotated[User, Depends(require("delete", "user", "Vous n'avez pas les droits pour supprimer un utilisateur."))]):
     """Supprime un utilisateur."""
     logger.info(f"Tentative de suppression de l'utilisateur ID={user_id}")
-    if current_user.role == RoleEmployee.car_washer or current_user.role == RoleEmployee.station_client:
-        # Si l'utilisateur est un employee_garage ou client_garage, il n'a pas les droits pour supprimer un utilisateur
-        logger.warning(f"Utilisateur {current_user.username} n'a pas les droits pour supprimer un utilisateur.")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Vous n'avez pas les droits pour supprimer un utilisateur."
-        )
     
-    if current_user['role'] != RoleUser.system_manager:
-        user = db.query(Employee).filter(Employee.id == user_id).first()
-    else:
+    if current_user['role'] == RoleUser.system_manager:
         user = db.query(User).filter(User.id == user_id).first()
+    else:
+        query = db.query(Employee).filter(Employee.id == user_id)
+        if current_user['role'] == RoleUser.station_owner:
+            # Un propriétaire ne supprime que ses propres employés
+            query = query.filter(Employee.owner_id == current_user['id'])
+        user = query.first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Utilisateur non trouvé"
         )
     
-    car_wash = db.query(CarWash).filter(CarWash.user_id == user.id).all()
-    if car_wash:
-        db.delete(car_wash)
+    if isinstance(user, User):
+        tags = [f"owner:{user.id}"]
+        for car_wash in db.query(CarWash).filter(CarWash.user_id == user.id).all():
+            tags.append(f"car_wash:{car_wash.id}")
+            db.delete(car_wash)
+    else:
+        station_ids = [station.id for station in user.assigned_station]
+        # Les liens employé-lavage sont supprimés hors `PARENTS` : versionner les lavages ici
+        touch(db, CarWash, station_ids)
+        tags = [f"car_wash:{station_id}" for station_id in station_ids]
     
     try:
         db.delete(user)
@@ -312,6 +332,7 @@ async def delete_user(user_id: int, db: DbDependency, current_user: Annotated[Us
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la suppression de l'utilisateur: {str(e)}"
         )
+    invalidate(*tags)
     
     return {
         "message": "Utilisateur supprimé avec succès"
@@ -0,0 +1,42 @@
+"""Sérialisation JSON rapide des réponses.
+
+- Les enveloppes de réponse déclarées (`UserList`, `CarWashList`, ...) sont
+  validées depuis les objets ORM puis sérialisées par pydantic-core, sans passer
+  par `jsonable_encoder`.
+- Les dictionnaires ad hoc sont sérialisés par orjson ; les objets qu'il ne
+  connaît pas (modèles SQLModel, etc.) passent par `model_dump`/`jsonable_encoder`.
+
+`FastJSONResponse` est la classe de réponse par défaut de l'application.
+"""
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(data: Any) -> bytes:
+    """Sérialise une réponse en JSON compact (UTF-8)."""
+    if isinstance(data, BaseModel):
+        return data.__pydantic_serializer__.to_json(data)
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(data: Any, status_code: int = 200) -> FastJSONResponse:
+    """Réponse déjà sérialisée, pour une route qui renvoie une enveloppe déclarée.
+
+    FastAPI ne repasse pas le contenu d'une `Response` dans `jsonable_encoder`.
+    """
+    return FastJSONResponse(content=data, status_code=status_code)
@@ -0,0 +1,74 @@
+"""Balayeur périodique qui fait passer les abonnements expirés à INACTIVE."""
+import asyncio
+import logging
+from typing import List
+
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.dependencies import evict_entitlements
+from app.models.subscription import Subscription, Status
+from app.permissions import rebuild_for_users
+from app.models.user import User
+from app.cache import invalidate
+from app.versioning import touch
+
+logger = logging.getLogger(__name__)
+
+# Clé du verrou consultatif Postgres partagé par tous les workers
+SWEEPER_LOCK_KEY = 0x53554253  # "SUBS"
+
+
+def expire_subscriptions(db: Session) -> List[int]:
+    """Expire en une seule requête UPDATE les abonnements dont la date de fin est passée.
+
+    Les permissions matérialisées des utilisateurs concernés sont reconstruites dans
+    la même transaction. Un verrou consultatif transactionnel garantit qu'un seul
+    worker balaie à la fois ; les autres repartent immédiatement sans rien faire.
+    Renvoie les utilisateurs concernés.
+    """
+    locked = db.execute(select(func.pg_try_advisory_xact_lock(SWEEPER_LOCK_KEY))).scalar()
+    if not locked:
+        db.rollback()
+        return []
+
+    user_ids = db.execute(
+        update(Subscription)
+        .where(
+            Subscription.status == Status.ACTIVE,
+            Subscription.end_date.is_not(None),
+            Subscription.end_date < func.now()
+        )
+        .values(status=Status.INACTIVE)
+        .returning(Subscription.user_id)
+    ).scalars().all()
+    expired = rebuild_for_users(db, user_ids)
+    touch(db, User, expired)
+    db.commit()
+
+    evict_entitlements(*expired)
+    invalidate(*[f"owner:{user_id}" for user_id in expired])
+    return expired
+
+
+def sweep_once() -> List[int]:
+    db = SessionLocal()
+    try:
+        expired = expire_subscriptions(db)
+        if expired:
+            logger.info(f"{len(expired)} abonnement(s) expiré(s) : utilisateurs {expired}")
+        return expired
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erreur lors du balayage des abonnements : {str(e)}")
+        return []
+    finally:
+        db.close()
+
+
+async def run_sweeper(interval: float):
+    """Boucle de fond : balaie toutes les `interval` secondes sans bloquer la boucle d'événements."""
+    while True:
+        await asyncio.to_thread(sweep_once)
+        await asyncio.sleep(interval)
@@ -0,0 +1,167 @@
+"""Versions de lignes et requêtes GET conditionnelles.
+
+Les modèles versionnés (`CarWash`, `User`, `Benefit`, `StockManagment`) portent
+une colonne `version`, incrémentée à chaque modification, et `updated_at`.
+Une modification d'un enfant affiché dans le détail du parent (affectation
+d'employé, lavage d'un propriétaire, abonnement) incrémente aussi le parent.
+
+`conditional_get(...)` est une dépendance de route : elle lit la version par une
+seule requête légère, répond 304 si `If-None-Match` (ou `If-Modified-Since`)
+correspond, et sinon laisse la route s'exécuter ; `RowVersionMiddleware` pose
+alors `ETag` et `Last-Modified` sur la réponse.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Iterable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import Select, event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.dependencies import DbDependency
+from app.models.benefit import Benefit
+from app.models.car_wash import CarWash
+from app.models.car_wash_employee import CarWashEmployee
+from app.models.stock_managment import StockManagment
+from app.models.subscription import Subscription
+from app.models.user import User
+
+VERSIONED = (CarWash, User, Benefit, StockManagment)
+
+# Enfant -> (parent, colonne de l'enfant désignant le parent)
+PARENTS = {
+    CarWashEmployee: (CarWash, "car_wash_id"),
+    CarWash: (User, "user_id"),
+    Subscription: (User, "user_id"),
+}
+
+_STATE_KEY = "row_version"  # lu aussi par `app.cache.http.etag_response`
+
+
+def touch(db: Session, model, ids: Iterable[int]) -> None:
+    """Incrémente la version des lignes données (modifications faites hors ORM)."""
+    ids = sorted({row_id for row_id in ids if row_id is not None})
+    if not ids:
+        return
+    db.execute(
+        update(model)
+        .where(model.id.in_(ids))
+        .values(version=model.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _bump_versions(session: Session, flush_context, instances) -> None:
+    now = datetime.utcnow()
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED) and session.is_modified(obj, include_collections=False):
+            obj.version = (obj.version or 0) + 1
+            obj.updated_at = now
+
+    parents = {}
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        parent = PARENTS.get(type(obj))
+        if parent is None or (obj in session.dirty and not session.is_modified(obj, include_collections=False)):
+            continue
+        model, column = parent
+        parents.setdefault(model, set()).add(getattr(obj, column))
+    for model, ids in parents.items():
+        touch(session, model, ids)
+
+
+def make_row_etag(name: str, *parts) -> str:
+    return 'W/"' + "-".join([name, *(str(part) for part in parts)]) + '"'
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def conditional_get(name: str, query: Callable[[dict], Select]):
+    """Dépendance de route GET conditionnelle.
+
+    `query` reçoit les paramètres de chemin et renvoie un SELECT d'une ligne
+    `(*version, updated_at)`. La dépendance doit être déclarée après celles
+    d'authentification pour que le 304 ne court-circuite pas les contrôles d'accès.
+    """
+    def dependency(request: Request, db: DbDependency):
+        row: Optional[Tuple] = db.execute(query(request.path_params)).first()
+        if row is None or row[0] is None:
+            return None
+
+        *version, last_modified = row
+        etag = make_row_etag(name, *request.path_params.values(), *version)
+        if request.url.query:
+            # Pages et sélections de champs distinctes : ETags distincts
+            etag = etag[:-1] + "-" + hashlib.sha256(request.url.query.encode()).hexdigest()[:12] + '"'
+
+        headers = {"ETag": etag}
+        if last_modified is not None:
+            headers["Last-Modified"] = _http_date(last_modified)
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        setattr(request.state, _STATE_KEY, headers)
+        return version
+
+    return Depends(dependency)
+
+
+def entity_version(model, param: str):
+    """Version d'une ligne désignée par le paramètre de chemin `param`."""
+    return lambda params: select(model.version, model.updated_at).where(model.id == int(params[param]))
+
+
+def collection_version(model, column, param: str):
+    """Version agrégée des lignes dont `column` vaut le paramètre de chemin `param`.
+
+    Le nombre de lignes et le plus grand id font changer la version à chaque
+    suppression ou insertion, la somme des versions à chaque modification.
+    """
+    return lambda params: select(
+        func.count(),
+        func.coalesce(func.sum(model.version), 0),
+        func.coalesce(func.max(model.id), 0),
+        func.max(model.updated_at),
+    ).where(column == int(params[param]))
+
+
+class RowVersionMiddleware:
+    """Pose `ETag` et `Last-Modified` issus de `conditional_get` sur les réponses 200."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                validators = scope.get("state", {}).get(_STATE_KEY)
+                if validators:
+                    names = {name.lower().encode() for name in validators}
+                    headers = [(key, value) for key, value in message.get("headers", []) if key.lower() not in names]
+                    headers.extend((name.lower().encode(), value.encode()) for name, value in validators.items())
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
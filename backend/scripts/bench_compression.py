@@ -0,0 +1,55 @@
+"""Mesure le temps de transfert de bout en bout de `/user/all` selon l'encodage.
+
+À lancer contre un serveur démarré (uvicorn app.main:app) avec le jeton d'un
+super admin. Pour chaque encodage, le script mesure le temps de réponse local
+et la taille transmise, puis estime la durée sur un lien lent (débit en Mbit/s
+et latence en ms configurables).
+
+Usage : python -m scripts.bench_compression URL JETON [limit] [répétitions] [débit_mbps] [latence_ms]
+Exemple : python -m scripts.bench_compression http://localhost:8000 eyJ... 500 5 2 150
+"""
+import sys
+import time
+
+import httpx
+
+from app.compression import brotli
+
+
+def measure(client: httpx.Client, url: str, headers: dict, encoding: str, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with client.stream("GET", url, headers={**headers, "Accept-Encoding": encoding}) as response:
+            response.raise_for_status()
+            # octets tels que reçus, avant décompression
+            size = sum(len(chunk) for chunk in response.iter_raw())
+        timings.append(time.perf_counter() - started)
+    return min(timings), size
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    base_url, token = sys.argv[1].rstrip("/"), sys.argv[2]
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    repeat = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+    bandwidth = float(sys.argv[5]) if len(sys.argv) > 5 else 2.0
+    latency = float(sys.argv[6]) if len(sys.argv) > 6 else 150.0
+
+    url = f"{base_url}/user/all?limit={limit}"
+    headers = {"Authorization": f"Bearer {token}"}
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    print(f"GET {url} — lien simulé : {bandwidth} Mbit/s, {latency:.0f} ms")
+    with httpx.Client(timeout=60) as client:
+        for encoding in encodings:
+            elapsed, size = measure(client, url, headers, encoding, repeat)
+            transfer = latency / 1000 + size * 8 / (bandwidth * 1_000_000)
+            print(f"{encoding:<9} {size / 1024:9.0f} Ko  local {elapsed * 1000:8.1f} ms  estimé {(elapsed + transfer) * 1000:9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
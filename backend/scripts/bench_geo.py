@@ -0,0 +1,73 @@
+"""Mesure le coût d'une recherche des stations les plus proches.
+
+- avant : distance haversine vers chaque station puis tri (parcours complet) ;
+- après : `GridIndex.nearest`, limité aux cellules de la boîte englobante.
+
+Les stations sont réparties sur quelques agglomérations (Dakar, Abidjan, Paris,
+Montréal) et dispersées sur le globe, antiméridien et hautes latitudes compris.
+Les deux méthodes doivent renvoyer le même résultat.
+
+Usage : python -m scripts.bench_geo [nombre_de_stations] [recherches] [rayon_km]
+"""
+import heapq
+import random
+import sys
+import time
+
+from app.geo import GridIndex, haversine_km
+
+CITIES = [(14.69, -17.44), (5.35, -4.01), (48.85, 2.35), (45.50, -73.57)]
+QUERIES = [*CITIES, (0.0, 179.98), (0.0, -179.98), (78.22, 15.65), (-77.85, 166.67)]
+
+
+def build_points(count: int, rng: random.Random):
+    points = {}
+    for point_id in range(count):
+        if point_id % 4:
+            lat, lng = rng.choice(CITIES)
+            points[point_id] = (lat + rng.gauss(0, 0.15), lng + rng.gauss(0, 0.15))
+        else:
+            points[point_id] = (rng.uniform(-89.9, 89.9), rng.uniform(-180, 180))
+    return points
+
+
+def brute_force(points, lat, lng, radius_km, limit):
+    found = []
+    for point_id, (p_lat, p_lng) in points.items():
+        distance = haversine_km(lat, lng, p_lat, p_lng)
+        if distance <= radius_km:
+            found.append((distance, point_id))
+    return heapq.nsmallest(limit, found)
+
+
+def measure(label: str, search, queries, searches: int):
+    started = time.perf_counter()
+    results = [search(*queries[i % len(queries)]) for i in range(searches)]
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed / searches * 1000:8.3f} ms/recherche")
+    return results
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    radius_km = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+    rng = random.Random(0)
+    points = build_points(count, rng)
+
+    started = time.perf_counter()
+    index = GridIndex()
+    for point_id, (lat, lng) in points.items():
+        index.add(point_id, lat, lng)
+    built = (time.perf_counter() - started) * 1000
+    print(f"{count} stations, {searches} recherches, rayon {radius_km:g} km")
+    print(f"{'construction de la grille':<36} {built:8.1f} ms")
+
+    before = measure("avant (parcours complet)", lambda lat, lng: brute_force(points, lat, lng, radius_km, 20), QUERIES, searches)
+    after = measure("après (grille)", lambda lat, lng: index.nearest(lat, lng, radius_km, 20), QUERIES, searches)
+    if before != after:
+        raise SystemExit("Résultats différents entre le parcours complet et la grille")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Mesure le coût d'une vérification de permission par requête.
+
+- avant : comparaisons successives du rôle avec des listes d'enums, comme dans
+  les anciennes routes (`if current_user['role'] not in [...]`) ;
+- après : `require(action, ressource)`, un `&` sur le masque compilé du rôle.
+
+Avec `--table`, affiche la décision compilée pour chaque rôle x (action, ressource).
+
+Usage : python -m scripts.bench_policy [requêtes] [--table]
+"""
+import sys
+import time
+
+from fastapi import HTTPException, status
+
+from app.dependencies import require
+from app.models.employee import RoleEmployee
+from app.models.user import RoleUser
+from app.policy import permission_table
+
+ROLES = [role.value for role in (*RoleUser, *RoleEmployee)]
+
+
+def adhoc_create_user(current_user):
+    if not current_user['is_active']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Utilisateur inactif")
+    if current_user['role'] not in [RoleUser.super_admin, RoleUser.system_manager, RoleUser.station_owner]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas les droits pour créer un utilisateur.")
+    return current_user
+
+
+def measure(label: str, check, users, requests: int) -> None:
+    started = time.perf_counter()
+    for i in range(requests):
+        try:
+            check(users[i % len(users)])
+        except Exception:
+            pass
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed / requests * 1_000_000:8.3f} µs/requête")
+
+
+def print_table() -> None:
+    for role, action, resource, allowed in permission_table():
+        print(f"{role:<16} {action:<8} {resource:<16} {'oui' if allowed else 'non'}")
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--table" in sys.argv:
+        print_table()
+        return
+    requests = int(args[0]) if args else 500_000
+    users = [{"id": i, "role": ROLES[i % len(ROLES)], "is_active": True} for i in range(len(ROLES))]
+    print(f"{requests} requêtes, {len(ROLES)} rôles")
+
+    measure("avant (listes de rôles)", adhoc_create_user, users, requests)
+    measure("après (masque compilé)", require("create", "user"), users, requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Mesure le temps de sérialisation d'une liste de 10 000 utilisateurs.
+
+- avant : `jsonable_encoder` puis `json.dumps` (chemin par défaut de FastAPI) ;
+- après : enveloppe `UserList` validée depuis les objets ORM puis sérialisée par
+  pydantic-core, et dictionnaire sérialisé par orjson (`app.serialization.dumps`).
+
+Usage : python -m scripts.bench_serialization [nombre_de_lignes] [répétitions]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+import app.main  # noqa: F401  (configure les mappers)
+from app.models.user import RoleUser, User, UserList
+from app.serialization import dumps
+
+
+def build_rows(count: int):
+    now = datetime.utcnow()
+    return [
+        User(
+            id=i,
+            username=f"user{i}",
+            firstname="Prénom",
+            lastname="Nom",
+            email=f"user{i}@example.com",
+            phone="+33600000000",
+            age=30,
+            role=RoleUser.station_owner,
+            hashed_password="x",
+            version=1,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(label: str, func, repeat: int) -> None:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(func())
+        timings.append(time.perf_counter() - started)
+    print(f"{label:<32} {min(timings) * 1000:8.1f} ms (min)  {sum(timings) / repeat * 1000:8.1f} ms (moy)  {size / 1024:8.0f} Ko")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rows = build_rows(count)
+    print(f"{count} lignes, {repeat} répétitions")
+
+    def before():
+        payload = {"message": "ok", "users": rows, "next_cursor": None}
+        return json.dumps(jsonable_encoder(payload)).encode("utf-8")
+
+    def after_model():
+        return dumps(UserList(message="ok", users=rows, next_cursor=None))
+
+    def after_dict():
+        return dumps({"message": "ok", "users": rows, "next_cursor": None})
+
+    measure("avant (jsonable_encoder + json)", before, repeat)
+    measure("après (UserList + pydantic-core)", after_model, repeat)
+    measure("après (dict + orjson)", after_dict, repeat)
+
+
+if __name__ == "__main__":
+    main()
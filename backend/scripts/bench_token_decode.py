@@ -0,0 +1,50 @@
+"""Mesure le coût du décodage du token JWT par requête.
+
+- avant : `jwt.decode` avec vérification de la signature à chaque requête ;
+- après : `decode_access_token`, qui ne vérifie la signature qu'à la première
+  présentation du token puis lit les claims dans le cache.
+
+Usage : python -m scripts.bench_token_decode [requêtes] [tokens_distincts]
+"""
+import sys
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from app.dependencies import create_access_token, decode_access_token, get_access_token, token_cache
+
+
+def build_tokens(count: int):
+    return [
+        create_access_token(
+            SimpleNamespace(
+                email=f"user{i}@example.com", firstname="Prénom", lastname="Nom", phone=None,
+                username=f"user{i}", id=i, role="station_owner", is_active=True
+            ),
+            timedelta(minutes=15)
+        )
+        for i in range(count)
+    ]
+
+
+def measure(label: str, decode, tokens, requests: int) -> None:
+    started = time.perf_counter()
+    for i in range(requests):
+        decode(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed / requests * 1_000_000:8.2f} µs/requête")
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    tokens = build_tokens(distinct)
+    print(f"{requests} requêtes, {distinct} tokens distincts")
+
+    measure("avant (jwt.decode)", get_access_token, tokens, requests)
+    token_cache.clear()
+    measure("après (cache des claims)", decode_access_token, tokens, requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+# Les tests importent `app` depuis backend/, sans serveur PostgreSQL ni bus Redis
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("CACHE_BUS_ENABLED", "0")
+os.environ.setdefault("SUBSCRIPTION_SWEEP_INTERVAL", "0")
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+import app.main  # noqa: F401,E402  (enregistre tous les modèles et leurs relations)
+
+
+@pytest.fixture
+def engine():
+    """Base SQLite en mémoire, liée à `SessionLocal` le temps du test."""
+    from app.cache import response_cache
+    from app.database import SessionLocal, engine as default_engine
+    from app.dependencies import entitlement_cache, login_miss_cache, token_cache
+    from app.revocation import token_versions
+
+    # État mémoire du processus : chaque test repart d'une base vide
+    for cache in (response_cache, entitlement_cache, login_miss_cache, token_cache):
+        cache.clear()
+    token_versions._versions.clear()
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    yield engine
+    SessionLocal.configure(bind=default_engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """Requêtes SQL exécutées pendant le test, dans l'ordre."""
+    executed = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    return executed
+
+
+@pytest.fixture
+def client(engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    from app.dependencies import create_access_token
+
+    def headers(**claims):
+        user = dict(email="test@example.com", firstname=None, lastname=None, phone=None, username="test", id=1, role="super_admin", is_active=True)
+        user.update(claims)
+        return {"Authorization": "Bearer " + create_access_token(SimpleNamespace(**user), timedelta(minutes=5))}
+
+    return headers
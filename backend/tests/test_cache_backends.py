@@ -0,0 +1,93 @@
+"""`RedisBackend` sur un faux client Redis en mémoire."""
+import fnmatch
+
+import pytest
+
+from app.cache import CacheBackend, RedisBackend
+
+
+class FakeRedis:
+    """Sous-ensemble des commandes Redis utilisées par `RedisBackend` (sans expiration)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        return value if isinstance(value, bytes) else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    def expire(self, key, seconds):
+        pass
+
+    def sunion(self, keys):
+        return set().union(*(self.data.get(key, set()) for key in keys))
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        for name, args, kwargs in self.commands:
+            getattr(self.client, name)(*args, **kwargs)
+        self.commands = []
+
+
+@pytest.fixture
+def backend():
+    return RedisBackend(FakeRedis())
+
+
+def test_set_and_get(backend):
+    backend.set("a", b"1", ttl=60, tags=["car_wash:1"])
+    assert backend.get("a") == b"1"
+    assert backend.get("absent") is None
+
+
+def test_invalidate_tags_evicts_only_tagged_entries(backend):
+    backend.set("station", b"1", ttl=60, tags=["car_wash:1"])
+    backend.set("employees", b"2", ttl=60, tags=["car_wash:1", "owner:1"])
+    backend.set("other", b"3", ttl=60, tags=["car_wash:2"])
+
+    assert backend.invalidate_tags(["car_wash:1"]) == 2
+    assert backend.get("station") is None
+    assert backend.get("employees") is None
+    assert backend.get("other") == b"3"
+    assert backend.invalidate_tags(["car_wash:1"]) == 0
+
+
+def test_clear_keeps_other_prefixes(backend):
+    backend.client.set("autre:application", b"x")
+    backend.set("a", b"1", ttl=60, tags=["car_wash:1"])
+    backend.clear()
+    assert backend.get("a") is None
+    assert backend.client.data == {"autre:application": b"x"}
+
+
+def test_backend_must_implement_the_whole_interface():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
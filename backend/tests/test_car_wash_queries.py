@@ -0,0 +1,37 @@
+"""Nombre de requêtes constant pour les routes qui renvoient les employés d'un lavage."""
+import pytest
+
+from app.models.car_wash import CarWash
+from app.models.car_wash_employee import CarWashEmployee
+from app.models.employee import Employee
+from app.models.user import User
+
+
+@pytest.fixture
+def stations(db):
+    """Lavage 1 avec un employé, lavage 2 avec quarante."""
+    db.add(User(id=1, username="owner", email="owner@example.com", role="station_owner", hashed_password="x"))
+    db.add_all([CarWash(id=1, user_id=1, name="Petit"), CarWash(id=2, user_id=1, name="Grand")])
+    db.add_all([
+        Employee(id=i, username=f"employee{i}", email=f"employee{i}@example.com", hashed_password="x", owner_id=1)
+        for i in range(1, 42)
+    ])
+    db.flush()
+    db.add(CarWashEmployee(car_wash_id=1, employee_id=1))
+    db.add_all([CarWashEmployee(car_wash_id=2, employee_id=i) for i in range(2, 42)])
+    db.commit()
+
+
+def count_statements(client, statements, url, headers):
+    statements.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize("path", ["/car-wash/{}", "/car-wash/{}/employee"])
+def test_statement_count_does_not_grow_with_employees(stations, client, statements, auth_headers, path):
+    headers = auth_headers(id=1, role="station_owner")
+    one = count_statements(client, statements, path.format(1), headers)
+    forty = count_statements(client, statements, path.format(2), headers)
+    assert one == forty
@@ -0,0 +1,42 @@
+"""Compression des réponses et validateurs HTTP."""
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.cache import etag_response, make_etag, serialize
+from app.compression import CompressionMiddleware
+
+BODY = serialize({"items": [{"id": i, "name": f"element{i}"} for i in range(200)]})
+ETAG = make_etag(BODY)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(request: Request):
+        return etag_response(request, BODY, ETAG)
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+def test_compressed_response_has_a_weak_etag(client):
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == f"W/{ETAG}"
+    assert response.content == BODY
+
+
+def test_identity_response_keeps_the_strong_etag(client):
+    response = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == ETAG
+
+
+def test_weak_etag_revalidates(client):
+    etag = client.get("/items", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    response = client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+
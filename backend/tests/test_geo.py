@@ -0,0 +1,107 @@
+"""`GridIndex` comparé à un parcours exhaustif."""
+import math
+import random
+
+import pytest
+
+from app.geo import EARTH_RADIUS_KM, GridIndex, bounding_box, haversine_km
+
+
+def brute_force(points, lat, lng, radius_km, limit):
+    found = [(haversine_km(lat, lng, p_lat, p_lng), point_id) for point_id, (p_lat, p_lng) in points.items()]
+    return sorted(item for item in found if item[0] <= radius_km)[:limit]
+
+
+def scatter(rng, lat, lng, spread, count):
+    """Points autour de (lat, lng), longitudes ramenées dans [-180, 180)."""
+    points = {}
+    for point_id in range(count):
+        p_lat = max(-90.0, min(90.0, lat + rng.uniform(-spread, spread)))
+        p_lng = (lng + rng.uniform(-spread, spread) + 180) % 360 - 180
+        points[point_id] = (p_lat, p_lng)
+    return points
+
+
+def build(points, cell_size=0.1):
+    index = GridIndex(cell_size)
+    for point_id, (p_lat, p_lng) in points.items():
+        index.add(point_id, p_lat, p_lng)
+    return index
+
+
+@pytest.mark.parametrize("lat,lng", [
+    (14.69, -17.44),   # Dakar
+    (0.0, 0.0),
+    (-33.9, 18.4),
+    (0.0, 179.98),     # antiméridien, côté est
+    (0.0, -179.98),    # antiméridien, côté ouest
+    (65.0, 179.9),
+    (89.95, 10.0),     # pôle Nord
+    (-89.95, -120.0),  # pôle Sud
+    (75.0, 40.0),      # haute latitude : boîte plus large en longitude
+])
+@pytest.mark.parametrize("radius_km", [0.5, 5, 50, 300])
+def test_nearest_matches_brute_force(lat, lng, radius_km):
+    rng = random.Random(f"{lat}:{lng}:{radius_km}")
+    spread = min(60.0, radius_km / 111 * 3 + 0.01)
+    points = scatter(rng, lat, lng, spread, 2000)
+    index = build(points)
+    expected = brute_force(points, lat, lng, radius_km, limit=len(points))
+    assert index.nearest(lat, lng, radius_km, limit=len(points)) == expected
+
+
+def test_results_are_ordered_and_limited():
+    points = {i: (14.7 + i * 0.001, -17.44) for i in range(50)}
+    index = build(points)
+    result = index.nearest(14.7, -17.44, radius_km=100, limit=10)
+    assert [point_id for _, point_id in result] == list(range(10))
+    assert [distance for distance, _ in result] == sorted(distance for distance, _ in result)
+
+
+def test_radius_excludes_farther_points():
+    index = build({1: (14.70, -17.44), 2: (14.71, -17.44), 3: (14.80, -17.44)})
+    # 0,01° de latitude ≈ 1,11 km ; 0,1° ≈ 11,1 km
+    assert [point_id for _, point_id in index.nearest(14.70, -17.44, radius_km=2)] == [1, 2]
+    assert [point_id for _, point_id in index.nearest(14.70, -17.44, radius_km=20)] == [1, 2, 3]
+
+
+def test_points_across_the_antimeridian_are_found():
+    index = build({1: (0.0, 179.99), 2: (0.0, -179.99), 3: (0.0, 179.0)})
+    result = index.nearest(0.0, -179.995, radius_km=5)
+    assert sorted(point_id for _, point_id in result) == [1, 2]
+
+
+def test_moved_and_removed_points():
+    index = build({1: (14.70, -17.44), 2: (14.70, -17.45)})
+    index.add(1, 48.85, 2.35)
+    index.remove(2)
+    assert index.nearest(14.70, -17.44, radius_km=50) == []
+    assert [point_id for _, point_id in index.nearest(48.85, 2.35, radius_km=1)] == [1]
+    assert len(index) == 1
+
+
+def destination(lat, lng, distance_km, bearing):
+    """Point atteint depuis (lat, lng) en suivant le cap `bearing` (degrés) sur `distance_km`."""
+    angle = distance_km / EARTH_RADIUS_KM
+    phi, lam, theta = math.radians(lat), math.radians(lng), math.radians(bearing)
+    phi2 = math.asin(math.sin(phi) * math.cos(angle) + math.cos(phi) * math.sin(angle) * math.cos(theta))
+    lam2 = lam + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(phi), math.cos(angle) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lam2) + 180) % 360 - 180
+
+
+@pytest.mark.parametrize("lat,lng,radius_km", [
+    (14.69, -17.44, 25), (75.0, 40.0, 300), (80.0, 0.0, 800), (0.0, 179.9, 50), (89.9, 0.0, 50), (-60.0, -179.5, 200),
+])
+def test_bounding_box_contains_the_edge_of_the_circle(lat, lng, radius_km):
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+    for bearing in range(0, 360, 3):
+        p_lat, p_lng = destination(lat, lng, radius_km * 0.99999, bearing)
+        assert lat_min <= p_lat <= lat_max
+        assert any(lng_min <= p_lng + shift <= lng_max for shift in (-360, 0, 360))
+
+
+@pytest.mark.parametrize("lat,lng,radius_km", [(14.69, -17.44, 25), (75.0, 40.0, 300), (89.9, 0.0, 50)])
+def test_points_on_the_edge_are_found(lat, lng, radius_km):
+    points = {bearing: destination(lat, lng, radius_km * 0.99999, bearing) for bearing in range(0, 360, 3)}
+    result = build(points).nearest(lat, lng, radius_km, limit=len(points))
+    assert sorted(point_id for _, point_id in result) == sorted(points)
@@ -0,0 +1,57 @@
+"""Table `principal_identity` tenue à jour par les événements de `app.identities`."""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.employee import Employee
+from app.models.principal_identity import PrincipalIdentity
+from app.models.user import User
+from app.models.wash_record import WashRecord
+
+
+def identities(db):
+    return sorted(db.execute(select(PrincipalIdentity.identifier, PrincipalIdentity.kind)).all())
+
+
+def test_username_equal_to_own_email_is_accepted(db):
+    db.add(User(username="Awa@Example.com", email="awa@example.com", role="station_owner", hashed_password="x"))
+    db.commit()
+    assert identities(db) == [("awa@example.com", "username")]
+
+
+def test_update_rewrites_both_identifiers(db):
+    user = User(username="awa@example.com", email="awa@example.com", role="station_owner", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    user.username = "awa"
+    db.commit()
+    assert identities(db) == [("awa", "username"), ("awa@example.com", "email")]
+
+    user.email = "AWA"
+    db.commit()
+    assert identities(db) == [("awa", "username")]
+
+
+def test_identifier_shared_with_another_account_is_refused(db):
+    db.add(User(username="awa", email="awa@example.com", role="station_owner", hashed_password="x"))
+    db.commit()
+    db.add(Employee(username="AWA ", email="other@example.com", hashed_password="x"))
+    with pytest.raises(IntegrityError):
+        db.commit()
+
+
+def test_register_conflict_leaves_nothing_behind(db, client, auth_headers):
+    db.add(User(id=1, username="manager", email="manager@example.com", role="system_manager", hashed_password="x"))
+    db.add(User(id=2, username="awa", email="awa@example.com", role="station_owner", hashed_password="x"))
+    db.commit()
+    headers = auth_headers(id=1, role="system_manager")
+    payload = {"username": "AWA", "email": "nouveau@example.com", "password": "Motdepasse1!"}
+
+    response = client.post("/user/register", json=payload, headers=headers)
+    assert response.status_code == 400
+    assert db.execute(select(WashRecord)).all() == []
+
+    response = client.post("/user/register", json={**payload, "username": "binta"}, headers=headers)
+    assert response.status_code == 201
+    assert [record.wash_id for record in db.scalars(select(WashRecord))] == [response.json()["user"]["id"]]
@@ -0,0 +1,56 @@
+"""Acheminement des invalidations du bus vers le cache de réponses."""
+from dataclasses import replace
+
+import pytest
+
+from app.cache import RESPONSE_CACHE_PREFIXES, invalidation_bus, response_cache
+
+
+@pytest.fixture
+def subscribers():
+    """Abonnés du cache de réponses ; les autres caches restent hors du test."""
+    return [s for s in invalidation_bus._subscribers if s.prefix in RESPONSE_CACHE_PREFIXES]
+
+
+@pytest.fixture
+def calls(monkeypatch, subscribers):
+    recorded = {"invalidate": [], "clear": 0}
+
+    def invalidate(*tags):
+        recorded["invalidate"].append(sorted(tags))
+
+    def clear():
+        recorded["clear"] += 1
+
+    monkeypatch.setattr(response_cache, "invalidate", invalidate)
+    monkeypatch.setattr(response_cache, "clear", clear)
+    monkeypatch.setattr(invalidation_bus, "_subscribers", [
+        replace(s, on_flush=clear if s.on_flush else None) for s in subscribers
+    ])
+    return recorded
+
+
+@pytest.mark.parametrize("tag", ["car_wash:1", "owner:2", "benefit:*", "stocks:3"])
+def test_response_tags_reach_the_cache(calls, tag):
+    invalidation_bus.dispatch([tag], remote=True)
+    assert calls["invalidate"] == [[tag]]
+
+
+@pytest.mark.parametrize("tag", ["entitlements:1", "token_version:user:1:2", "identity:a@b.c", "geo:1", "catalog"])
+def test_other_tags_skip_the_cache(calls, tag):
+    invalidation_bus.dispatch([tag], remote=True)
+    assert calls["invalidate"] == []
+
+
+def test_mixed_batch_keeps_only_response_tags(calls):
+    invalidation_bus.dispatch(["entitlements:1", "owner:1", "catalog"], remote=False)
+    assert calls["invalidate"] == [["owner:1"]]
+
+
+def test_every_prefix_is_subscribed(subscribers):
+    assert sorted(s.prefix for s in subscribers) == sorted(RESPONSE_CACHE_PREFIXES)
+
+
+def test_flush_clears_the_cache_once(calls):
+    invalidation_bus.flush(remote=True)
+    assert calls["clear"] == (0 if response_cache.backend.shared else 1)
@@ -0,0 +1,100 @@
+"""Assignation et retrait d'avantages en requêtes ensemblistes."""
+import pytest
+from sqlalchemy import select
+
+from app.models.benefit import Benefit
+from app.models.offer import Offer
+from app.models.offer_benefit import OfferBenefit
+
+
+@pytest.fixture
+def catalog(db):
+    db.add(Offer(id=1, name="Pro", price=10))
+    db.add_all([Benefit(id=i, name=f"avantage{i}") for i in range(1, 51)])
+    db.commit()
+
+
+@pytest.fixture
+def admin(auth_headers):
+    return auth_headers(id=1, role="super_admin")
+
+
+def links(db):
+    return sorted(db.scalars(select(OfferBenefit.benefit_id).where(OfferBenefit.offer_id == 1)))
+
+
+def offer_statements(statements):
+    """Requêtes de la route, hors lecture de `token_version` et reconstruction des permissions."""
+    return [s for s in statements if not any(name in s for name in ("token_version", "subscription", "userpermission"))]
+
+
+def assign(client, ids, headers, offer_id=1):
+    return client.post(f"/offer_benefits/create/{offer_id}", json=ids, headers=headers)
+
+
+def remove(client, ids, headers, offer_id=1):
+    return client.request("DELETE", "/offer_benefits/remove", json={"offer_id": offer_id, "benefit_ids": ids}, headers=headers)
+
+
+@pytest.mark.parametrize("ids", [[1], list(range(1, 51))])
+def test_assign_runs_three_statements(catalog, client, statements, admin, ids):
+    statements.clear()
+    response = assign(client, ids, admin)
+    assert response.status_code == 201
+    assert response.json()["data"]["benefit_ids"] == ids
+    # Offre, contrôle des avantages, insertion
+    executed = offer_statements(statements)
+    assert len(executed) == 3
+    assert executed[2].startswith("INSERT INTO offerbenefit")
+
+
+@pytest.mark.parametrize("ids", [[1], list(range(1, 51))])
+def test_remove_runs_two_statements(catalog, client, statements, admin, db, ids):
+    assign(client, list(range(1, 51)), admin)
+    statements.clear()
+    response = remove(client, ids, admin)
+    assert response.status_code == 200
+    assert sorted(response.json()["data"]["benefit_ids"]) == ids
+    # Offre, suppression
+    assert len(offer_statements(statements)) == 2
+    assert links(db) == [i for i in range(1, 51) if i not in ids]
+
+
+def test_existing_links_are_skipped(catalog, client, admin, db):
+    assign(client, [1, 2], admin)
+    response = assign(client, [2, 3], admin)
+    assert response.status_code == 201
+    assert response.json()["data"]["benefit_ids"] == [3]
+    assert links(db) == [1, 2, 3]
+
+
+def test_all_links_existing_is_a_conflict(catalog, client, admin, db):
+    assign(client, [1, 2], admin)
+    response = assign(client, [2, 1, 2], admin)
+    assert response.status_code == 400
+    assert links(db) == [1, 2]
+
+
+def test_missing_benefits_are_listed_and_nothing_is_written(catalog, client, admin, db):
+    response = assign(client, [1, 98, 2, 99], admin)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Benefit with id 98, 99 not found"
+    assert links(db) == []
+
+
+def test_empty_assignment_is_refused(catalog, client, admin):
+    assert assign(client, [], admin).status_code == 400
+
+
+def test_missing_offer(catalog, client, admin):
+    assert assign(client, [1], admin, offer_id=2).status_code == 404
+    assert remove(client, [1], admin, offer_id=2).status_code == 404
+
+
+def test_removing_absent_links(catalog, client, admin, db):
+    assign(client, [1], admin)
+    assert remove(client, [2, 3], admin).status_code == 404
+    response = remove(client, [1, 2], admin)
+    assert response.status_code == 200
+    assert response.json()["data"]["benefit_ids"] == [1]
+    assert links(db) == []
@@ -0,0 +1,74 @@
+"""Pagination par curseur et sélection de champs des routes de liste."""
+import pytest
+
+from app.models.benefit import Benefit
+from app.pagination import PAGE_DEFAULT_LIMIT, PageParams, paginate
+
+TOTAL = PAGE_DEFAULT_LIMIT + 30
+
+
+@pytest.fixture
+def benefits(db):
+    db.add_all([
+        Benefit(id=i, name=f"avantage{i}", permission_name=f"perm{i}", description="x" * 200)
+        for i in range(1, TOTAL + 1)
+    ])
+    db.commit()
+
+
+@pytest.fixture
+def admin(auth_headers):
+    return auth_headers(id=1, role="super_admin")
+
+
+def test_without_limit_nor_cursor_returns_everything(benefits, client, admin):
+    body = client.get("/benefits/all", headers=admin).json()
+    assert [b["id"] for b in body["benefits"]] == list(range(1, TOTAL + 1))
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("limit", [1, 7, PAGE_DEFAULT_LIMIT])
+def test_cursor_round_trip_visits_every_row_once(benefits, client, admin, limit):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/benefits/all", headers=admin, params=params).json()
+        assert len(body["benefits"]) <= limit
+        seen += [b["id"] for b in body["benefits"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == list(range(1, TOTAL + 1))
+
+
+def test_cursor_without_limit_uses_default_page_size(benefits, client, admin):
+    first = client.get("/benefits/all", headers=admin, params={"limit": 5}).json()
+    body = client.get("/benefits/all", headers=admin, params={"cursor": first["next_cursor"]}).json()
+    assert [b["id"] for b in body["benefits"]] == list(range(6, 6 + PAGE_DEFAULT_LIMIT))
+    assert body["next_cursor"] is not None
+
+
+def test_invalid_cursor_is_rejected(client, admin, engine):
+    assert client.get("/benefits/all", headers=admin, params={"cursor": "pas-un-curseur"}).status_code == 400
+
+
+def test_fields_load_only_selected_columns(benefits, db, statements):
+    page = PageParams(limit=3, cursor=None, fields="name")
+    statements.clear()
+    rows, next_cursor = paginate(db.query(Benefit), Benefit, page)
+    assert rows == [{"id": i, "name": f"avantage{i}"} for i in (1, 2, 3)]
+    assert next_cursor is not None
+    (select,) = statements
+    selected = select.split(" FROM ")[0]
+    assert "benefit.name" in selected and "benefit.id" in selected
+    assert "benefit.description" not in selected
+
+
+def test_fields_reach_the_response(benefits, client, admin):
+    body = client.get("/benefits/all", headers=admin, params={"limit": 2, "fields": "name"}).json()
+    assert body["benefits"] == [{"id": 1, "name": "avantage1"}, {"id": 2, "name": "avantage2"}]
+
+
+def test_unknown_field_is_rejected(benefits, client, admin):
+    response = client.get("/benefits/all", headers=admin, params={"fields": "name,hashed_password"})
+    assert response.status_code == 400
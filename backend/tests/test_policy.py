@@ -0,0 +1,70 @@
+"""Table exhaustive des décisions de `app.policy`."""
+from itertools import product
+
+import pytest
+
+from app.models.employee import RoleEmployee
+from app.models.user import RoleUser
+from app.policy import PERMISSION_BITS, allowed, is_allowed, permission_bit
+
+EXPECTED = {
+    "super_admin": {
+        ("read", "offer"), ("create", "offer"), ("update", "offer"), ("delete", "offer"),
+        ("read", "benefit"), ("create", "benefit"), ("update", "benefit"), ("delete", "benefit"),
+        ("read", "offer_benefit"), ("create", "offer_benefit"), ("delete", "offer_benefit"),
+        ("read", "user"), ("create", "user"), ("delete", "user"), ("manage", "user"), ("export", "user"), ("report", "user"),
+        ("read", "employee"),
+        ("read", "car_wash"), ("export", "car_wash"), ("report", "car_wash"),
+        ("report", "subscription"),
+        ("read", "manager"), ("assign", "manager"),
+        ("read", "stats"),
+    },
+    "system_manager": {
+        ("read", "user"), ("create", "user"), ("delete", "user"),
+        ("create", "car_wash"),
+        ("read", "wash_record"),
+        ("read", "quota"),
+    },
+    "station_owner": {
+        ("read", "user"), ("create", "user"), ("delete", "user"),
+        ("read", "employee"), ("create", "employee"), ("update", "employee"), ("delete", "employee"), ("assign", "employee"),
+        ("list", "car_wash"), ("read", "car_wash"), ("export", "car_wash"),
+        ("create", "subscription"),
+        ("manage", "stock"),
+        ("list", "stock_history"),
+    },
+    "station_manager": {
+        ("create", "employee"),
+        ("manage", "stock"),
+    },
+    "car_washer": set(),
+    "station_client": set(),
+}
+
+ROLES = [role.value for role in (*RoleUser, *RoleEmployee)]
+PERMISSIONS = sorted(PERMISSION_BITS)
+
+
+def test_table_covers_every_role_and_permission():
+    assert sorted(EXPECTED) == sorted(ROLES)
+    assert set().union(*EXPECTED.values()) == set(PERMISSIONS)
+
+
+@pytest.mark.parametrize("role,permission", list(product(ROLES, PERMISSIONS)))
+def test_decision(role, permission):
+    action, resource = permission
+    assert allowed(role, action, resource) is (permission in EXPECTED[role])
+
+
+@pytest.mark.parametrize("action,resource", PERMISSIONS)
+def test_unknown_role_is_denied(action, resource):
+    assert allowed("intrus", action, resource) is False
+    assert is_allowed(None, permission_bit(action, resource)) is False
+
+
+@pytest.mark.parametrize("action,resource", [("fly", "offer"), ("read", "spaceship"), ("manage", "offer")])
+def test_unknown_permission_raises(action, resource):
+    with pytest.raises(ValueError):
+        permission_bit(action, resource)
+    with pytest.raises(ValueError):
+        allowed("super_admin", action, resource)
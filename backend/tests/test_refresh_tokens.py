@@ -0,0 +1,99 @@
+"""Rotation et purge des jetons de rafraîchissement."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.refresh_tokens import _hash, issue, prune_expired, rotate
+
+
+@pytest.fixture
+def user(db):
+    user = User(id=1, username="awa", email="awa@example.com", role="station_owner", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def token(db, user):
+    token = issue(db, user)
+    db.commit()
+    return token
+
+
+def stored(db, token):
+    return db.scalars(select(RefreshToken).where(RefreshToken.token_hash == _hash(token))).one()
+
+
+def refused(db, token):
+    with pytest.raises(HTTPException) as error:
+        rotate(db, token)
+    assert error.value.status_code == 401
+
+
+def test_rotation_returns_a_new_token_of_the_same_family(db, user, token):
+    principal, new_token = rotate(db, token)
+    assert principal.id == user.id
+    assert new_token != token
+    assert stored(db, token).used_at is not None
+    assert stored(db, new_token).used_at is None
+    assert stored(db, new_token).family_id == stored(db, token).family_id
+
+
+def test_replaying_a_used_token_revokes_the_family(db, user, token):
+    _, new_token = rotate(db, token)
+    refused(db, token)
+    # Le jeton légitime émis entre-temps est révoqué lui aussi
+    db.expire_all()
+    assert stored(db, new_token).used_at is not None
+    refused(db, new_token)
+
+
+def test_other_families_survive_a_replay(db, user, token):
+    other = issue(db, user)
+    db.commit()
+    rotate(db, token)
+    refused(db, token)
+    _, rotated = rotate(db, other)
+    assert rotated != other
+
+
+def test_expired_token_is_rejected(db, user, token):
+    stored(db, token).expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    refused(db, token)
+    db.expire_all()
+    assert stored(db, token).used_at is None
+
+
+def test_unknown_token_is_rejected(db, user):
+    refused(db, "inconnu")
+
+
+@pytest.mark.parametrize("change", [
+    lambda user: setattr(user, "is_active", False),
+    lambda user: setattr(user, "token_version", user.token_version + 1),
+])
+def test_revoked_account_is_rejected(db, user, token, change):
+    change(user)
+    db.commit()
+    refused(db, token)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_prune_removes_only_expired_tokens(db, user, batch_size):
+    now = datetime.utcnow()
+    kept = [issue(db, user) for _ in range(2)]
+    expired = [issue(db, user) for _ in range(5)]
+    db.flush()
+    for token in expired:
+        stored(db, token).expires_at = now - timedelta(days=1)
+    db.commit()
+
+    assert prune_expired(db, batch_size=batch_size) == 5
+    assert sorted(db.scalars(select(RefreshToken.token_hash))) == sorted(_hash(token) for token in kept)
+    assert prune_expired(db, batch_size=batch_size) == 0
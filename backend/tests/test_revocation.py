@@ -0,0 +1,55 @@
+"""Jetons refusés après désactivation ou changement de rôle du compte."""
+import pytest
+
+from app.cache import invalidation_bus
+from app.dependencies import create_access_token
+from app.models.user import User
+from app.revocation import token_versions
+
+
+@pytest.fixture
+def user(db):
+    user = User(id=1, username="awa", email="awa@example.com", role="station_owner", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def token(user):
+    return {"Authorization": f"Bearer {create_access_token(user)}"}
+
+
+def status_of(client, headers):
+    return client.get("/user/show/1", headers=headers).status_code
+
+
+CHANGES = [
+    pytest.param(lambda user: setattr(user, "is_active", False), id="desactive"),
+    pytest.param(lambda user: setattr(user, "role", "system_manager"), id="role"),
+]
+
+
+@pytest.mark.parametrize("change", CHANGES)
+def test_old_token_is_rejected_on_this_worker(db, client, user, token, change):
+    assert status_of(client, token) == 200
+    change(user)
+    db.commit()
+    assert status_of(client, token) == 401
+
+
+@pytest.mark.parametrize("change", CHANGES)
+def test_without_bus_revocation_by_another_worker_is_read_from_the_database(db, client, user, token, change):
+    assert not invalidation_bus.enabled
+    change(user)
+    db.commit()
+    # Message jamais reçu : ce worker ignore la nouvelle version
+    token_versions._versions.clear()
+    assert status_of(client, token) == 401
+
+
+def test_new_token_is_accepted_after_revocation(db, client, user, token):
+    user.role = "system_manager"
+    db.commit()
+    assert status_of(client, token) == 401
+    assert status_of(client, {"Authorization": f"Bearer {create_access_token(user)}"}) == 200
@@ -0,0 +1,62 @@
+"""Regroupement des GET identiques et simultanés par `SingleFlight.coalesce`."""
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import app.dependencies as dependencies
+from app.cache.singleflight import SingleFlight
+from app.dependencies import DbDependency
+
+
+def build_app(single_flight, calls):
+    app = FastAPI()
+
+    @app.get("/slow")
+    @single_flight.coalesce(scope="public")
+    def slow(db: DbDependency):
+        calls.append(db)
+        time.sleep(0.2)
+        return {"value": db.execute(text("SELECT 42")).scalar()}
+
+    return app
+
+
+def test_concurrent_requests_share_one_execution(engine):
+    single_flight = SingleFlight()
+    calls = []
+    app = build_app(single_flight, calls)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(client.get("/slow"), client.get("/slow"))
+
+    first, second = asyncio.run(run())
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() == {"value": 42}
+    assert len(calls) == 1
+    assert single_flight.metrics.snapshot()["/slow"]["executed"] == 1
+    assert single_flight.metrics.snapshot()["/slow"]["coalesced"] == 1
+
+
+def test_shared_execution_uses_its_own_session(engine, monkeypatch):
+    """La session de la requête peut être fermée pendant le calcul : il ne doit pas l'utiliser."""
+    single_flight = SingleFlight()
+    calls = []
+    request_sessions = []
+    original = dependencies.SessionLocal
+
+    def tracked_session(*args, **kwargs):
+        session = original(*args, **kwargs)
+        request_sessions.append(session)
+        return session
+
+    monkeypatch.setattr(dependencies, "SessionLocal", tracked_session)
+    assert TestClient(build_app(single_flight, calls)).get("/slow").status_code == 200
+
+    assert len(request_sessions) == 1
+    assert calls[0] is not request_sessions[0]
@@ -0,0 +1,71 @@
+"""Contrôles d'accès garage / stock : une seule lecture par lavage et par requête."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.dependencies import check_garage_access, check_stock_access, station_access
+from app.models.car_wash import CarWash
+from app.models.car_wash_employee import CarWashEmployee
+from app.models.employee import Employee
+from app.models.user import User
+from app.models.user_permission import UserPermission
+
+OWNER = {"id": 1, "role": "station_owner"}
+MANAGER = {"id": 5, "role": "station_manager"}
+
+
+def new_request():
+    return Request({"type": "http", "headers": [], "state": {}})
+
+
+@pytest.fixture
+def station(db):
+    db.add(User(id=1, username="owner", email="owner@example.com", role="station_owner", hashed_password="x"))
+    db.add(CarWash(id=1, user_id=1, name="Lavage"))
+    db.add(Employee(id=5, username="manager", email="manager@example.com", role="station_manager", hashed_password="x", owner_id=1))
+    db.flush()
+    db.add(CarWashEmployee(car_wash_id=1, employee_id=5))
+    db.add(UserPermission(user_id=1, permission_name="gestion_stock", valid_until=None))
+    db.add(UserPermission(user_id=1, permission_name="stock_managment", valid_until=datetime.now() + timedelta(days=1)))
+    db.commit()
+
+
+@pytest.mark.parametrize("user", [OWNER, MANAGER])
+def test_checks_share_one_query_per_request(station, db, statements, user):
+    request = new_request()
+    statements.clear()
+
+    check_garage_access(request, db, user, 1)
+    check_stock_access(request, db, user, 1)
+    access = station_access(request, db, user, 1)
+
+    assert len(statements) == 1
+    assert access.benefits == {"gestion_stock", "stock_managment"}
+
+
+def test_each_request_reads_again(station, db, statements):
+    statements.clear()
+    check_stock_access(new_request(), db, OWNER, 1)
+    check_stock_access(new_request(), db, OWNER, 1)
+    assert len(statements) == 2
+
+
+def test_expired_benefit_is_refused(station, db):
+    permission = db.get(UserPermission, (1, "stock_managment"))
+    permission.valid_until = datetime.now() - timedelta(days=1)
+    db.commit()
+
+    request = new_request()
+    check_garage_access(request, db, OWNER, 1)
+    with pytest.raises(HTTPException) as refused:
+        check_stock_access(request, db, OWNER, 1)
+    assert refused.value.status_code == 403
+
+
+def test_unassigned_manager_and_other_owner_are_refused(station, db):
+    with pytest.raises(HTTPException, match="Non assigné"):
+        check_stock_access(new_request(), db, {"id": 6, "role": "station_manager"}, 1)
+    with pytest.raises(HTTPException, match="Non propriétaire"):
+        check_stock_access(new_request(), db, {"id": 2, "role": "station_owner"}, 1)
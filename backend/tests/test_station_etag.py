@@ -0,0 +1,76 @@
+"""L'ETag d'un lavage change quand un de ses employés est modifié ou supprimé."""
+import pytest
+
+from app.cache import make_etag
+from app.models.car_wash import CarWash
+from app.models.car_wash_employee import CarWashEmployee
+from app.models.employee import Employee
+from app.models.user import User
+
+
+@pytest.fixture
+def station(db):
+    db.add(User(id=1, username="owner", email="owner@example.com", role="station_owner", hashed_password="x"))
+    db.add(CarWash(id=1, user_id=1, name="Lavage"))
+    db.add(Employee(id=5, username="washer", email="washer@example.com", hashed_password="x", owner_id=1))
+    db.flush()
+    db.add(CarWashEmployee(car_wash_id=1, employee_id=5))
+    db.commit()
+
+
+def station_etag(client, headers):
+    response = client.get("/car-wash/1", headers=headers)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_editing_an_employee_changes_the_station_etag(station, client, auth_headers):
+    headers = auth_headers(id=1, role="station_owner")
+    etag = station_etag(client, headers)
+
+    response = client.put("/user/edit/5", json={"firstname": "Awa"}, headers=headers)
+    assert response.status_code == 201
+
+    response = client.get("/car-wash/1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["employees"][0]["firstname"] == "Awa"
+
+
+def test_deleting_an_employee_changes_the_station_etag(station, client, auth_headers):
+    headers = auth_headers(id=1, role="station_owner")
+    etag = station_etag(client, headers)
+
+    response = client.delete("/user/delete/5", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/car-wash/1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_deleting_an_employee_evicts_the_cached_station(station, client, auth_headers):
+    headers = auth_headers(id=1, role="station_owner")
+    assert len(client.get("/car-wash/1", headers=headers).json()["employees"]) == 1
+
+    assert client.delete("/user/delete/5", headers=headers).status_code == 200
+
+    assert client.get("/car-wash/1", headers=headers).json()["employees"] == []
+
+
+@pytest.mark.parametrize("path", ["/car-wash/1", "/user/show/1"])
+def test_cached_versioned_route_has_a_single_validator(station, client, auth_headers, path):
+    headers = auth_headers(id=1, role="station_owner")
+    miss = client.get(path, headers=headers)
+    hit = client.get(path, headers=headers)
+    assert miss.status_code == hit.status_code == 200
+    # Même ETag de ligne, que la réponse vienne du cache ou non
+    assert miss.headers["ETag"] == hit.headers["ETag"]
+    assert miss.headers["ETag"].startswith('W/"')
+
+    response = client.get(path, headers={**headers, "If-None-Match": hit.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == hit.headers["ETag"]
+
+    # L'empreinte du corps en cache n'est pas un validateur de ces routes
+    response = client.get(path, headers={**headers, "If-None-Match": make_etag(miss.content)})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == hit.headers["ETag"]
@@ -0,0 +1,71 @@
+"""Expiration des abonnements : statut affiché et balayeur."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.dependencies import check_subscription_status, entitlement_cache, has_permission
+from app.models.benefit import Benefit
+from app.models.offer import Offer
+from app.models.offer_benefit import OfferBenefit
+from app.models.subscription import Status, Subscription
+from app.models.user import User
+from app.subscription_sweeper import expire_subscriptions
+
+
+@pytest.mark.parametrize("subscription_status,end_date,expected", [
+    (Status.PENDING, None, "pending"),
+    (Status.ACTIVE, None, "active"),
+    (Status.ACTIVE, datetime.now() + timedelta(days=1), "active"),
+    # Échu mais pas encore balayé (ou balayeur désactivé)
+    (Status.ACTIVE, datetime.now() - timedelta(days=1), "expired"),
+    (Status.INACTIVE, datetime.now() - timedelta(days=1), "expired"),
+    (Status.INACTIVE, None, "inactive"),
+])
+def test_check_subscription_status(subscription_status, end_date, expected):
+    subscription = Subscription(user_id=1, offer_id=1, status=subscription_status, end_date=end_date)
+    assert check_subscription_status(subscription) == expected
+
+
+@pytest.fixture
+def sqlite_advisory_lock(engine):
+    """`pg_try_advisory_xact_lock` n'existe pas sous SQLite : toujours accordé."""
+    connection = engine.raw_connection()
+    connection.driver_connection.create_function("pg_try_advisory_xact_lock", 1, lambda key: 1)
+    connection.close()
+
+
+@pytest.fixture
+def subscriptions(db, sqlite_advisory_lock):
+    db.add_all([
+        User(id=1, username="expired", email="expired@example.com", role="station_owner", hashed_password="x"),
+        User(id=2, username="current", email="current@example.com", role="station_owner", hashed_password="x"),
+        Offer(id=1, name="Pro", price=10),
+        Benefit(id=1, name="Stock", permission_name="stock_managment"),
+    ])
+    db.flush()
+    db.add(OfferBenefit(offer_id=1, benefit_id=1))
+    db.add_all([
+        Subscription(user_id=1, offer_id=1, status=Status.ACTIVE, end_date=datetime.utcnow() - timedelta(days=2)),
+        Subscription(user_id=2, offer_id=1, status=Status.ACTIVE, end_date=datetime.utcnow() + timedelta(days=2)),
+    ])
+    db.commit()
+
+
+def test_sweeper_expires_only_past_subscriptions(subscriptions, db):
+    assert expire_subscriptions(db) == [1]
+
+    statuses = dict(db.query(Subscription.user_id, Subscription.status).all())
+    assert statuses == {1: Status.INACTIVE, 2: Status.ACTIVE}
+    # Idempotent : le balayage suivant ne trouve plus rien
+    assert expire_subscriptions(db) == []
+
+
+def test_sweeper_evicts_cached_entitlements(subscriptions, db):
+    entitlement_cache.clear()
+    entitlement_cache.set(1, {"stock_managment": None})
+    assert has_permission(db, 1, "stock_managment")
+
+    expire_subscriptions(db)
+
+    assert entitlement_cache.get(1) is None
+    assert not has_permission(db, 1, "stock_managment")